@@ -0,0 +1,719 @@
+# -*- coding: utf-8 -*-
+"""
+Almacenamiento de la liga.
+
+Todos los almacenamientos comparten la interfaz de `Store`:
+
+- JsonStore: el formato de siempre, resultados.json reescrito entero al guardar.
+- EventLogStore: cada resultado se añade a un log JSON Lines con fsync (coste
+  O(1) por resultado) y cada cierto número de eventos se compacta en una
+  instantánea de resultados.json escrita de forma atómica. Al arrancar se
+  carga la última instantánea y se reaplica la cola del log.
+- SQLiteStore: base de datos SQLite (solo biblioteca estándar) en modo WAL,
+  con consultas indexadas por grupo y por jugador.
+
+El modo se elige con la variable de entorno LIGA_STORAGE (json | eventlog | sqlite).
+
+Varios operadores pueden introducir resultados a la vez con `ResultWriter`:
+cada lote se confirma con un cerrojo de fichero (advisory), incorporando antes
+lo que hayan escrito los demás, y se persiste en una sola escritura.
+"""
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+import calculos
+import ligas
+from calculos import COLUMNS, SCORE_EFFECTS, MatchLedger, Standings, recalculate_tiebreaks, register_result
+
+
+@contextmanager
+def file_lock(path: str):
+    """Cerrojo exclusivo entre procesos sobre `path` (se crea si no existe); espera hasta obtenerlo."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class Store(ABC):
+    """Interfaz común de almacenamiento."""
+
+    # Versión de los datos: sube con cada escritura
+    version = 0
+    _loaded_signature = None
+
+    @abstractmethod
+    def load(self) -> Tuple[Dict[str, pd.DataFrame], MatchLedger]:
+        """Devuelve las tablas por grupo y el registro de partidos."""
+
+    @abstractmethod
+    def append_result(self, match: Tuple) -> None:
+        """Persiste un resultado recién registrado."""
+
+    def replace_result(self, p1: str, p2: str, match: Tuple = None) -> None:
+        """
+        Persiste la corrección (`match`) o el borrado (None) del partido entre
+        p1 y p2. Por defecto no hace nada: la siguiente `snapshot` lo recoge.
+        """
+
+    def needs_compaction(self) -> bool:
+        """Indica si conviene llamar a `snapshot` antes del cierre."""
+        return False
+
+    @abstractmethod
+    def snapshot(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger) -> None:
+        """Guarda el estado completo (tablas con desempates y partidos)."""
+
+    @abstractmethod
+    def watched_files(self) -> List[str]:
+        """Ficheros cuyo cambio implica datos nuevos."""
+
+    def signature(self) -> Tuple[Tuple[int, int], ...]:
+        """Firma (mtime, tamaño) de `watched_files`: cambia en cuanto alguien guarda."""
+        signature = []
+        for path in self.watched_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append((0, 0))
+                continue
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def lock(self):
+        """Cerrojo de escritura compartido por todos los procesos que usan estos datos."""
+        return file_lock(self.watched_files()[0] + '.lock')
+
+    def _mark_synced(self) -> None:
+        self._loaded_signature = self.signature()
+
+    def sync(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger
+             ) -> Tuple[Dict[str, pd.DataFrame], MatchLedger, List[str]]:
+        """
+        Con el cerrojo tomado: devuelve el estado actual de los datos y los
+        grupos que han cambiado respecto al recibido. Si nadie ha escrito desde
+        la última carga o escritura propia (misma firma) se devuelve el estado
+        recibido sin leer nada.
+        """
+        if self._loaded_signature is not None and self.signature() == self._loaded_signature:
+            return group_tables, matches, []
+        return self._reload(group_tables, matches)
+
+    def _reload(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger
+                ) -> Tuple[Dict[str, pd.DataFrame], MatchLedger, List[str]]:
+        """Carga completa; cambian los grupos cuyos partidos no son los de `matches`."""
+        new_tables, new_matches = self.load()
+        changed = [group for group in new_tables
+                   if group not in group_tables or not np.array_equal(new_matches.group(group).records,
+                                                                      matches.group(group).records)]
+        return new_tables, new_matches, changed
+
+    def commit(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, applied: List[list]) -> None:
+        """Con el cerrojo tomado: persiste los resultados `applied`, ya registrados en memoria."""
+        self.snapshot(group_tables, matches)
+
+
+def log_path_for(data_file: str) -> str:
+    """Ruta del log de eventos asociado a un fichero de datos."""
+    return os.path.splitext(data_file)[0] + '.log.jsonl'
+
+
+class JsonStore(Store):
+    """Resultados.json completo: cada guardado reescribe toda la liga."""
+
+    def __init__(self, data_file: str = None, roster: Dict[str, List[str]] = None):
+        self.data_file = data_file or calculos.DATA_FILE
+        self.roster = roster
+
+    def load(self) -> Tuple[Dict[str, pd.DataFrame], MatchLedger]:
+        self._mark_synced()
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Fichero nuevo o dañado: load_data lo inicializa (y guarda copia del dañado)
+            self.version = 0
+            return calculos.load_data(self.data_file, self.roster)
+        self.version = int(data.get('version', 0))
+        return calculos.tables_from_data(data, self.roster)
+
+    def append_result(self, match: Tuple) -> None:
+        """En este modo los resultados solo se persisten al hacer `snapshot`."""
+
+    def snapshot(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger) -> None:
+        data = calculos.data_to_dict(group_tables, matches)
+        self.version += 1
+        data['version'] = self.version
+        calculos.atomic_write_json(self.data_file, data)
+        self._mark_synced()
+
+    def watched_files(self) -> List[str]:
+        return [self.data_file]
+
+
+class EventLogStore(Store):
+    """
+    Instantánea atómica + log de eventos en modo append.
+
+    Cada línea del log es `{"seq": n, "op": "result", "match": [...]}`. La
+    instantánea guarda en `log_seq` el último evento que incluye, de modo que
+    un corte entre escribir la instantánea y vaciar el log no duplica nada.
+    """
+
+    def __init__(self, data_file: str = None, log_file: str = None, compact_every: int = 200,
+                 roster: Dict[str, List[str]] = None):
+        self.data_file = data_file or calculos.DATA_FILE
+        self.roster = roster
+        self.log_file = log_file or log_path_for(self.data_file)
+        self.compact_every = compact_every
+        self.seq = 0
+        self.snapshot_seq = 0
+
+    def _read_log(self) -> Iterator[dict]:
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Solo puede quedar a medias la última línea (corte durante un append)
+                    print(f"⚠️ Línea incompleta ignorada en '{self.log_file}'.")
+                    return
+
+    def _load_snapshot(self) -> Tuple[Dict[str, pd.DataFrame], MatchLedger]:
+        if not os.path.exists(self.data_file):
+            return calculos.load_data(self.data_file, self.roster)
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            return calculos.load_data(self.data_file, self.roster)
+        self.snapshot_seq = int(data.get('log_seq', 0))
+        return calculos.tables_from_data(data, self.roster)
+
+    def events_after(self, seq: int) -> Iterator[dict]:
+        """Eventos del log con número de secuencia mayor que `seq`."""
+        for event in self._read_log():
+            if int(event.get('seq', 0)) > seq:
+                yield event
+
+    def apply_events(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger,
+                     events: Iterator[dict]) -> List[str]:
+        """
+        Aplica eventos del log posteriores a `seq` sobre el estado dado (las
+        tablas afectadas se sustituyen, con sus desempates recalculados) y
+        devuelve los grupos que cambian.
+        """
+        engines: Dict[str, Standings] = {}
+        for event in events:
+            seq = int(event.get('seq', 0))
+            if seq <= self.seq:
+                continue
+            self.seq = seq
+            if event.get('op') != 'result':
+                continue
+            match = event['match']
+            p1, p2, score1, score2 = match[:4]
+            group = matches.registry.group_of(p1)
+            if group is None or group != matches.registry.group_of(p2) or group not in group_tables:
+                continue
+            if group not in engines:
+                engines[group] = Standings.from_frame(group_tables[group])
+            register_result(engines[group], p1, p2, score1, score2, matches, verbose=False,
+                            round_number=match[5] if len(match) > 5 else 0,
+                            played_on=match[6] if len(match) > 6 else None)
+
+        for group, engine in engines.items():
+            group_tables[group] = engine.to_frame()
+        # Buchholz y HeadToHead de los grupos cambiados dependen de todos sus partidos
+        recalculate_tiebreaks({group: group_tables[group] for group in engines}, matches)
+        return list(engines)
+
+    def load(self) -> Tuple[Dict[str, pd.DataFrame], MatchLedger]:
+        """Carga la instantánea y reaplica los eventos del log posteriores a ella."""
+        self._mark_synced()
+        group_tables, matches = self._load_snapshot()
+        self.seq = self.snapshot_seq
+        self.apply_events(group_tables, matches, self._read_log())
+        return group_tables, matches
+
+    @property
+    def version(self) -> int:
+        return self.seq
+
+    def sync(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger
+             ) -> Tuple[Dict[str, pd.DataFrame], MatchLedger, List[str]]:
+        """Si solo ha crecido el log basta con aplicar sus eventos nuevos; si se compactó, se recarga."""
+        signature = self.signature()
+        previous = self._loaded_signature
+        if previous is not None and signature == previous:
+            return group_tables, matches, []
+        if previous is None or signature[0] != previous[0] or signature[1][1] < previous[1][1]:
+            return self._reload(group_tables, matches)
+        self._loaded_signature = signature
+        changed = self.apply_events(group_tables, matches, self.events_after(self.seq))
+        return group_tables, matches, changed
+
+    @property
+    def pending(self) -> int:
+        """Eventos en el log que aún no están en la instantánea."""
+        return self.seq - self.snapshot_seq
+
+    def append_result(self, match: Tuple) -> None:
+        """Añade un resultado al log y lo fuerza a disco antes de volver."""
+        self.append_results([match])
+
+    def append_results(self, batch: List[Tuple]) -> None:
+        """Añade varios resultados con una sola escritura y un solo fsync."""
+        lines = []
+        for match in batch:
+            self.seq += 1
+            lines.append(json.dumps({"seq": self.seq, "op": "result", "match": list(match)}, ensure_ascii=False))
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        self._mark_synced()
+
+    def commit(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, applied: List[list]) -> None:
+        self.append_results(applied)
+        if self.needs_compaction():
+            self.snapshot(group_tables, matches)
+
+    def needs_compaction(self) -> bool:
+        return self.pending >= self.compact_every
+
+    def snapshot(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger) -> None:
+        """Escribe la instantánea compactada de forma atómica y vacía el log."""
+        data = calculos.data_to_dict(group_tables, matches)
+        data['log_seq'] = self.seq
+        calculos.atomic_write_json(self.data_file, data)
+        self.snapshot_seq = self.seq
+        with open(self.log_file, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._mark_synced()
+
+    def watched_files(self) -> List[str]:
+        return [self.data_file, self.log_file]
+
+
+# Puntos 5/3/1 del jugador con marcador (sf, sa), generados desde SCORE_EFFECTS
+_POINTS_SQL = "CASE " + " ".join(
+    f"WHEN r.sf = {s1} AND r.sa = {s2} THEN {effect[2]}" for (s1, s2), effect in SCORE_EFFECTS.items()
+) + " ELSE 0 END"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    edition_id INTEGER NOT NULL REFERENCES editions(id),
+    name TEXT NOT NULL,
+    UNIQUE (edition_id, name)
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    name TEXT NOT NULL,
+    buchholz REAL NOT NULL DEFAULT 0,
+    head_to_head INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (group_id, name)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    p1_id INTEGER NOT NULL REFERENCES players(id),
+    p2_id INTEGER NOT NULL REFERENCES players(id),
+    score1 INTEGER NOT NULL,
+    score2 INTEGER NOT NULL,
+    winner_id INTEGER NOT NULL REFERENCES players(id),
+    pair_lo INTEGER NOT NULL,
+    pair_hi INTEGER NOT NULL,
+    round INTEGER NOT NULL DEFAULT 0,
+    played_on TEXT,
+    UNIQUE (pair_lo, pair_hi)
+);
+CREATE INDEX IF NOT EXISTS idx_groups_edition ON groups(edition_id);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players(name);
+CREATE INDEX IF NOT EXISTS idx_matches_group ON matches(group_id);
+CREATE INDEX IF NOT EXISTS idx_matches_p1 ON matches(p1_id);
+CREATE INDEX IF NOT EXISTS idx_matches_p2 ON matches(p2_id);
+"""
+
+_STANDINGS_SQL = f"""
+WITH r AS (
+    SELECT p1_id AS pid, score1 AS sf, score2 AS sa FROM matches WHERE group_id = :g
+    UNION ALL
+    -- Los descansos (p1_id = p2_id) solo cuentan una vez
+    SELECT p2_id AS pid, score2 AS sf, score1 AS sa FROM matches WHERE group_id = :g AND p2_id <> p1_id
+)
+SELECT p.name,
+       COALESCE(SUM(r.sf > r.sa), 0) AS wins,
+       COALESCE(SUM(r.sf < r.sa), 0) AS losses,
+       COALESCE(SUM({_POINTS_SQL}), 0) AS points,
+       p.buchholz,
+       COALESCE(SUM(r.sf - r.sa), 0) AS diff,
+       p.head_to_head
+FROM players p LEFT JOIN r ON r.pid = p.id
+WHERE p.group_id = :g
+GROUP BY p.id
+"""
+
+
+class SQLiteStore(Store):
+    """
+    Liga en SQLite con tablas editions/groups/players/matches.
+
+    La clasificación de un grupo y los partidos de un jugador se resuelven con
+    consultas sobre los índices, sin cargar la liga entera. El modo WAL permite
+    que el dashboard lea mientras se introducen resultados.
+
+    Cada hilo usa su propia conexión (sqlite3 no deja compartirlas), así que un
+    mismo almacenamiento sirve al hilo vigilante y a los de la app o la API.
+
+    Si la edición no tiene partidos en la base de datos y existe su
+    resultados.json (el fichero hermano con extensión .json), se importa al
+    abrirla, con la cola del log de eventos si la hay.
+    """
+
+    def __init__(self, db_file: str = None, edition: str = None, roster: Dict[str, List[str]] = None,
+                 seed_file: str = None):
+        self.db_file = db_file or os.path.splitext(calculos.DATA_FILE)[0] + '.sqlite3'
+        self.edition = edition or calculos.EDITION.title
+        self.roster = roster or calculos.players
+        self.seed_file = seed_file or os.path.splitext(self.db_file)[0] + '.json'
+        self._local = threading.local()
+        self.conn.executescript(_SCHEMA)
+        self._migrate_columns()
+        self._sync_roster()
+        self._seed()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se abre la primera vez que la pide)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _migrate_columns(self) -> None:
+        """Añade a bases de datos antiguas las columnas de jornada y fecha."""
+        existing = {row[1] for row in self.conn.execute('PRAGMA table_info(matches)')}
+        with self.conn:
+            if 'round' not in existing:
+                self.conn.execute('ALTER TABLE matches ADD COLUMN round INTEGER NOT NULL DEFAULT 0')
+            if 'played_on' not in existing:
+                self.conn.execute('ALTER TABLE matches ADD COLUMN played_on TEXT')
+
+    def _sync_roster(self) -> None:
+        """Da de alta edición, grupos y jugadores del listado que aún no existan."""
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO editions(name) VALUES (?)', (self.edition,))
+            self.edition_id = self.conn.execute(
+                'SELECT id FROM editions WHERE name = ?', (self.edition,)).fetchone()[0]
+            self.group_ids: Dict[str, int] = {}
+            self.player_ids: Dict[str, int] = {}
+            for group, names in self.roster.items():
+                self.conn.execute('INSERT OR IGNORE INTO groups(edition_id, name) VALUES (?, ?)',
+                                  (self.edition_id, group))
+                gid = self.conn.execute('SELECT id FROM groups WHERE edition_id = ? AND name = ?',
+                                        (self.edition_id, group)).fetchone()[0]
+                self.group_ids[group] = gid
+                self.conn.executemany('INSERT OR IGNORE INTO players(group_id, name) VALUES (?, ?)',
+                                      [(gid, name) for name in names])
+                for pid, name in self.conn.execute('SELECT id, name FROM players WHERE group_id = ?', (gid,)):
+                    self.player_ids[name] = pid
+
+    def _seed(self) -> None:
+        """Importa `seed_file` si la edición aún no tiene partidos (INSERT OR IGNORE: repetirlo no duplica)."""
+        if not os.path.exists(self.seed_file):
+            return
+        empty = self.conn.execute(
+            'SELECT 1 FROM matches m JOIN groups g ON g.id = m.group_id WHERE g.edition_id = ? LIMIT 1',
+            (self.edition_id,)).fetchone() is None
+        if not empty:
+            return
+        group_tables, matches = EventLogStore(self.seed_file, roster=self.roster).load()
+        if not len(matches):
+            return
+        self.snapshot(group_tables, matches)
+        print(f"✅ {len(matches)} partidos importados de '{self.seed_file}' en '{self.db_file}'.")
+
+    def _match_row(self, match: Tuple) -> Tuple:
+        p1, p2, score1, score2, winner = match[:5]
+        rnd = match[5] if len(match) > 5 and match[5] else 0
+        played_on = match[6] if len(match) > 6 else None
+        i, j = self.player_ids[p1], self.player_ids[p2]
+        group_id = self.conn.execute('SELECT group_id FROM players WHERE id = ?', (i,)).fetchone()[0]
+        # Un descanso por jugador y jornada: su clave de pareja es (jugador, -jornada)
+        pair = (i, -rnd) if i == j else (min(i, j), max(i, j))
+        return (group_id, i, j, score1, score2, self.player_ids[winner], *pair, rnd, played_on)
+
+    def standings(self, group: str) -> pd.DataFrame:
+        """Tabla de un grupo calculada por SQL a partir de sus partidos."""
+        rows = self.conn.execute(_STANDINGS_SQL, {'g': self.group_ids[group]}).fetchall()
+        df = pd.DataFrame(rows, columns=['Nombre', 'Victorias', 'Derrotas', 'Puntuación',
+                                         'Buchholz', 'Dif. de pts.', 'HeadToHead']).set_index('Nombre')
+        df.index.name = None
+        df['Empates'] = 0
+        return df.astype({'Victorias': int, 'Derrotas': int, 'Empates': int, 'Puntuación': float,
+                          'Buchholz': float, 'Dif. de pts.': int, 'HeadToHead': int})[COLUMNS]
+
+    def player_matches(self, name: str) -> List[Tuple]:
+        """Partidos de un jugador como tuplas (p1, p2, score1, score2, winner)."""
+        pid = self.player_ids.get(name)
+        if pid is None:
+            return []
+        return self.conn.execute("""
+            SELECT a.name, b.name, m.score1, m.score2, w.name
+            FROM matches m
+            JOIN players a ON a.id = m.p1_id
+            JOIN players b ON b.id = m.p2_id
+            JOIN players w ON w.id = m.winner_id
+            WHERE m.p1_id = :p
+            UNION ALL
+            SELECT a.name, b.name, m.score1, m.score2, w.name
+            FROM matches m
+            JOIN players a ON a.id = m.p1_id
+            JOIN players b ON b.id = m.p2_id
+            JOIN players w ON w.id = m.winner_id
+            WHERE m.p2_id = :p AND m.p1_id <> :p
+        """, {'p': pid}).fetchall()
+
+    @property
+    def version(self) -> int:
+        return self.conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def load(self) -> Tuple[Dict[str, pd.DataFrame], MatchLedger]:
+        self._mark_synced()
+        group_tables = {group: self.standings(group) for group in self.roster}
+        rows = self.conn.execute("""
+            SELECT a.name, b.name, m.score1, m.score2, w.name, m.round, m.played_on
+            FROM matches m
+            JOIN groups g ON g.id = m.group_id
+            JOIN players a ON a.id = m.p1_id
+            JOIN players b ON b.id = m.p2_id
+            JOIN players w ON w.id = m.winner_id
+            WHERE g.edition_id = ?
+            ORDER BY m.id
+        """, (self.edition_id,)).fetchall()
+        return group_tables, MatchLedger.from_roster(rows, self.roster)
+
+    def append_result(self, match: Tuple) -> None:
+        self.commit({}, None, [match])
+
+    def commit(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, applied: List[list]) -> None:
+        """
+        Inserta el lote y los desempates de sus grupos en una sola transacción
+        y sube `user_version`.
+        """
+        players = {match[0] for match in applied}
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO matches(group_id, p1_id, p2_id, score1, score2, winner_id, pair_lo, pair_hi,
+                                              round, played_on)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [self._match_row(match) for match in applied])
+            self._save_tiebreaks({group: df for group, df in group_tables.items() if not players.isdisjoint(df.index)})
+            self.conn.execute(f'PRAGMA user_version = {self.version + 1}')
+        self._mark_synced()
+
+    def replace_result(self, p1: str, p2: str, match: Tuple = None) -> None:
+        """`snapshot` solo inserta partidos nuevos: la corrección se aplica aquí (conserva jornada y fecha)."""
+        i, j = self.player_ids[p1], self.player_ids[p2]
+        if i == j:
+            # Descansos: el registro borra el último del jugador (su marcador no se edita)
+            if match is None:
+                with self.conn:
+                    self.conn.execute('DELETE FROM matches WHERE id = (SELECT MAX(id) FROM matches '
+                                      'WHERE p1_id = ? AND p2_id = ?)', (i, i))
+            return
+        pair = (min(i, j), max(i, j))
+        with self.conn:
+            if match is None:
+                self.conn.execute('DELETE FROM matches WHERE pair_lo = ? AND pair_hi = ?', pair)
+                return
+            self.conn.execute("""
+                UPDATE matches SET p1_id = ?, p2_id = ?, score1 = ?, score2 = ?, winner_id = ?
+                WHERE pair_lo = ? AND pair_hi = ?
+            """, (self.player_ids[match[0]], self.player_ids[match[1]], match[2], match[3],
+                  self.player_ids[match[4]]) + pair)
+
+    def snapshot(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger) -> None:
+        """Inserta los partidos que falten y guarda Buchholz/HeadToHead por jugador."""
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO matches(group_id, p1_id, p2_id, score1, score2, winner_id, pair_lo, pair_hi,
+                                              round, played_on)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [self._match_row(m) for m in matches.to_list()
+                  if m[0] in self.player_ids and m[1] in self.player_ids])
+            self._save_tiebreaks(group_tables)
+            self.conn.execute(f'PRAGMA user_version = {self.version + 1}')
+        self._mark_synced()
+
+    def _save_tiebreaks(self, group_tables: Dict[str, pd.DataFrame]) -> None:
+        """Dentro de una transacción: guarda Buchholz/HeadToHead de los jugadores de `group_tables`."""
+        for group, df in group_tables.items():
+            gid = self.group_ids.get(group)
+            if gid is None:
+                continue
+            self.conn.executemany(
+                'UPDATE players SET buchholz = ?, head_to_head = ? WHERE group_id = ? AND name = ?',
+                [(float(b), int(h), gid, name) for name, b, h in zip(df.index, df['Buchholz'], df['HeadToHead'])])
+
+    def watched_files(self) -> List[str]:
+        return [self.db_file, self.db_file + '-wal']
+
+
+def open_store(kind: str = None, data_file: str = None, edition: 'ligas.Edition' = None) -> Store:
+    """
+    Devuelve el almacenamiento configurado (por defecto, LIGA_STORAGE o 'json')
+    de la edición activa o de `edition` (ver ligas.py).
+    """
+    kind = kind or os.environ.get('LIGA_STORAGE', 'json')
+    roster = None
+    if edition is not None:
+        data_file = data_file or edition.data_file
+        roster = edition.groups
+    if kind == 'json':
+        return JsonStore(data_file, roster)
+    if kind == 'eventlog':
+        return EventLogStore(data_file, roster=roster)
+    if kind == 'sqlite':
+        db_file = os.path.splitext(data_file)[0] + '.sqlite3' if edition is not None else data_file
+        return SQLiteStore(db_file, edition.title if edition is not None else None, roster)
+    raise ValueError(f"Almacenamiento desconocido: {kind}")
+
+
+# -----------------------------------------------------------------------------
+# Introducción concurrente de resultados
+# -----------------------------------------------------------------------------
+
+class CommitResult:
+    """Desglose de un lote confirmado por `ResultWriter.commit`."""
+
+    def __init__(self, version: int = 0):
+        self.applied: List[Tuple] = []
+        self.duplicates: List[Tuple] = []
+        self.conflicts: List[Tuple[Tuple, Tuple]] = []   # (propuesto, ya registrado)
+        self.invalid: List[Tuple] = []
+        self.version = version
+
+    def __repr__(self) -> str:
+        return (f"CommitResult(v{self.version}: {len(self.applied)} aplicados, {len(self.duplicates)} duplicados, "
+                f"{len(self.conflicts)} en conflicto, {len(self.invalid)} inválidos)")
+
+
+class ResultWriter:
+    """
+    Introducción de resultados segura con varios operadores a la vez.
+
+    `add` acumula resultados en memoria; `commit` toma el cerrojo del
+    almacenamiento, incorpora lo que hayan guardado los demás (solo si la firma
+    de los ficheros cambió), fusiona el lote y lo persiste en una escritura:
+
+    - par nuevo: se registra;
+    - par ya registrado con el mismo marcador: duplicado, se descarta;
+    - par ya registrado con otro marcador: conflicto, se descarta y se informa
+      (se corrige con `calculos.py edit`).
+    """
+
+    def __init__(self, store: Store = None):
+        self.store = store or open_store()
+        with self.store.lock():
+            self.group_tables, self.matches = self.store.load()
+        self.pending: List[Tuple] = []
+
+    def add(self, p1: str, p2: str, score1: int, score2: int, round_number: int = 0, played_on: str = None) -> None:
+        self.pending.append((p1, p2, score1, score2, round_number, played_on))
+
+    def _merge(self, result: CommitResult) -> List[str]:
+        engines: Dict[str, Standings] = {}
+        for proposed in self.pending:
+            p1, p2, score1, score2, round_number, played_on = proposed
+            group = self.matches.registry.group_of(p1)
+            if group is None or group != self.matches.registry.group_of(p2) or group not in self.group_tables:
+                result.invalid.append(proposed)
+                continue
+            if p1 == p2:
+                existing = self.matches.get_bye(p1, round_number)
+            else:
+                existing = self.matches.get_pair(p1, p2)
+            if existing is not None:
+                if existing[2:4] == ((score1, score2) if existing[0] == p1 else (score2, score1)):
+                    result.duplicates.append(proposed)
+                else:
+                    result.conflicts.append((proposed, existing))
+                continue
+            if group not in engines:
+                engines[group] = Standings.from_frame(self.group_tables[group])
+            if register_result(engines[group], p1, p2, score1, score2, self.matches, verbose=False,
+                               round_number=round_number, played_on=played_on):
+                result.applied.append(self.matches.entry(-1))
+            else:
+                result.invalid.append(proposed)
+        for group, engine in engines.items():
+            self.group_tables[group] = engine.to_frame()
+        return list(engines)
+
+    def commit(self) -> CommitResult:
+        """Confirma los resultados pendientes (commit de grupo: un cerrojo y una escritura por lote)."""
+        result = CommitResult()
+        if not self.pending:
+            result.version = self.store.version
+            return result
+        with self.store.lock():
+            self.group_tables, self.matches, synced = self.store.sync(self.group_tables, self.matches)
+            merged = self._merge(result)
+            # Grupos con partidos nuevos, propios o de otros operadores
+            changed = [group for group in self.group_tables if group in synced or group in merged]
+            recalculate_tiebreaks({group: self.group_tables[group] for group in changed}, self.matches)
+            if result.applied:
+                self.store.commit(self.group_tables, self.matches, result.applied)
+            result.version = self.store.version
+        self.pending = []
+        return result
+
+    def close(self) -> CommitResult:
+        """Confirma lo pendiente y guarda el estado completo con los desempates recalculados."""
+        result = self.commit()
+        with self.store.lock():
+            self.group_tables, self.matches, _ = self.store.sync(self.group_tables, self.matches)
+            recalculate_tiebreaks(self.group_tables, self.matches)
+            self.store.snapshot(self.group_tables, self.matches)
+        return result
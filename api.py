@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+API JSON local de solo lectura: clasificaciones, partidos por jugador y cuadro.
+
+Las respuestas se sirven desde una instantánea en memoria con el cuerpo ya
+serializado y su ETag fuerte (sha1 del cuerpo). Un cliente que repite la
+petición con `If-None-Match` recibe un 304 sin cuerpo mientras no cambien los
+datos. La instantánea se mantiene al día con `vigilancia.LiveStandings`: al
+cambiar un grupo solo se vuelven a serializar ese grupo y el cuadro.
+
+    GET /api                           índice y versión de los datos
+    GET /api/grupos                    grupos con su enlace
+    GET /api/grupos/<grupo>            clasificación en el orden de la app
+    GET /api/jugadores/<nombre>        partidos de un jugador (sin tildes ni mayúsculas)
+    GET /api/cuadro                    cruces del playoff
+
+    python api.py --puerto 8765 --edicion one-piece-malaga/7
+"""
+import argparse
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import pandas as pd
+
+import ligas
+from almacenamiento import open_store
+from calculos import MatchLedger, NameIndex, days_to_date
+from cuadro import QUALIFIERS_PER_GROUP, Bracket
+from exportar import JSON_COLUMNS, group_slugs
+from instrumentacion import incr
+from vigilancia import LiveStandings
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+PREFIX = '/api'
+
+# Cuerpo ya serializado y su ETag
+Response = Tuple[bytes, str]
+
+
+def make_response(obj) -> Response:
+    body = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """`If-None-Match` (lista de ETags o '*') contiene `etag`; comparación débil, como pide el RFC 9110."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+
+def group_payload(group: str, df: pd.DataFrame) -> dict:
+    columns = [col for col in JSON_COLUMNS if col in df.columns]
+    return {'grupo': group, 'clasificacion': json.loads(df[columns].to_json(orient='records', force_ascii=False))}
+
+
+def bracket_payload(display_tables: Dict[str, pd.DataFrame]) -> dict:
+    bracket = Bracket.from_standings(display_tables, QUALIFIERS_PER_GROUP)
+    if bracket is None:
+        return {'titulo': None, 'rondas': [], 'campeon': None}
+    return {'titulo': bracket.title(), 'rondas': bracket.rounds, 'campeon': bracket.champion}
+
+
+class Snapshot:
+    """
+    Respuestas de una versión de los datos. Es inmutable salvo la caché de
+    partidos por jugador, que se rellena al pedirlos a partir de una copia de
+    los partidos tomada al crearla; el servidor sustituye la instantánea
+    entera al cambiar los datos.
+    """
+
+    def __init__(self, version: int, display_tables: Dict[str, pd.DataFrame], matches: MatchLedger,
+                 previous: 'Snapshot' = None, changed: List[str] = None):
+        self.version = version
+        # Copia propia: las respuestas por jugador no pueden ver partidos de otra versión
+        self.records = matches.records.copy()
+        self.registry = matches.registry
+        self.index = NameIndex({group: list(df['Nombre']) for group, df in display_tables.items()})
+        self.slugs = {slug: group for group, slug in group_slugs(display_tables).items()}
+        self.responses: Dict[str, Response] = {}
+        for slug, group in self.slugs.items():
+            path = f"{PREFIX}/grupos/{slug}"
+            if previous is not None and changed is not None and group not in changed and path in previous.responses:
+                self.responses[path] = previous.responses[path]
+            else:
+                self.responses[path] = make_response(group_payload(group, display_tables[group]))
+        self.responses[f"{PREFIX}/grupos"] = make_response(
+            [{'grupo': group, 'url': f"{PREFIX}/grupos/{slug}"} for slug, group in self.slugs.items()])
+        self.responses[f"{PREFIX}/cuadro"] = make_response(bracket_payload(display_tables))
+        self.responses[PREFIX] = make_response({
+            'version': version,
+            'grupos': f"{PREFIX}/grupos",
+            'jugadores': f"{PREFIX}/jugadores/<nombre>",
+            'cuadro': f"{PREFIX}/cuadro",
+        })
+        self._players: Dict[str, Response] = {}
+
+    def player(self, name: str) -> Optional[Response]:
+        """
+        Partidos de un jugador (con jornada y fecha), serializados la primera
+        vez que se piden. Los descansos salen con `rival` nulo.
+        """
+        entry = self.index.lookup(name)
+        if entry is None:
+            return None
+        group, _, name = entry
+        response = self._players.get(name)
+        if response is None:
+            pid = self.registry.ids[name]
+            records = self.records
+            rows = records[(records['p1'] == pid) | (records['p2'] == pid)]
+            names = self.registry.names
+            played = []
+            for p1, p2, s1, s2, _, rnd, days in rows.tolist():
+                home = p1 == pid
+                own, other = (s1, s2) if home else (s2, s1)
+                rival = names[p2 if home else p1] if p1 != p2 else None
+                played.append({'rival': rival, 'a_favor': own, 'en_contra': other,
+                               'victoria': own > other, 'jornada': rnd, 'fecha': days_to_date(days)})
+            response = self._players[name] = make_response({'jugador': name, 'grupo': group, 'partidos': played})
+        return response
+
+    def get(self, path: str) -> Optional[Response]:
+        path = path.rstrip('/') or '/'
+        response = self.responses.get(path)
+        if response is None and path.startswith(f"{PREFIX}/jugadores/"):
+            response = self.player(unquote(path[len(PREFIX) + len('/jugadores/'):]))
+        return response
+
+
+class ApiState:
+    """Instantánea actual, sustituida de golpe cada vez que la clasificación en vivo cambia."""
+
+    def __init__(self, live: LiveStandings):
+        self.live = live
+        self.snapshot = self._build()
+        live.subscribe(self._on_change)
+
+    def _build(self, previous: Snapshot = None, changed: List[str] = None) -> Snapshot:
+        version, display_tables, matches = self.live.state()
+        return Snapshot(version, display_tables, matches, previous, changed)
+
+    def _on_change(self, changed: List[str]) -> None:
+        # Se llama desde el hilo vigilante: las peticiones en curso siguen con la instantánea anterior
+        self.snapshot = self._build(self.snapshot, changed)
+        incr('api.instantaneas')
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET/HEAD desde la instantánea; conexiones persistentes (HTTP/1.1)."""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeceras y cuerpo salen en dos escrituras: sin esto Nagle + ACK retardado añaden ~40 ms
+    disable_nagle_algorithm = True
+    state: ApiState = None
+
+    def _respond(self, head_only: bool) -> None:
+        path = self.path.split('?', 1)[0]
+        response = self.state.snapshot.get(path)
+        if response is None:
+            incr('api.404')
+            self.send_error(404)
+            return
+        body, etag = response
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            incr('api.304')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        incr('api.200')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(False)
+
+    def do_HEAD(self):
+        self._respond(True)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(edition: ligas.Edition = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                live: LiveStandings = None) -> ThreadingHTTPServer:
+    """Servidor de la API de `edition` (por defecto, la activa) con su vigilante ya arrancado."""
+    live = live or LiveStandings(open_store(edition=edition or ligas.get_edition())).start()
+    handler = type('Handler', (ApiHandler,), {'state': ApiState(live)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='API JSON de solo lectura de la liga.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--puerto', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--edicion', default=None, help='Clave "liga/edición" (por defecto, la activa).')
+    args = parser.parse_args(argv)
+
+    server = make_server(ligas.get_edition(args.edicion), args.host, args.puerto)
+    print(f"API en http://{args.host}:{server.server_address[1]}{PREFIX} (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
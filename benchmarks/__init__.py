@@ -0,0 +1 @@
+"""Benchmarks de la liga. Se ejecutan sin servidor de Streamlit: python -m benchmarks.<modulo>."""
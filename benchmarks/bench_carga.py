@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Tiempo de carga de resultados.json: formato antiguo (detección de orientación
+y coerción de tipos) frente al formato con schema_version y lector estricto.
+
+    python -m benchmarks.bench_carga --players 10000 --matches 500000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import calculos
+from benchmarks.generador import generate_league
+
+
+def legacy_dict(group_tables, matches) -> dict:
+    """Formato anterior a schema_version: tablas orient='index'."""
+    data = {group: df.to_dict(orient='index') for group, df in group_tables.items()}
+    return {"tables": data, "matches": [list(m) for m in matches]}
+
+
+def best_of(repeat: int, func, *args) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_load(path: str, roster, repeat: int):
+    """Tiempo total de load_data y tiempo solo de reconstrucción de tablas (JSON ya parseado)."""
+    total = best_of(repeat, calculos.load_data, path, roster)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data['matches'] = []
+    tables = best_of(repeat, calculos.tables_from_data, data, roster)
+    return total, tables
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--matches', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    group_size = 100
+    roster, group_tables, matches = generate_league(
+        groups=max(1, args.players // group_size), players_per_group=group_size, max_matches=args.matches)
+    print(f"Liga sintética: {sum(len(n) for n in roster.values())} jugadores, {len(matches)} partidos")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(legacy_dict(group_tables, matches), f, ensure_ascii=False, indent=2)
+        current_path = os.path.join(tmp, 'current.json')
+        calculos.save_data(group_tables, matches, current_path)
+
+        legacy = time_load(legacy_path, roster, args.repeat)
+        current = time_load(current_path, roster, args.repeat)
+
+    print(f"{'':18}{'load_data':>12}{'solo tablas':>14}")
+    print(f"{'Formato antiguo':18}{legacy[0]:11.3f}s{legacy[1]:13.3f}s")
+    print(f"{f'schema_version {calculos.SCHEMA_VERSION}':18}{current[0]:11.3f}s{current[1]:13.3f}s"
+          f"  (tablas x{legacy[1] / current[1]:.1f})")
+
+
+if __name__ == '__main__':
+    main()
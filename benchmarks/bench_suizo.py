@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Tiempo de emparejamiento suizo (suizo.pair_round) en un torneo abierto
+sintético: se juegan `--rondas` rondas con resultados aleatorios (y el
+descanso) registrados con `Pairing.register` y se mide cada emparejamiento.
+
+    python -m benchmarks.bench_suizo --jugadores 2000 --rondas 9
+"""
+import argparse
+import time
+
+import numpy as np
+
+import suizo
+from benchmarks.generador import generate_league
+from calculos import SCORE_EFFECTS, Standings, recalculate_tiebreaks
+
+_OUTCOMES = list(SCORE_EFFECTS)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jugadores', type=int, default=2000)
+    parser.add_argument('--rondas', type=int, default=9)
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    roster, group_tables, matches = generate_league(groups=1, players_per_group=args.jugadores, completion=0,
+                                                    seed=args.semilla)
+    group = next(iter(roster))
+    rng = np.random.default_rng(args.semilla)
+    print(f"{'ronda':>6}{'mesas':>8}{'ms':>10}{'repetidos':>11}")
+    for _ in range(args.rondas):
+        start = time.perf_counter()
+        pairing = suizo.pair_round(group_tables[group], matches)
+        elapsed = time.perf_counter() - start
+        print(f"{pairing.round_number:6}{len(pairing):8}{elapsed * 1000:10.1f}{pairing.rematches:11}")
+        engine = Standings.from_frame(group_tables[group])
+        pairing.register(engine, [_OUTCOMES[k] for k in rng.integers(len(_OUTCOMES), size=len(pairing))], matches)
+        group_tables[group] = engine.to_frame()
+        recalculate_tiebreaks(group_tables, matches)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de carga para la API JSON (api.py): varias conexiones persistentes
+piden en bucle las mismas rutas durante `--segundos` y se mide el número de
+peticiones por segundo y la latencia.
+
+Con `--condicional` (por defecto) cada conexión envía el ETag de la primera
+respuesta en `If-None-Match`, como un cliente que consulta periódicamente, y
+las respuestas deberían ser 304.
+
+    python -m benchmarks.carga_api                       # arranca su propio servidor
+    python -m benchmarks.carga_api --url http://127.0.0.1:8765 --conexiones 8 --sin-condicional
+"""
+import argparse
+import multiprocessing
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+DEFAULT_PATHS = ['/api/grupos/grupo-1', '/api/cuadro', '/api']
+
+
+def _serve(port: int, ready) -> None:
+    import api
+    server = api.make_server(port=port)
+    ready.set()
+    server.serve_forever()
+
+
+def start_server() -> Tuple[multiprocessing.Process, int]:
+    """Servidor de la API de la edición activa en otro proceso, en un puerto libre."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(port, ready), daemon=True)
+    process.start()
+    if not ready.wait(60):
+        process.terminate()
+        raise RuntimeError("El servidor de la API no arrancó.")
+    return process, port
+
+
+class Connection:
+    """Conexión HTTP/1.1 persistente mínima: una petición y su respuesta completa cada vez."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer = b''
+
+    def request(self, path: str, etag: str = None) -> Tuple[int, Dict[str, str], bytes]:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}"]
+        if etag:
+            lines.append(f"If-None-Match: {etag}")
+        self.sock.sendall(('\r\n'.join(lines) + '\r\n\r\n').encode('ascii'))
+        while b'\r\n\r\n' not in self.buffer:
+            self._fill()
+        head, self.buffer = self.buffer.split(b'\r\n\r\n', 1)
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        headers = {}
+        for line in header_lines:
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        while len(self.buffer) < length:
+            self._fill()
+        body, self.buffer = self.buffer[:length], self.buffer[length:]
+        return int(status_line.split()[1]), headers, body
+
+    def _fill(self) -> None:
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("El servidor cerró la conexión.")
+        self.buffer += chunk
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def client(host: str, port: int, paths: List[str], conditional: bool, deadline: float,
+           statuses: Counter, latencies: List[float]) -> None:
+    conn = Connection(host, port)
+    etags = {}
+    k = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[k % len(paths)]
+            k += 1
+            start = time.perf_counter()
+            status, headers, _ = conn.request(path, etags.get(path) if conditional else None)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if 'etag' in headers:
+                etags[path] = headers['etag']
+    finally:
+        conn.close()
+
+
+def run(host: str, port: int, paths: List[str], connections: int, seconds: float, conditional: bool) -> dict:
+    deadline = time.perf_counter() + seconds
+    statuses: List[Counter] = [Counter() for _ in range(connections)]
+    latencies: List[List[float]] = [[] for _ in range(connections)]
+    threads = [threading.Thread(target=client, args=(host, port, paths, conditional, deadline,
+                                                     statuses[k], latencies[k]))
+               for k in range(connections)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    merged = sum(statuses, Counter())
+    lat = np.array([x for chunk in latencies for x in chunk]) * 1000
+    total = int(sum(merged.values()))
+    return {'peticiones': total, 'por_segundo': total / elapsed, 'estados': dict(merged),
+            'p50_ms': float(np.percentile(lat, 50)) if total else 0.0,
+            'p99_ms': float(np.percentile(lat, 99)) if total else 0.0}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='API ya arrancada; sin ella se arranca una local.')
+    parser.add_argument('--rutas', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--conexiones', type=int, default=4)
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--sin-condicional', dest='condicional', action='store_false',
+                        help='No envía If-None-Match (respuestas 200 completas).')
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        process, port = start_server()
+        host = '127.0.0.1'
+    try:
+        stats = run(host, port, args.rutas, args.conexiones, args.segundos, args.condicional)
+    finally:
+        if process is not None:
+            process.terminate()
+
+    estados = ', '.join(f"{code}: {count}" for code, count in sorted(stats['estados'].items()))
+    print(f"{stats['peticiones']} peticiones en {args.segundos:g} s con {args.conexiones} conexiones "
+          f"({'condicionales' if args.condicional else 'completas'})")
+    print(f"  {stats['por_segundo']:.0f} pet/s   p50 {stats['p50_ms']:.2f} ms   p99 {stats['p99_ms']:.2f} ms   "
+          f"[{estados}]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de estrés de la introducción concurrente de resultados: varios procesos
+(operadores) confirman lotes con `ResultWriter` sobre el mismo almacenamiento.
+
+Cada partido del todos contra todos se reparte a un operador; una fracción
+`--solape` se envía además a otro operador, la mitad con el mismo marcador
+(duplicado) y la otra mitad con un marcador distinto (conflicto). Al terminar
+se comprueba que no se ha perdido ningún resultado, que duplicados y
+conflictos se han detectado todos y que las tablas cuadran con los partidos.
+
+    python -m benchmarks.estres_escritura
+    python -m benchmarks.estres_escritura --tipos json sqlite --operadores 8 --lote 10
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import calculos
+import ligas
+from almacenamiento import ResultWriter, open_store
+from benchmarks.generador import generate_league
+
+_OUTCOMES = list(calculos.SCORE_EFFECTS)
+
+# (p1, p2, score1, score2)
+Proposal = Tuple[str, str, int, int]
+
+
+def plan(roster: Dict[str, List[str]], operators: int, overlap: float, seed: int = 0
+         ) -> Tuple[List[List[Proposal]], Dict[Tuple[str, str], Proposal], int, int]:
+    """
+    Reparte los partidos entre operadores. Devuelve (propuestas por operador,
+    resultado original por par, duplicados esperados, conflictos esperados).
+    """
+    rng = np.random.default_rng(seed)
+    work: List[List[Proposal]] = [[] for _ in range(operators)]
+    expected: Dict[Tuple[str, str], Proposal] = {}
+    duplicates = conflicts = 0
+    for names in roster.values():
+        for a in range(len(names)):
+            for b in range(a + 1, len(names)):
+                score = _OUTCOMES[rng.integers(len(_OUTCOMES))]
+                proposal = (names[a], names[b], *score)
+                owner = int(rng.integers(operators))
+                work[owner].append(proposal)
+                expected[(names[a], names[b])] = proposal
+                if operators > 1 and rng.random() < overlap:
+                    other = (owner + 1 + int(rng.integers(operators - 1))) % operators
+                    if rng.random() < 0.5:
+                        # Mismo resultado introducido desde el otro lado de la mesa
+                        work[other].append((names[b], names[a], score[1], score[0]))
+                        duplicates += 1
+                    else:
+                        work[other].append((names[a], names[b], score[1], score[0]))
+                        conflicts += 1
+    for proposals in work:
+        rng.shuffle(proposals)
+    return work, expected, duplicates, conflicts
+
+
+def operator(kind: str, edition: ligas.Edition, proposals: List[Proposal], batch: int) -> Dict[str, int]:
+    """Un operador: confirma sus propuestas en lotes de `batch` y cierra."""
+    writer = ResultWriter(open_store(kind, edition=edition))
+    counts = {'applied': 0, 'duplicates': 0, 'conflicts': 0, 'invalid': 0, 'commits': 0}
+    for start in range(0, len(proposals), batch):
+        for p1, p2, score1, score2 in proposals[start:start + batch]:
+            writer.add(p1, p2, score1, score2)
+        result = writer.commit()
+        counts['commits'] += 1
+        for key in ('applied', 'duplicates', 'conflicts', 'invalid'):
+            counts[key] += len(getattr(result, key))
+    writer.close()
+    return counts
+
+
+def verify(kind: str, edition: ligas.Edition, expected: Dict[Tuple[str, str], Proposal]) -> List[str]:
+    """Problemas del estado final: partidos perdidos o sobrantes e inconsistencias de las tablas."""
+    group_tables, matches = open_store(kind, edition=edition).load()
+    problems = [f"Perdido: {p1} - {p2}" for p1, p2 in expected if not matches.has_pair(p1, p2)]
+    if len(matches) != len(expected):
+        problems.append(f"{len(matches)} partidos guardados, se esperaban {len(expected)}")
+    return problems + calculos.check_consistency(group_tables, matches)
+
+
+def run(kind: str, operators: int, groups: int, players: int, batch: int, overlap: float, seed: int = 0
+        ) -> Dict[str, float]:
+    roster, _, _ = generate_league(groups, players, completion=0, seed=seed)
+    work, expected, duplicates, conflicts = plan(roster, operators, overlap, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        edition = ligas.Edition('estres', 'Estrés', '1', 'Estrés', os.path.join(tmp, 'resultados.json'), roster)
+        store = open_store(kind, edition=edition)
+        store.snapshot(*store.load())
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(operators) as pool:
+            counts = pool.starmap(operator, [(kind, edition, proposals, batch) for proposals in work])
+        elapsed = time.perf_counter() - start
+
+        totals = {key: sum(c[key] for c in counts) for key in counts[0]}
+        problems = verify(kind, edition, expected)
+    if totals['duplicates'] != duplicates:
+        problems.append(f"{totals['duplicates']} duplicados detectados, se esperaban {duplicates}")
+    if totals['conflicts'] != conflicts:
+        problems.append(f"{totals['conflicts']} conflictos detectados, se esperaban {conflicts}")
+    submitted = sum(len(proposals) for proposals in work)
+    return dict(totals, submitted=submitted, seconds=elapsed, per_second=submitted / elapsed, problems=problems)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tipos', nargs='+', default=['json', 'eventlog', 'sqlite'])
+    parser.add_argument('--operadores', type=int, default=4)
+    parser.add_argument('--grupos', type=int, default=8)
+    parser.add_argument('--jugadores', type=int, default=12, help='Jugadores por grupo.')
+    parser.add_argument('--lote', type=int, default=5, help='Resultados por commit.')
+    parser.add_argument('--solape', type=float, default=0.2, help='Fracción de partidos enviados dos veces.')
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'':10}{'enviados':>10}{'aplicados':>11}{'dup.':>6}{'confl.':>8}{'commits':>9}{'s':>8}{'res/s':>9}")
+    for kind in args.tipos:
+        stats = run(kind, args.operadores, args.grupos, args.jugadores, args.lote, args.solape)
+        print(f"{kind:10}{stats['submitted']:10}{stats['applied']:11}{stats['duplicates']:6}{stats['conflicts']:8}"
+              f"{stats['commits']:9}{stats['seconds']:8.2f}{stats['per_second']:9.0f}")
+        for problem in stats['problems'][:10]:
+            print(f"  ⚠️ {problem}")
+        failed = failed or bool(stats['problems'])
+    if failed:
+        raise SystemExit(1)
+    print("✅ Sin resultados perdidos y tablas consistentes.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de ligas sintéticas reproducibles (con semilla) para los benchmarks.
+"""
+import string
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import calculos
+from calculos import MatchLedger, Standings
+
+_OUTCOMES = list(calculos.SCORE_EFFECTS)
+
+
+def player_names(count: int, prefix: str, name_length: int, rng: np.random.Generator) -> List[str]:
+    """Nombres únicos de `name_length` caracteres como mínimo (prefijo + relleno aleatorio + número)."""
+    letters = np.array(list(string.ascii_letters))
+    names = []
+    for i in range(count):
+        base = f"{prefix}{i + 1}"
+        pad = max(0, name_length - len(base) - 1)
+        names.append(("".join(rng.choice(letters, size=pad)) + " " + base) if pad else base)
+    return names
+
+
+def _sample_pairs(n: int, count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """`count` pares distintos (i < j) de entre n jugadores, sin materializar todos los pares."""
+    total = n * (n - 1) // 2
+    count = min(count, total)
+    if total <= 2_000_000:
+        flat = rng.choice(total, size=count, replace=False)
+        iu, ju = np.triu_indices(n, k=1)
+        return iu[flat], ju[flat]
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < count:
+        i = rng.integers(0, n, size=2 * count)
+        j = rng.integers(0, n, size=2 * count)
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+        new = (lo * n + hi)[lo != hi]
+        keys = np.unique(np.concatenate([keys, new]))
+    keys = rng.permutation(keys)[:count]
+    return keys // n, keys % n
+
+
+def generate_league(groups: int = 4, players_per_group: int = 10, completion: float = 1.0,
+                    name_length: int = 12, max_matches: int = None, seed: int = 0):
+    """
+    Liga sintética con `groups` grupos de `players_per_group` jugadores y una
+    fracción `completion` del todos contra todos jugada (limitada a
+    `max_matches` partidos en total si se indica).
+
+    Devuelve (roster, group_tables, matches) con el mismo formato que load_data.
+    """
+    rng = np.random.default_rng(seed)
+    roster: Dict[str, List[str]] = {
+        f"Grupo {g + 1}": player_names(players_per_group, f"G{g + 1}-", name_length, rng) for g in range(groups)
+    }
+    per_group = int(round(completion * players_per_group * (players_per_group - 1) / 2))
+    if max_matches is not None:
+        per_group = min(per_group, max_matches // max(1, groups))
+
+    group_tables: Dict[str, pd.DataFrame] = {}
+    rows = []
+    for group, names in roster.items():
+        i, j = _sample_pairs(players_per_group, per_group, rng)
+        outcome = rng.integers(0, len(_OUTCOMES), size=len(i))
+        scores = np.array(_OUTCOMES)[outcome]
+        engine = Standings(names)
+        engine.apply_batch(i, j, scores[:, 0], scores[:, 1])
+        group_tables[group] = engine.to_frame()
+        for a, b, s1, s2 in zip(i.tolist(), j.tolist(), scores[:, 0].tolist(), scores[:, 1].tolist()):
+            rows.append((names[a], names[b], s1, s2, names[a] if s1 > s2 else names[b]))
+
+    matches = MatchLedger.from_roster(rows, roster)
+    return roster, group_tables, matches
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks de las funciones principales sobre ligas sintéticas de
+distinto tamaño. No necesita servidor de Streamlit.
+
+    python -m benchmarks.suite                      # tamaños 10, 100, 1000, 10000
+    python -m benchmarks.suite --tamanos 10 100 --salida base.json
+    python -m benchmarks.suite --comparar base.json # compara con una ejecución previa
+
+Cada caso registra el mejor tiempo de `--repeat` ejecuciones y el pico de
+memoria (tracemalloc, en una ejecución aparte). Los resultados se guardan en
+JSON junto con el commit de git para poder comparar entre versiones.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+import calculos
+from benchmarks.generador import generate_league
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'resultados')
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Callable[[], object] = None) -> Dict[str, float]:
+    """Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecución adicional."""
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        best = min(best, time.perf_counter() - start)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    func(arg) if setup else func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run_size(players_per_group: int, groups: int, completion: float, max_matches: int, name_length: int,
+             repeat: int, register_ops: int, seed: int) -> List[dict]:
+    """Ejecuta todos los casos para un tamaño de grupo."""
+    roster, group_tables, matches = generate_league(groups, players_per_group, completion, name_length,
+                                                    max_matches, seed)
+    group = next(iter(roster))
+    df = group_tables[group]
+    group_matches = matches.group(group)
+    names = roster[group]
+    calculos.recalculate_tiebreaks(group_tables, matches)
+
+    # Partidos nuevos para register_result: pares del grupo aún sin jugar (intentos acotados)
+    rng = np.random.default_rng(seed + 1)
+    chosen = {}
+    for i, j in rng.integers(0, len(names), size=(20 * register_ops, 2)).tolist():
+        if len(chosen) >= register_ops:
+            break
+        key = (min(i, j), max(i, j))
+        if i != j and key not in chosen and not matches.has_pair(names[i], names[j]):
+            chosen[key] = (names[i], names[j])
+    new_pairs = list(chosen.values())
+
+    def register_frame(state):
+        table, ledger = state
+        for p1, p2 in new_pairs:
+            calculos.register_result(table, p1, p2, 2, 1, ledger, verbose=False)
+
+    def register_engine(state):
+        table, ledger = state
+        engine = calculos.Standings.from_frame(table)
+        for p1, p2 in new_pairs:
+            calculos.register_result(engine, p1, p2, 2, 1, ledger, verbose=False)
+        engine.to_frame()
+
+    def fresh_state():
+        return df.copy(), calculos.MatchLedger(matches.to_list(), matches.registry)
+
+    cases = {
+        'register_result[DataFrame]': (register_frame, fresh_state, len(new_pairs)),
+        'register_result[Standings]': (register_engine, fresh_state, len(new_pairs)),
+        'calculate_buchholz': (lambda: calculos.calculate_buchholz(df, group_matches), None, 1),
+        'calculate_head_to_head': (lambda: calculos.calculate_head_to_head(df, group_matches), None, 1),
+        'standings_table': (lambda: calculos.standings_table(df, matches), None, 1),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'resultados.json')
+        cases['save_data'] = (lambda: calculos.save_data(group_tables, matches, path), None, 1)
+        cases['load_data'] = (lambda: calculos.load_data(path, roster), None, 1)
+        calculos.save_data(group_tables, matches, path)
+
+        for name, (func, setup, ops) in cases.items():
+            if ops == 0:
+                continue
+            stats = measure(func, repeat, setup)
+            results.append({
+                'case': name,
+                'players_per_group': players_per_group,
+                'groups': groups,
+                'matches': len(matches),
+                'ops': ops,
+                'seconds': stats['seconds'],
+                'seconds_per_op': stats['seconds'] / ops,
+                'peak_bytes': stats['peak_bytes'],
+            })
+            print(f"{name:28} n={players_per_group:<6} partidos={len(matches):<8} "
+                  f"{stats['seconds'] * 1000:10.2f} ms  pico {stats['peak_bytes'] / 1e6:8.2f} MB")
+    return results
+
+
+def compare(current: List[dict], baseline_path: str) -> None:
+    """Muestra la relación de tiempos frente a una ejecución guardada."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    base = {(r['case'], r['players_per_group']): r for r in baseline['results']}
+    print(f"\nComparación con {baseline_path} (commit {baseline.get('commit')}):")
+    for r in current:
+        ref = base.get((r['case'], r['players_per_group']))
+        if ref is None:
+            continue
+        ratio = r['seconds_per_op'] / ref['seconds_per_op'] if ref['seconds_per_op'] else float('nan')
+        flag = '  <-- más lento' if ratio > 1.2 else ''
+        print(f"{r['case']:28} n={r['players_per_group']:<6} x{ratio:6.2f}{flag}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=DEFAULT_SIZES, help='Jugadores por grupo.')
+    parser.add_argument('--grupos', type=int, default=4)
+    parser.add_argument('--completado', type=float, default=1.0, help='Fracción del todos contra todos jugada.')
+    parser.add_argument('--max-partidos', type=int, default=200_000, help='Tope de partidos de la liga.')
+    parser.add_argument('--longitud-nombre', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--registros', type=int, default=500, help='Partidos nuevos en register_result.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--salida', default=None, help='Fichero JSON de resultados.')
+    parser.add_argument('--comparar', default=None, help='JSON de una ejecución anterior.')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.tamanos:
+        results.extend(run_size(size, args.grupos, args.completado, args.max_partidos, args.longitud_nombre,
+                                args.repeat, args.registros, args.seed))
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'params': vars(args),
+        'results': results,
+    }
+    output = args.salida or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+    if args.comparar:
+        compare(results, args.comparar)
+
+
+if __name__ == '__main__':
+    main()
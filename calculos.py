@@ -1,9 +1,22 @@
 # -*- coding: utf-8 -*-
+import argparse
+import datetime
+import numpy as np
 import pandas as pd
 import json
+import re
 import shlex
 import os
-from typing import Dict, List, Tuple
+import shutil
+import sys
+import tempfile
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import ligas
+from instrumentacion import incr, span, timed
 
 # -----------------------------------------------------------------------------
 # Configuración inicial
@@ -17,29 +30,19 @@ from typing import Dict, List, Tuple
 #
 # NOTA: Se asume formato al mejor de 3 (no hay empates).
 
-players = {
-    "Grupo 1": [
-        "Marco Calabrese", "Bipi", "Joselu", "Jorge Cuesta", "Ruben Vazquez",
-        "Millan", "Moi", "York Junior", "Fran", "Remus Giurca"
-    ],
-    "Grupo 2": [
-        "Doble J", "Dario", "Silver", "Jose Manzano", "Sara",
-        "Alex", "Mario", "Tony", "Rafa Arcas", "Rome"
-    ],
-    "Grupo 3": [
-        "Bloke", "Francis Gutierrez", "Jorge Echeverria", "Malnacido",
-        "Gonzalo Cris", "Rafa Carneros", "Cristian", "Juanje",
-        "Pasku", "Soto"
-    ],
-    "Grupo 4": [
-        "Manzanator", "Richard", "Pablo Sanz", "Jafervi",
-        "Baute", "Ivan", "Donete", "Jota Fajardo",
-        "Sergio Discipulo", "Jeb"
-    ]
+# Grupos y fichero de resultados de la edición activa (ligas.json, ver ligas.py)
+EDITION = ligas.get_edition()
+players = EDITION.groups
+DATA_FILE = EDITION.data_file
+COLUMNS = ['Victorias', 'Derrotas', 'Empates', 'Puntuación', 'Buchholz', 'Dif. de pts.', 'HeadToHead']
+COLUMN_DTYPES = {
+    'Victorias': np.int64, 'Derrotas': np.int64, 'Empates': np.int64, 'Puntuación': np.float64,
+    'Buchholz': np.float64, 'Dif. de pts.': np.int64, 'HeadToHead': np.int64,
 }
 
-DATA_FILE = 'resultados.json'
-COLUMNS = ['Victorias', 'Derrotas', 'Empates', 'Puntuación', 'Buchholz', 'Dif. de pts.', 'HeadToHead']
+# Versión del formato de resultados.json. Los ficheros sin `schema_version`
+# son del formato antiguo (tablas orient='index' o 'columns') y se migran.
+SCHEMA_VERSION = 2
 
 # -----------------------------------------------------------------------------
 # Utilidades de inicialización / carga / guardado
@@ -92,175 +95,1573 @@ def _df_from_any(table_dict: dict) -> pd.DataFrame:
     return df
 
 
-def save_data(group_tables: Dict[str, pd.DataFrame], matches: List[Tuple]) -> None:
-    """Guarda tablas y partidos con orientación por índice para mayor robustez."""
-    data = {group: df.to_dict(orient='index') for group, df in group_tables.items()}
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump({"tables": data, "matches": matches}, f, ensure_ascii=False, indent=2)
+def data_to_dict(group_tables: Dict[str, pd.DataFrame], matches: List[Tuple]) -> dict:
+    """
+    Estructura JSON de resultados.json (versión SCHEMA_VERSION): por grupo, la
+    lista de jugadores y una lista de valores por columna, más los partidos.
+    """
+    data = {
+        group: {
+            "index": [str(name) for name in df.index],
+            "columns": {col: df[col].tolist() for col in COLUMNS},
+        }
+        for group, df in group_tables.items()
+    }
+    return {"schema_version": SCHEMA_VERSION, "tables": data, "matches": _matches_to_list(matches)}
 
 
-def load_data() -> Tuple[Dict[str, pd.DataFrame], List[Tuple]]:
-    """Carga datos si existen; si no, inicializa desde cero."""
-    if not os.path.exists(DATA_FILE):
-        print("📂 No se encontró 'resultados.json'. Se creará uno nuevo.")
-        return {group: initialize_table(players[group]) for group in players}, []
+def _matches_to_list(matches) -> list:
+    if isinstance(matches, MatchLedger):
+        return matches.to_list()
+    return [list(m) for m in matches]
+
+
+# umask del proceso (se lee una vez: os.umask solo permite consultarla cambiándola)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
+
+def file_mode(path: str) -> int:
+    """Permisos que debe tener `path` al reemplazarlo: los que ya tiene o, si es nuevo, 0o666 menos la umask."""
     try:
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
 
-        # Reconstruye cada tabla con tolerancia a distintos formatos previos
-        group_tables = {}
-        for group in players.keys():
-            raw_tbl = data.get('tables', {}).get(group, {})
-            if raw_tbl:
-                df = _df_from_any(raw_tbl)
-            else:
-                df = initialize_table(players[group])
 
-            # Garantiza que estén todos los jugadores del listado actual
-            for name in players[group]:
-                if name not in df.index:
-                    df.loc[name] = 0
-            df = _coerce_types(df)
+def atomic_write_json(path: str, obj) -> None:
+    """
+    Escribe JSON en un temporal del mismo directorio, hace fsync y lo renombra
+    sobre `path`: un corte a mitad de escritura nunca deja el fichero a medias.
+    El fichero conserva sus permisos (mkstemp crea el temporal con 0600).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@timed('calculos.save_data')
+def save_data(group_tables: Dict[str, pd.DataFrame], matches: List[Tuple], data_file: str = None) -> None:
+    """Guarda tablas y partidos con orientación por índice para mayor robustez."""
+    atomic_write_json(data_file or DATA_FILE, data_to_dict(group_tables, matches))
+
+
+def _table_from_columns(raw_tbl: dict) -> pd.DataFrame:
+    """Lector estricto del formato actual: columnas ya tipadas, sin heurísticas."""
+    columns = raw_tbl["columns"]
+    missing = set(COLUMNS) - set(columns)
+    if missing:
+        raise ValueError(f"Faltan columnas {sorted(missing)}; migra el fichero con 'python calculos.py migrate'.")
+    return pd.DataFrame(
+        {col: np.asarray(columns[col], dtype=COLUMN_DTYPES[col]) for col in COLUMNS},
+        index=pd.Index(raw_tbl["index"], dtype=object),
+    )
+
+
+def _legacy_tables(data: dict, roster: Dict[str, List[str]]) -> Dict[str, pd.DataFrame]:
+    """Tablas del formato antiguo, con detección de orientación y coerción de tipos."""
+    # Reconstruye cada tabla con tolerancia a distintos formatos previos
+    group_tables = {}
+    for group in roster.keys():
+        raw_tbl = data.get('tables', {}).get(group, {})
+        if raw_tbl:
+            df = _df_from_any(raw_tbl)
+        else:
+            df = initialize_table(roster[group])
+
+        # Garantiza que estén todos los jugadores del listado actual
+        for name in roster[group]:
+            if name not in df.index:
+                df.loc[name] = 0
+        df = _coerce_types(df)
+        group_tables[group] = df
+    return group_tables
+
+
+def tables_from_data(data: dict, roster: Dict[str, List[str]] = None) -> Tuple[Dict[str, pd.DataFrame], 'MatchLedger']:
+    """Reconstruye tablas y registro de partidos a partir del JSON ya parseado."""
+    roster = roster or players
+    version = data.get('schema_version')
+    if version is None:
+        group_tables = _legacy_tables(data, roster)
+    elif version == SCHEMA_VERSION:
+        group_tables = {}
+        for group, names in roster.items():
+            raw_tbl = data['tables'].get(group)
+            df = _table_from_columns(raw_tbl) if raw_tbl else initialize_table(names)
+            # Jugadores nuevos del listado: una sola reindexación con ceros
+            known = set(df.index)
+            new_names = [name for name in names if name not in known]
+            if new_names:
+                df = df.reindex(list(df.index) + new_names, fill_value=0).astype(COLUMN_DTYPES)
             group_tables[group] = df
+    else:
+        raise ValueError(f"schema_version {version} no soportada (esperada {SCHEMA_VERSION}).")
+
+    matches = MatchLedger.from_roster(data.get('matches', []), roster)
+    return group_tables, matches
 
-        matches = data.get('matches', [])
-        return group_tables, matches
+
+def migrate_data_file(data_file: str = None, roster: Dict[str, List[str]] = None) -> bool:
+    """
+    Convierte un fichero del formato antiguo al actual (copia de seguridad en
+    `<fichero>.v1.bak`). Devuelve False si ya estaba en el formato actual.
+    Se hace con el cerrojo de escritura del almacenamiento tomado.
+    """
+    from almacenamiento import file_lock
+
+    data_file = data_file or DATA_FILE
+    # Mismo cerrojo que Store.lock() de JsonStore y EventLogStore sobre este fichero
+    with file_lock(data_file + '.lock'):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('schema_version') == SCHEMA_VERSION:
+            return False
+
+        group_tables, matches = tables_from_data(data, roster)
+        shutil.copyfile(data_file, data_file + '.v1.bak')
+        migrated = data_to_dict(group_tables, matches)
+        # Conserva claves extra (p. ej. log_seq del log de eventos)
+        for key, value in data.items():
+            if key not in migrated:
+                migrated[key] = value
+        atomic_write_json(data_file, migrated)
+    return True
+
+
+@timed('calculos.load_data')
+def load_data(data_file: str = None, roster: Dict[str, List[str]] = None) -> Tuple[Dict[str, pd.DataFrame], 'MatchLedger']:
+    """Carga datos si existen; si no, inicializa desde cero."""
+    data_file = data_file or DATA_FILE
+    roster = roster or players
+    if not os.path.exists(data_file):
+        print(f"📂 No se encontró '{data_file}'. Se creará uno nuevo.")
+        return {group: initialize_table(roster[group]) for group in roster}, MatchLedger.from_roster([], roster)
+
+    try:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return tables_from_data(data, roster)
 
     except (FileNotFoundError, json.JSONDecodeError):
-        print("❌ Error al cargar los datos. Se inicializarán nuevos datos.")
-        return {group: initialize_table(players[group]) for group in players}, []
+        # Se conserva una copia del fichero dañado para que el siguiente guardado no la pise
+        backup = data_file + '.corrupto'
+        if os.path.exists(data_file):
+            shutil.copyfile(data_file, backup)
+        print(f"❌ Error al cargar los datos (copia en '{backup}'). Se inicializarán nuevos datos.")
+        return {group: initialize_table(roster[group]) for group in roster}, MatchLedger.from_roster([], roster)
 
 
 # -----------------------------------------------------------------------------
 # Registro de resultados y cálculos auxiliares
 # -----------------------------------------------------------------------------
 
+# Efecto de cada marcador BO3 válido sobre (Victorias p1, Victorias p2, Puntuación p1, Puntuación p2).
+# Las derrotas de uno son las victorias del otro y la diferencia es score1 - score2.
+SCORE_EFFECTS = {
+    (2, 0): (1, 0, 5, 0),
+    (2, 1): (1, 0, 3, 1),
+    (1, 2): (0, 1, 1, 3),
+    (0, 2): (0, 1, 0, 5),
+}
+
+# Misma tabla indexada por [score1, score2] para aplicar lotes vectorizados
+_EFFECTS_LUT = np.zeros((3, 3, 4), dtype=np.int64)
+_VALID_LUT = np.zeros((3, 3), dtype=bool)
+for (_s1, _s2), _effect in SCORE_EFFECTS.items():
+    _EFFECTS_LUT[_s1, _s2] = _effect
+    _VALID_LUT[_s1, _s2] = True
+
+
 def _valid_best_of_three(score1: int, score2: int) -> bool:
     """Valida marcadores válidos en BO3: {2-0, 2-1, 0-2, 1-2}."""
-    valid = {(2, 0), (2, 1), (0, 2), (1, 2)}
-    return (score1, score2) in valid
+    return (score1, score2) in SCORE_EFFECTS
 
 
-def register_result(df: pd.DataFrame, p1: str, p2: str, score1: int, score2: int, matches: List[Tuple]) -> None:
-    """Registra un partido si no existe y actualiza métricas básicas."""
-    # Evitar duplicados (independiente del orden)
-    if any((p1 == m[0] and p2 == m[1]) or (p1 == m[1] and p2 == m[0]) for m in matches):
-        print(f"⚠️ El resultado entre {p1} y {p2} ya fue registrado.")
-        return
+# Descanso (sistema suizo): se guarda como partido del jugador contra sí mismo
+# con este marcador, uno por jugador y jornada. Puntúa como una victoria 2-0
+# pero no es un rival: no cuenta para Buchholz, HeadToHead ni ratings.
+BYE_SCORE = (2, 0)
+
+
+# Partido compacto: IDs de jugador internados, marcador, grupo, jornada (0 = sin
+# asignar) y fecha en días desde 1970-01-01 (0 = sin fecha)
+MATCH_DTYPE = np.dtype([('p1', np.int32), ('p2', np.int32), ('s1', np.int8), ('s2', np.int8), ('group', np.int16),
+                        ('round', np.int16), ('date', np.int32)])
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def date_to_days(value) -> int:
+    """Fecha ISO ('AAAA-MM-DD') a días desde 1970-01-01; 0 si no hay fecha."""
+    if not value:
+        return 0
+    return (datetime.date.fromisoformat(str(value)[:10]) - _EPOCH).days
+
+
+def days_to_date(days: int):
+    """Inversa de `date_to_days` (None para 0)."""
+    return (_EPOCH + datetime.timedelta(days=int(days))).isoformat() if days else None
+
+
+class PlayerRegistry:
+    """Interna nombres de jugador (y de grupo) a IDs enteros pequeños."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.groups: List[str] = []
+        self.group_ids: Dict[str, int] = {}
+        self._player_group: List[int] = []
+
+    @classmethod
+    def from_roster(cls, roster: Dict[str, List[str]]) -> 'PlayerRegistry':
+        registry = cls()
+        for group, names in roster.items():
+            for name in names:
+                registry.intern(name, group)
+        return registry
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def intern_group(self, group: str) -> int:
+        if group not in self.group_ids:
+            self.group_ids[group] = len(self.groups)
+            self.groups.append(group)
+        return self.group_ids[group]
+
+    def intern(self, name: str, group: str = None) -> int:
+        """ID del jugador, dándolo de alta si no existe. -1 como grupo = sin grupo."""
+        pid = self.ids.get(name)
+        if pid is None:
+            pid = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self._player_group.append(-1)
+        if group is not None:
+            self._player_group[pid] = self.intern_group(group)
+        return pid
+
+    def group_of(self, name: str):
+        """Nombre del grupo del jugador o None."""
+        pid = self.ids.get(name)
+        if pid is None or self._player_group[pid] < 0:
+            return None
+        return self.groups[self._player_group[pid]]
+
+    def player_group_id(self, pid: int) -> int:
+        return self._player_group[pid]
+
+
+class MatchLedger:
+    """
+    Registro de partidos `(p1, p2, score1, score2, winner)` almacenados en un
+    array estructurado NumPy (MATCH_DTYPE) con IDs de PlayerRegistry.
+
+    Índices:
+      - pares no ordenados: array ordenado de claves (búsqueda binaria) más un
+        dict con los partidos añadidos desde la última ordenación;
+      - partidos jugados por jugador, mantenidos al añadir;
+      - rivales por jugador (CSR) y partición por grupo (máscara sobre el
+        array), construidos al pedirlos e invalidados al añadir.
+
+    Se comporta como una lista de tuplas (iteración, len, índices) y se
+    serializa con el mismo formato `matches` de resultados.json, con nombres.
+    """
+
+    # Añadidos sueltos que se acumulan antes de reordenar el índice de pares
+    _RECENT_LIMIT = 4096
+
+    def __init__(self, matches=(), registry: PlayerRegistry = None):
+        self.registry = registry if registry is not None else PlayerRegistry()
+        self._data = np.empty(16, dtype=MATCH_DTYPE)
+        self._n = 0
+        self._degree: List[int] = []
+        self._sorted_keys = np.empty(0, dtype=np.int64)
+        self._sorted_rows = np.empty(0, dtype=np.int64)
+        self._recent: Dict[int, int] = {}
+        self._csr = None
+        self._groups: Dict[int, 'MatchLedger'] = {}
+        self.extend(matches)
+
+    @classmethod
+    def from_roster(cls, matches, roster: Dict[str, List[str]]) -> 'MatchLedger':
+        """Crea el registro a partir de un dict grupo -> jugadores como `players`."""
+        return cls(matches, PlayerRegistry.from_roster(roster))
+
+    @classmethod
+    def from_records(cls, records: np.ndarray, registry: PlayerRegistry) -> 'MatchLedger':
+        """Crea un registro a partir de filas MATCH_DTYPE ya internadas."""
+        ledger = cls(registry=registry)
+        ledger._extend_records(records)
+        return ledger
+
+    def copy(self) -> 'MatchLedger':
+        """Copia independiente de los partidos (el registro de jugadores se comparte)."""
+        return MatchLedger.from_records(self.records.copy(), self.registry)
+
+    @property
+    def records(self) -> np.ndarray:
+        """Vista del array estructurado con los partidos registrados."""
+        return self._data[:self._n]
+
+    def _tuple(self, row) -> Tuple:
+        names = self.registry.names
+        p1, p2, s1, s2 = names[row['p1']], names[row['p2']], int(row['s1']), int(row['s2'])
+        return (p1, p2, s1, s2, p1 if s1 > s2 else p2)
+
+    def _entry(self, row: tuple) -> list:
+        """Fila de `records.tolist()` en el formato guardado, con jornada y fecha si las hay."""
+        names = self.registry.names
+        p1, p2, s1, s2, _, rnd, days = row
+        entry = [names[p1], names[p2], s1, s2, names[p1] if s1 > s2 else names[p2]]
+        if rnd or days:
+            entry += [rnd, days_to_date(days)]
+        return entry
+
+    def entry(self, idx: int) -> list:
+        """Partido `idx` en formato serializable (con jornada y fecha)."""
+        return self._entry(self.records[idx].item())
+
+    def __iter__(self):
+        names = self.registry.names
+        for p1, p2, s1, s2 in self.records[['p1', 'p2', 's1', 's2']].tolist():
+            yield (names[p1], names[p2], s1, s2, names[p1] if s1 > s2 else names[p2])
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._tuple(row) for row in self.records[idx]]
+        if idx < 0:
+            idx += self._n
+        if not 0 <= idx < self._n:
+            raise IndexError(idx)
+        return self._tuple(self._data[idx])
+
+    @staticmethod
+    def _key(i: int, j: int) -> int:
+        return (i << 32) | j if i <= j else (j << 32) | i
+
+    def _reserve(self, extra: int) -> None:
+        if self._n + extra > len(self._data):
+            capacity = max(2 * len(self._data), self._n + extra)
+            data = np.empty(capacity, dtype=MATCH_DTYPE)
+            data[:self._n] = self._data[:self._n]
+            self._data = data
+        missing = len(self.registry) - len(self._degree)
+        if missing > 0:
+            self._degree.extend([0] * missing)
+
+    def _invalidate(self, group: int = None) -> None:
+        self._csr = None
+        if group is None:
+            self._groups.clear()
+        else:
+            self._groups.pop(group, None)
+
+    def append(self, match) -> None:
+        """Añade un partido actualizando los índices."""
+        intern = self.registry.intern
+        i, j = intern(match[0]), intern(match[1])
+        gi = self.registry.player_group_id(i)
+        group = gi if gi >= 0 and gi == self.registry.player_group_id(j) else -1
+
+        rnd = match[5] if len(match) > 5 and match[5] else 0
+        days = date_to_days(match[6]) if len(match) > 6 else 0
+
+        self._reserve(1)
+        self._data[self._n] = (i, j, match[2], match[3], group, rnd, days)
+        self._recent[self._key(i, j)] = self._n
+        self._n += 1
+        self._degree[i] += 1
+        if j != i:
+            self._degree[j] += 1
+        self._invalidate(group)
+        if len(self._recent) > self._RECENT_LIMIT:
+            self._sort_pairs()
+
+    def extend(self, matches) -> None:
+        """Añade muchos partidos de una vez (internado + inserción vectorizada)."""
+        matches = matches if isinstance(matches, list) else list(matches)
+        if not matches:
+            return
+        intern = self.registry.intern
+        records = np.empty(len(matches), dtype=MATCH_DTYPE)
+        records['p1'] = [intern(m[0]) for m in matches]
+        records['p2'] = [intern(m[1]) for m in matches]
+        records['s1'] = [m[2] for m in matches]
+        records['s2'] = [m[3] for m in matches]
+        records['round'] = [m[5] if len(m) > 5 and m[5] else 0 for m in matches]
+        records['date'] = [date_to_days(m[6]) if len(m) > 6 else 0 for m in matches]
+        player_group = np.asarray(self.registry._player_group, dtype=np.int16)
+        g1, g2 = player_group[records['p1']], player_group[records['p2']]
+        records['group'] = np.where(g1 == g2, g1, -1)
+        self._extend_records(records)
+
+    def _extend_records(self, records: np.ndarray) -> None:
+        self._reserve(len(records))
+        self._data[self._n:self._n + len(records)] = records
+        self._n += len(records)
+        degree = np.asarray(self._degree, dtype=np.int64)
+        degree += np.bincount(records['p1'], minlength=len(degree))[:len(degree)]
+        rival = records['p2'][records['p2'] != records['p1']]
+        degree += np.bincount(rival, minlength=len(degree))[:len(degree)]
+        self._degree = degree.tolist()
+        self._invalidate()
+        self._sort_pairs()
+
+    def _sort_pairs(self) -> None:
+        """Reconstruye el índice ordenado de pares con todas las filas."""
+        records = self.records
+        lo = np.minimum(records['p1'], records['p2']).astype(np.int64)
+        hi = np.maximum(records['p1'], records['p2']).astype(np.int64)
+        keys = (lo << 32) | hi
+        order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[order]
+        self._sorted_rows = order
+        self._recent = {}
+
+    def _pair_row(self, p1: str, p2: str):
+        """Fila del último partido entre p1 y p2, o None."""
+        i, j = self.registry.ids.get(p1), self.registry.ids.get(p2)
+        if i is None or j is None:
+            return None
+        key = self._key(i, j)
+        row = self._recent.get(key)
+        if row is not None:
+            return row
+        pos = int(np.searchsorted(self._sorted_keys, key, side='right')) - 1
+        if pos >= 0 and self._sorted_keys[pos] == key:
+            return int(self._sorted_rows[pos])
+        return None
+
+    def has_pair(self, p1: str, p2: str) -> bool:
+        """Indica si ya hay un resultado entre p1 y p2 (en cualquier orden)."""
+        return self._pair_row(p1, p2) is not None
+
+    def get_pair(self, p1: str, p2: str):
+        """Último partido registrado entre p1 y p2, o None."""
+        row = self._pair_row(p1, p2)
+        return None if row is None else self._tuple(self._data[row])
+
+    def replace_pair(self, p1: str, p2: str, score1: int, score2: int) -> bool:
+        """Corrige en su sitio el último partido entre p1 y p2 (p1 pasa a ser el local)."""
+        row = self._pair_row(p1, p2)
+        if row is None:
+            return False
+        ids = self.registry.ids
+        self._data['p1'][row] = ids[p1]
+        self._data['p2'][row] = ids[p2]
+        self._data['s1'][row] = score1
+        self._data['s2'][row] = score2
+        self._invalidate(int(self._data['group'][row]))
+        return True
+
+    def remove_pair(self, p1: str, p2: str):
+        """Elimina el último partido entre p1 y p2 y lo devuelve como tupla, o None."""
+        row = self._pair_row(p1, p2)
+        if row is None:
+            return None
+        match = self._tuple(self._data[row])
+        i, j = int(self._data[row]['p1']), int(self._data[row]['p2'])
+        self._data[row:self._n - 1] = self._data[row + 1:self._n]
+        self._n -= 1
+        self._degree[i] -= 1
+        if j != i:
+            self._degree[j] -= 1
+        self._invalidate()
+        self._sort_pairs()
+        return match
+
+    def opponents(self, player: str) -> List[str]:
+        """Rivales con los que ha jugado `player` (uno por partido)."""
+        pid = self.registry.ids.get(player)
+        if pid is None:
+            return []
+        if self._csr is None:
+            records = self.records
+            records = records[records['p1'] != records['p2']]
+            # Intercalado por fila para conservar el orden de registro de cada jugador
+            src = np.column_stack([records['p1'], records['p2']]).ravel()
+            dst = np.column_stack([records['p2'], records['p1']]).ravel()
+            order = np.argsort(src, kind='stable')
+            offsets = np.zeros(len(self.registry) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=len(self.registry)), out=offsets[1:])
+            self._csr = (offsets, dst[order])
+        offsets, targets = self._csr
+        if pid + 1 >= len(offsets):
+            return []
+        names = self.registry.names
+        return [names[o] for o in targets[offsets[pid]:offsets[pid + 1]].tolist()]
+
+    def byes(self) -> Dict[str, List[int]]:
+        """Jugadores que ya han descansado y las jornadas de sus descansos, en orden de registro."""
+        records = self.records
+        rows = records[records['p1'] == records['p2']]
+        names = self.registry.names
+        byes: Dict[str, List[int]] = {}
+        for pid, rnd in zip(rows['p1'].tolist(), rows['round'].tolist()):
+            byes.setdefault(names[pid], []).append(rnd)
+        return byes
+
+    def get_bye(self, player: str, round_number: int):
+        """Descanso de `player` en la jornada `round_number`, o None."""
+        pid = self.registry.ids.get(player)
+        if pid is None:
+            return None
+        records = self.records
+        rows = np.flatnonzero((records['p1'] == pid) & (records['p2'] == pid) & (records['round'] == round_number))
+        return self._tuple(records[rows[-1]]) if len(rows) else None
+
+    def games_played(self, player: str) -> int:
+        pid = self.registry.ids.get(player)
+        return self._degree[pid] if pid is not None and pid < len(self._degree) else 0
+
+    def group_mask(self, group: str) -> np.ndarray:
+        """Máscara booleana de los partidos del grupo sobre `records`."""
+        gid = self.registry.group_ids.get(group, -2)
+        return self.records['group'] == gid
+
+    def group(self, group: str) -> 'MatchLedger':
+        """Partidos entre jugadores del mismo grupo (vista de solo lectura, se recalcula al añadir)."""
+        gid = self.registry.intern_group(group)
+        if gid not in self._groups:
+            self._groups[gid] = MatchLedger.from_records(self.records[self.records['group'] == gid], self.registry)
+        return self._groups[gid]
+
+    def to_list(self) -> List[list]:
+        """Formato serializable de `matches` para resultados.json (con nombres, jornada y fecha)."""
+        return [self._entry(row) for row in self.records.tolist()]
+
+
+class Standings:
+    """
+    Clasificación de un grupo en arrays NumPy contiguos indexados por ID de jugador.
+
+    Los partidos se aplican de uno en uno (`apply`) o por lotes (`apply_batch`)
+    y el DataFrame solo se construye cuando se pide con `to_frame`.
+    """
+
+    # Métricas por jugador y su tipo
+    _FIELDS = (('wins', np.int64), ('losses', np.int64), ('draws', np.int64), ('points', np.float64),
+               ('buchholz', np.float64), ('diff', np.int64), ('h2h', np.int64))
+
+    def __init__(self, names: List[str]):
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        for attr, dtype in self._FIELDS:
+            setattr(self, attr, np.zeros(len(self.names), dtype=dtype))
+        # Búferes con capacidad de reserva de `add_player`; las métricas son vistas de ellos
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_player(self, name: str) -> int:
+        """
+        Añade un jugador con todas las métricas a cero y devuelve su ID. Los
+        arrays crecen al doble cuando se llenan (coste amortizado O(1)).
+        """
+        if name in self.index:
+            return self.index[name]
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        n = len(self.names)
+        for attr, _ in self._FIELDS:
+            arr = getattr(self, attr)
+            buf = self._buffers.get(attr)
+            # Solo se reutiliza el búfer propio si la métrica sigue siendo una vista suya
+            if buf is None or arr.base is not buf or len(buf) < n:
+                buf = self._buffers[attr] = np.zeros(max(2 * n, 16), dtype=arr.dtype)
+                buf[:n - 1] = arr
+            else:
+                buf[n - 1] = 0
+            setattr(self, attr, buf[:n])
+        return self.index[name]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Standings':
+        """Construye el motor a partir de una tabla de grupo con las columnas de COLUMNS."""
+        st = cls([])
+        st.names = [str(n) for n in df.index]
+        st.index = {n: i for i, n in enumerate(st.names)}
+        st.wins = df['Victorias'].to_numpy(dtype=np.int64, copy=True)
+        st.losses = df['Derrotas'].to_numpy(dtype=np.int64, copy=True)
+        st.draws = df['Empates'].to_numpy(dtype=np.int64, copy=True)
+        st.points = df['Puntuación'].to_numpy(dtype=np.float64, copy=True)
+        st.buchholz = df['Buchholz'].to_numpy(dtype=np.float64, copy=True)
+        st.diff = df['Dif. de pts.'].to_numpy(dtype=np.int64, copy=True)
+        st.h2h = df['HeadToHead'].to_numpy(dtype=np.int64, copy=True)
+        return st
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materializa la tabla como DataFrame con el mismo esquema que initialize_table."""
+        return pd.DataFrame({
+            'Victorias': self.wins.copy(),
+            'Derrotas': self.losses.copy(),
+            'Empates': self.draws.copy(),
+            'Puntuación': self.points.copy(),
+            'Buchholz': self.buchholz.copy(),
+            'Dif. de pts.': self.diff.copy(),
+            'HeadToHead': self.h2h.copy(),
+        }, index=pd.Index(self.names))[COLUMNS]
+
+    def apply_ids(self, i: int, j: int, score1: int, score2: int, sign: int = 1) -> None:
+        """Aplica (o revierte con sign=-1) un partido ya validado entre los IDs i y j (i == j: descanso)."""
+        w1, w2, pts1, pts2 = SCORE_EFFECTS[(score1, score2)]
+        self.wins[i] += sign * w1
+        self.losses[i] += sign * w2
+        self.points[i] += sign * pts1
+        self.diff[i] += sign * (score1 - score2)
+        if j != i:
+            self.wins[j] += sign * w2
+            self.losses[j] += sign * w1
+            self.points[j] += sign * pts2
+            self.diff[j] += sign * (score2 - score1)
+
+    def apply(self, p1: str, p2: str, score1: int, score2: int) -> None:
+        """Aplica un partido por nombre de jugador."""
+        self.apply_ids(self.index[p1], self.index[p2], score1, score2)
+
+    def apply_batch(self, p1_ids, p2_ids, scores1, scores2) -> np.ndarray:
+        """
+        Aplica un lote de partidos de forma vectorizada. Los marcadores no
+        válidos se ignoran y en los descansos (p1 == p2) solo cuenta el lado
+        de p1; devuelve la máscara de partidos aplicados.
+        """
+        p1_ids = np.asarray(p1_ids, dtype=np.intp)
+        p2_ids = np.asarray(p2_ids, dtype=np.intp)
+        scores1 = np.asarray(scores1, dtype=np.intp)
+        scores2 = np.asarray(scores2, dtype=np.intp)
+
+        in_range = (scores1 >= 0) & (scores1 <= 2) & (scores2 >= 0) & (scores2 <= 2)
+        valid = np.zeros(len(p1_ids), dtype=bool)
+        valid[in_range] = _VALID_LUT[scores1[in_range], scores2[in_range]]
+
+        i, j = p1_ids[valid], p2_ids[valid]
+        s1, s2 = scores1[valid], scores2[valid]
+        effects = _EFFECTS_LUT[s1, s2]
+        np.add.at(self.wins, i, effects[:, 0])
+        np.add.at(self.losses, i, effects[:, 1])
+        np.add.at(self.points, i, effects[:, 2])
+        np.add.at(self.diff, i, s1 - s2)
+        rival = i != j
+        j, effects = j[rival], effects[rival]
+        np.add.at(self.wins, j, effects[:, 1])
+        np.add.at(self.losses, j, effects[:, 0])
+        np.add.at(self.points, j, effects[:, 3])
+        np.add.at(self.diff, j, (s2 - s1)[rival])
+        return valid
+
+
+def _apply_to_frame(df: pd.DataFrame, p1: str, p2: str, score1: int, score2: int, sign: int = 1) -> None:
+    """Aplica (o revierte con sign=-1) un partido válido sobre la tabla del grupo."""
+    # Escrituras escalares con .at (mucho más baratas que .loc) y solo de celdas que cambian
+    w1, w2, pts1, pts2 = SCORE_EFFECTS[(score1, score2)]
+    deltas = (
+        (p1, 'Victorias', w1), (p2, 'Victorias', w2),
+        (p1, 'Derrotas', w2), (p2, 'Derrotas', w1),
+        (p1, 'Puntuación', pts1), (p2, 'Puntuación', pts2),
+        (p1, 'Dif. de pts.', score1 - score2), (p2, 'Dif. de pts.', score2 - score1),
+    )
+    if p1 == p2:
+        # Descanso: solo cuenta el lado de p1
+        deltas = deltas[::2]
+    for player, col, delta in deltas:
+        if delta:
+            df.at[player, col] += sign * delta
+
+
+def register_result(df, p1: str, p2: str, score1: int, score2: int, matches: List[Tuple],
+                    verbose: bool = True, round_number: int = 0, played_on: str = None) -> bool:
+    """
+    Registra un partido si no existe y actualiza métricas básicas.
+
+    `df` puede ser la tabla del grupo como DataFrame o un motor `Standings`.
+    `round_number` (jornada, 0 = sin asignar) y `played_on` (fecha ISO) se
+    guardan con el partido para el historial. Un partido de un jugador contra
+    sí mismo solo es válido como descanso (BYE_SCORE, ver `register_bye`).
+    Devuelve True si se ha registrado.
+    """
+    # Evitar duplicados (independiente del orden; los descansos, por jornada)
+    if p1 == p2:
+        if isinstance(matches, MatchLedger):
+            duplicate = matches.get_bye(p1, round_number) is not None
+        else:
+            duplicate = any(p1 == m[0] == m[1] and (m[5] if len(m) > 5 else 0) == round_number for m in matches)
+    elif isinstance(matches, MatchLedger):
+        duplicate = matches.has_pair(p1, p2)
+    else:
+        duplicate = any((p1 == m[0] and p2 == m[1]) or (p1 == m[1] and p2 == m[0]) for m in matches)
+    if duplicate:
+        incr('resultados.duplicados')
+        if verbose:
+            if p1 == p2:
+                print(f"⚠️ El descanso de {p1} en la jornada {round_number} ya fue registrado.")
+            else:
+                print(f"⚠️ El resultado entre {p1} y {p2} ya fue registrado.")
+        return False
 
     # Validación de marcador
     if not _valid_best_of_three(score1, score2):
-        print("⚠️ Marcador inválido. Usa BO3: 2-0, 2-1, 0-2 o 1-2.")
-        return
+        incr('resultados.invalidos')
+        if verbose:
+            print("⚠️ Marcador inválido. Usa BO3: 2-0, 2-1, 0-2 o 1-2.")
+        return False
+    if p1 == p2 and (score1, score2) != BYE_SCORE:
+        incr('resultados.invalidos')
+        if verbose:
+            print(f"⚠️ {p1} no puede jugar contra sí mismo.")
+        return False
 
     # Determinar ganador
     winner = p1 if score1 > score2 else p2
-    matches.append((p1, p2, score1, score2, winner))
-
-    # Actualizar diferencia de sets (ganados - perdidos)
-    df.loc[p1, 'Dif. de pts.'] += (score1 - score2)
-    df.loc[p2, 'Dif. de pts.'] += (score2 - score1)
+    if round_number or played_on:
+        matches.append((p1, p2, score1, score2, winner, round_number, played_on))
+    else:
+        matches.append((p1, p2, score1, score2, winner))
 
     # Sistema de puntuación vigente (5/3/1)
-    if score1 == 2 and score2 == 0:
-        # Gana p1 2-0
-        df.loc[p1, 'Victorias'] += 1
-        df.loc[p2, 'Derrotas'] += 1
-        df.loc[p1, 'Puntuación'] += 5
-    elif score1 == 2 and score2 == 1:
-        # Gana p1 2-1
-        df.loc[p1, 'Victorias'] += 1
-        df.loc[p2, 'Derrotas'] += 1
-        df.loc[p1, 'Puntuación'] += 3
-        df.loc[p2, 'Puntuación'] += 1
-    elif score2 == 2 and score1 == 0:
-        # Gana p2 2-0
-        df.loc[p2, 'Victorias'] += 1
-        df.loc[p1, 'Derrotas'] += 1
-        df.loc[p2, 'Puntuación'] += 5
-    elif score2 == 2 and score1 == 1:
-        # Gana p2 2-1
-        df.loc[p2, 'Victorias'] += 1
-        df.loc[p1, 'Derrotas'] += 1
-        df.loc[p2, 'Puntuación'] += 3
-        df.loc[p1, 'Puntuación'] += 1
-
-    print(f"✅ Resultado registrado correctamente: {p1} {score1}-{score2} {p2}")
-
-
-def calculate_buchholz(df: pd.DataFrame, matches: List[Tuple]) -> None:
-    """Calcula Buchholz como suma de puntos de los oponentes jugados en el grupo."""
-    # Limpiar antes de recalcular
-    df['Buchholz'] = 0.0
-    for player in df.index:
-        opponents = []
-        for m in matches:
-            if len(m) >= 4:
-                p1, p2 = m[0], m[1]
-                if p1 == player:
-                    opponents.append(p2)
-                elif p2 == player:
-                    opponents.append(p1)
-        df.loc[player, 'Buchholz'] = sum(float(df.loc[op, 'Puntuación']) for op in opponents if op in df.index)
+    if isinstance(df, Standings):
+        df.apply(p1, p2, score1, score2)
+    else:
+        _apply_to_frame(df, p1, p2, score1, score2)
+
+    incr('resultados.registrados')
+    if verbose:
+        print(f"✅ Resultado registrado correctamente: {p1} {score1}-{score2} {p2}")
+    return True
+
 
+def register_bye(df, player: str, matches: List[Tuple], verbose: bool = True, round_number: int = 0,
+                 played_on: str = None) -> bool:
+    """Registra el descanso de `player` en la jornada `round_number` como `register_result` con BYE_SCORE."""
+    return register_result(df, player, player, *BYE_SCORE, matches, verbose=verbose,
+                           round_number=round_number, played_on=played_on)
 
-def calculate_head_to_head(df: pd.DataFrame, matches: List[Tuple]) -> None:
+
+def _ledger_rows(index: Dict[str, int], ledger: 'MatchLedger', byes: bool = False):
     """
-    Calcula HeadToHead sumando victorias directas SOLO entre jugadores que
-    estén empatados en Puntuación y Buchholz.
+    Partidos del registro entre jugadores de `index`, traducidos de forma
+    vectorizada a posiciones de la tabla: (i, j, score1, score2). Los
+    descansos solo se incluyen con `byes=True` (no son rivales para los
+    desempates).
     """
-    # Construye matriz H2H
-    h2h = {player: {} for player in df.index}
+    pos = np.full(len(ledger.registry) + 1, -1, dtype=np.intp)
+    for name, k in index.items():
+        pid = ledger.registry.ids.get(name)
+        if pid is not None:
+            pos[pid] = k
+    records = ledger.records
+    i, j = pos[records['p1']], pos[records['p2']]
+    keep = (i >= 0) & (j >= 0)
+    if not byes:
+        keep &= records['p1'] != records['p2']
+    return i[keep], j[keep], records['s1'][keep].astype(np.intp), records['s2'][keep].astype(np.intp)
+
+
+def _match_edges(index: Dict[str, int], matches) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lista de aristas (IDs p1, IDs p2) de la matriz de adyacencia del grupo,
+    en formato disperso: un par por partido entre jugadores de `index`.
+    """
+    if isinstance(matches, MatchLedger):
+        i, j, _, _ = _ledger_rows(index, matches)
+        return i, j
+
+    i, j = [], []
     for m in matches:
-        if len(m) == 5:
-            p1, p2, s1, s2, winner = m
-            if winner == p1:
-                h2h[p1][p2] = 1
-                h2h[p2][p1] = 0
-            else:
-                h2h[p2][p1] = 1
-                h2h[p1][p2] = 0
-
-    # Reset antes de calcular
-    df['HeadToHead'] = 0
-
-    # Para cada jugador, suma victorias frente a rivales con los que
-    # esté empatado en Puntuación y Buchholz
-    for player in df.index:
-        total = 0
-        for other in df.index:
-            if player == other:
+        if len(m) >= 4:
+            a, b = index.get(m[0]), index.get(m[1])
+            if a is not None and b is not None and a != b:
+                i.append(a)
+                j.append(b)
+    return np.asarray(i, dtype=np.intp), np.asarray(j, dtype=np.intp)
+
+
+def buchholz_scores(points: np.ndarray, p1_ids: np.ndarray, p2_ids: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcula Buchholz y sus variantes en una sola pasada sobre las aristas:
+    producto adyacencia x Puntuación, y mínimo/máximo de rival por jugador.
+
+    Devuelve 'Buchholz', 'Buchholz Cut-1' (sin el peor rival) y
+    'Buchholz Mediano' (sin el mejor ni el peor rival).
+    """
+    n = len(points)
+    src = np.concatenate([p1_ids, p2_ids])
+    opp = np.concatenate([p2_ids, p1_ids])
+    opp_points = points[opp].astype(np.float64)
+
+    total = np.bincount(src, weights=opp_points, minlength=n).astype(np.float64)
+    count = np.bincount(src, minlength=n)
+    lowest = np.full(n, np.inf)
+    highest = np.full(n, -np.inf)
+    np.minimum.at(lowest, src, opp_points)
+    np.maximum.at(highest, src, opp_points)
+
+    lowest[count == 0] = 0.0
+    highest[count == 0] = 0.0
+    cut1 = np.where(count >= 1, total - lowest, 0.0)
+    median = np.where(count >= 2, total - lowest - highest, 0.0)
+    return {'Buchholz': total, 'Buchholz Cut-1': cut1, 'Buchholz Mediano': median}
+
+
+def calculate_buchholz(df: pd.DataFrame, matches: List[Tuple], variants: bool = False) -> None:
+    """
+    Calcula Buchholz como suma de puntos de los oponentes jugados en el grupo.
+
+    Con `variants=True` añade también las columnas 'Buchholz Cut-1' y
+    'Buchholz Mediano', que salen de la misma pasada.
+    """
+    index = {name: i for i, name in enumerate(df.index)}
+    p1_ids, p2_ids = _match_edges(index, matches)
+    scores = buchholz_scores(df['Puntuación'].to_numpy(dtype=np.float64), p1_ids, p2_ids)
+
+    df['Buchholz'] = scores['Buchholz']
+    if variants:
+        df['Buchholz Cut-1'] = scores['Buchholz Cut-1']
+        df['Buchholz Mediano'] = scores['Buchholz Mediano']
+
+
+def pair_results(index: Dict[str, int], matches) -> Dict[Tuple[int, int], Tuple[int, int, int, int, int]]:
+    """
+    Índice de resultados directos: para cada par no ordenado de IDs, el último
+    partido registrado como (id p1, id p2, score1, score2, id ganador).
+    """
+    results = {}
+    if isinstance(matches, MatchLedger):
+        for i, j, score1, score2 in zip(*(a.tolist() for a in _ledger_rows(index, matches))):
+            results[(i, j) if i <= j else (j, i)] = (i, j, score1, score2, i if score1 > score2 else j)
+        return results
+
+    for m in matches:
+        if len(m) >= 5:
+            i, j = index.get(m[0]), index.get(m[1])
+            if i is None or j is None or i == j:
                 continue
-            if (
-                df.loc[player, 'Puntuación'] == df.loc[other, 'Puntuación'] and
-                df.loc[player, 'Buchholz'] == df.loc[other, 'Buchholz']
-            ):
-                total += h2h.get(player, {}).get(other, 0)
-        df.loc[player, 'HeadToHead'] = total
+            winner = i if m[4] == m[0] else j
+            results[(i, j) if i <= j else (j, i)] = (i, j, m[2], m[3], winner)
+    return results
+
+
+def head_to_head_scores(points: np.ndarray, buchholz: np.ndarray, results: dict,
+                        mini_league: bool = False) -> np.ndarray:
+    """
+    HeadToHead por jugador contando solo los partidos dentro de cada grupo de
+    empate (misma Puntuación y Buchholz). Coste lineal en jugadores + partidos.
+
+    Con `mini_league=True`, en empates de 3 o más jugadores se suman los puntos
+    5/3/1 de la miniliga entre los empatados en lugar de las victorias.
+    """
+    keys = list(zip(points.tolist(), buchholz.tolist()))
+    bucket_size: Dict[Tuple[float, float], int] = {}
+    for key in keys:
+        bucket_size[key] = bucket_size.get(key, 0) + 1
+
+    h2h = np.zeros(len(keys), dtype=np.int64)
+    for i, j, score1, score2, winner in results.values():
+        key = keys[i]
+        if key != keys[j]:
+            continue
+        effect = SCORE_EFFECTS.get((score1, score2))
+        if mini_league and bucket_size[key] >= 3 and effect is not None:
+            h2h[i] += effect[2]
+            h2h[j] += effect[3]
+        else:
+            h2h[winner] += 1
+    return h2h
+
+
+def calculate_head_to_head(df: pd.DataFrame, matches: List[Tuple], mini_league: bool = False) -> None:
+    """
+    Calcula HeadToHead sumando victorias directas SOLO entre jugadores que
+    estén empatados en Puntuación y Buchholz.
+
+    Con `mini_league=True` los empates de 3 o más jugadores se resuelven con
+    los puntos de la miniliga entre ellos (ver `head_to_head_scores`).
+    """
+    index = {name: i for i, name in enumerate(df.index)}
+    df['HeadToHead'] = head_to_head_scores(
+        df['Puntuación'].to_numpy(dtype=np.float64),
+        df['Buchholz'].to_numpy(dtype=np.float64),
+        pair_results(index, matches),
+        mini_league=mini_league,
+    )
+
+
+# Trabajadores para recalcular desempates por grupo (1 = en serie) y tipo de pool
+TIEBREAK_WORKERS = int(os.environ.get('LIGA_PROCESOS') or 1)
+TIEBREAK_POOL = os.environ.get('LIGA_POOL', 'process')
+_pools: Dict[Tuple[str, int], object] = {}
+
+
+def _tiebreak_pool(workers: int, mode: str):
+    """Pool reutilizable entre llamadas (arrancar procesos cuesta más que un recálculo)."""
+    pool = _pools.get((mode, workers))
+    if pool is None:
+        executor = ThreadPoolExecutor if mode == 'thread' else ProcessPoolExecutor
+        pool = _pools[(mode, workers)] = executor(max_workers=workers)
+    return pool
+
+
+def group_tiebreaks(points: np.ndarray, i: np.ndarray, j: np.ndarray, s1: np.ndarray,
+                    s2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Buchholz y HeadToHead de un grupo a partir de sus partidos en posiciones de tabla."""
+    buchholz = buchholz_scores(points, i, j)['Buchholz']
+    results = {}
+    for a, b, score1, score2 in zip(i.tolist(), j.tolist(), s1.tolist(), s2.tolist()):
+        results[(a, b) if a <= b else (b, a)] = (a, b, score1, score2, a if score1 > score2 else b)
+    return buchholz, head_to_head_scores(points, buchholz, results)
+
+
+def _tiebreak_batch(jobs: list) -> list:
+    """Trabajo de un proceso/hilo: varios grupos, para repartir el coste de envío."""
+    return [(group, *group_tiebreaks(*arrays)) for group, arrays in jobs]
+
+
+@timed('calculos.recalculate_tiebreaks')
+def recalculate_tiebreaks(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger',
+                          workers: int = None, mode: str = None) -> None:
+    """
+    Recalcula Buchholz y HeadToHead de todos los grupos con sus propios partidos.
+
+    Los grupos son independientes: con `workers` > 1 se reparten en lotes
+    entre un pool de procesos (o de hilos con mode='thread') y los resultados
+    se vuelcan en las tablas. Solo viajan arrays NumPy, no DataFrames.
+    """
+    workers = workers or TIEBREAK_WORKERS
+    jobs = []
+    for group, df in group_tables.items():
+        index = {name: k for k, name in enumerate(df.index)}
+        jobs.append((group, (df['Puntuación'].to_numpy(dtype=np.float64),
+                             *_ledger_rows(index, matches.group(group)))))
+
+    if workers <= 1 or len(jobs) < 2:
+        for group, arrays in jobs:
+            with span('calculos.tiebreaks_grupo', group=group):
+                df = group_tables[group]
+                df['Buchholz'], df['HeadToHead'] = group_tiebreaks(*arrays)
+        return
+
+    workers = min(workers, len(jobs))
+    batches = [jobs[k::workers] for k in range(workers)]
+    with span('calculos.tiebreaks_pool', workers=workers, mode=mode or TIEBREAK_POOL):
+        for results in _tiebreak_pool(workers, mode or TIEBREAK_POOL).map(_tiebreak_batch, batches):
+            for group, buchholz, h2h in results:
+                df = group_tables[group]
+                df['Buchholz'] = buchholz
+                df['HeadToHead'] = h2h
+
+
+# -----------------------------------------------------------------------------
+# Corrección y borrado de resultados
+# -----------------------------------------------------------------------------
+
+def _tie_key(df: pd.DataFrame, name: str) -> Tuple[float, float]:
+    return float(df.at[name, 'Puntuación']), float(df.at[name, 'Buchholz'])
+
+
+def update_tiebreaks(df: pd.DataFrame, matches: 'MatchLedger', affected, old_keys) -> None:
+    """
+    Actualiza Buchholz y HeadToHead tras cambiar los puntos de algunos jugadores.
+
+    `affected` son los jugadores cuyo Buchholz puede cambiar (los del partido
+    y sus rivales) y `old_keys` los grupos de empate (Puntuación, Buchholz) en
+    los que estaban antes del cambio. Solo se recalcula HeadToHead en esos
+    grupos de empate y en los nuevos; el resto de la tabla no se toca.
+    """
+    for name in affected:
+        df.at[name, 'Buchholz'] = float(sum(df.at[o, 'Puntuación'] for o in matches.opponents(name)
+                                            if o in df.index))
+
+    buckets = set(old_keys) | {_tie_key(df, name) for name in affected}
+    members: Dict[Tuple[float, float], List[str]] = {}
+    keys = zip(df['Puntuación'].tolist(), df['Buchholz'].tolist())
+    for name, key in zip(df.index, keys):
+        if key in buckets:
+            members.setdefault(key, []).append(name)
+
+    for names in members.values():
+        wins = dict.fromkeys(names, 0)
+        for a in range(len(names)):
+            for b in range(a + 1, len(names)):
+                match = matches.get_pair(names[a], names[b])
+                if match is not None:
+                    wins[match[4]] += 1
+        for name, value in wins.items():
+            df.at[name, 'HeadToHead'] = value
+
+
+def _correct_result(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger', p1: str, p2: str,
+                    new_score, verbose: bool) -> bool:
+    group = matches.registry.group_of(p1)
+    df = group_tables.get(group)
+    old = matches.get_pair(p1, p2)
+    if old is None or df is None or p1 not in df.index or p2 not in df.index:
+        incr('resultados.correccion_sin_partido')
+        if verbose:
+            print(f"⚠️ No hay ningún resultado registrado entre {p1} y {p2}.")
+        return False
+    if new_score is not None and not _valid_best_of_three(*new_score):
+        incr('resultados.invalidos')
+        if verbose:
+            print("⚠️ Marcador inválido. Usa BO3: 2-0, 2-1, 0-2 o 1-2.")
+        return False
+    if new_score is not None and p1 == p2 and tuple(new_score) != BYE_SCORE:
+        incr('resultados.invalidos')
+        if verbose:
+            print(f"⚠️ El descanso de {p1} no tiene marcador editable; bórralo si no corresponde.")
+        return False
+
+    # Rivales de ambos (antes del cambio) y sus grupos de empate previos
+    group_matches = matches.group(group)
+    affected = {p1, p2}
+    for name in (p1, p2):
+        affected.update(o for o in group_matches.opponents(name) if o in df.index)
+    old_keys = {_tie_key(df, name) for name in affected}
+
+    _apply_to_frame(df, old[0], old[1], old[2], old[3], sign=-1)
+    if new_score is None:
+        matches.remove_pair(p1, p2)
+    else:
+        matches.replace_pair(p1, p2, *new_score)
+        _apply_to_frame(df, p1, p2, *new_score)
+    update_tiebreaks(df, matches.group(group), affected, old_keys)
+    return True
+
+
+def edit_result(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger', p1: str, p2: str,
+                score1: int, score2: int, verbose: bool = True) -> bool:
+    """
+    Sustituye el resultado registrado entre p1 y p2 por `score1-score2`,
+    revirtiendo exactamente el anterior y recalculando solo los desempates
+    afectados. Devuelve True si se ha corregido.
+    """
+    if not _correct_result(group_tables, matches, p1, p2, (score1, score2), verbose):
+        return False
+    incr('resultados.corregidos')
+    if verbose:
+        print(f"✅ Resultado corregido: {p1} {score1}-{score2} {p2}")
+    return True
+
+
+def delete_result(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger', p1: str, p2: str,
+                  verbose: bool = True) -> bool:
+    """Elimina el resultado entre p1 y p2 revirtiendo su aportación. Devuelve True si existía."""
+    if not _correct_result(group_tables, matches, p1, p2, None, verbose):
+        return False
+    incr('resultados.borrados')
+    if verbose:
+        print(f"✅ Resultado eliminado: {p1} - {p2}")
+    return True
+
+
+def check_consistency(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger') -> List[str]:
+    """
+    Compara las tablas guardadas con una reconstrucción completa desde `matches`.
+    Devuelve una línea por celda distinta (lista vacía si todo cuadra).
+    """
+    problems = []
+    for group, df in group_tables.items():
+        index = {name: i for i, name in enumerate(df.index)}
+        engine = Standings.from_frame(initialize_table(list(df.index)))
+        engine.apply_batch(*_ledger_rows(index, matches.group(group), byes=True))
+        expected = {group: engine.to_frame()}
+        recalculate_tiebreaks(expected, matches)
+        expected = expected[group]
+        for col in COLUMNS:
+            stored = df[col].to_numpy(dtype=np.float64)
+            replay = expected[col].to_numpy(dtype=np.float64)
+            for k in np.flatnonzero(~np.isclose(stored, replay)):
+                problems.append(f"{group} / {df.index[k]} / {col}: guardado {stored[k]:g}, esperado {replay[k]:g}")
+    return problems
+
+
+# Orden de desempate: Puntos > Buchholz > HeadToHead > Dif. de pts.
+SORT_COLUMNS = ['Puntuación', 'Buchholz', 'HeadToHead', 'Dif. de pts.']
+
+
+def sort_standings(df: pd.DataFrame) -> pd.DataFrame:
+    """Devuelve la tabla ordenada según el orden de desempate."""
+    return df.sort_values(by=SORT_COLUMNS, ascending=[False] * len(SORT_COLUMNS))
+
+
+@timed('calculos.standings_table')
+def standings_table(df: pd.DataFrame, matches: 'MatchLedger') -> pd.DataFrame:
+    """
+    Tabla de clasificación para mostrar: ordenada, con columna 'Nombre' y
+    'Partidos Jugados', índice 0..n-1 y Puntuación entera.
+    """
+    df_display = df.copy()
+    df_display["Partidos Jugados"] = [matches.games_played(jugador) for jugador in df_display.index]
+    df_display = sort_standings(df_display).reset_index()
+    df_display.rename(columns={'index': 'Nombre'}, inplace=True)
+    df_display['Puntuación'] = df_display['Puntuación'].astype(int)
+    return df_display
 
 
 def display_table(df: pd.DataFrame, group_name: str) -> None:
     """Orden de desempate: Puntos > Buchholz > HeadToHead > Dif. de pts."""
-    df = df.sort_values(
-        by=['Puntuación', 'Buchholz', 'HeadToHead', 'Dif. de pts.'],
-        ascending=[False, False, False, False]
-    )
+    if isinstance(df, Standings):
+        df = df.to_frame()
+    df = sort_standings(df)
     print(f"\n{group_name} - Tabla Final")
     print(df)
 
 
+# -----------------------------------------------------------------------------
+# Clasificación matemática (clinch / eliminación)
+# -----------------------------------------------------------------------------
+
+# Puntos (p1, p2) de cada resultado posible, con la misma tabla que register_result
+_POINT_OUTCOMES = [(effect[2], effect[3]) for effect in SCORE_EFFECTS.values()]
+
+# Nodos de búsqueda por grupo; agotados, el estado de los jugadores que falten queda sin determinar
+CLINCH_SEARCH_NODES = int(os.environ.get('LIGA_CLINCH_NODOS') or 20000)
+
+
+class _SearchBudgetExceeded(Exception):
+    pass
+
+
+def remaining_fixtures(names: List[str], matches: 'MatchLedger') -> List[Tuple[int, int]]:
+    """Pares (i, j) del todos contra todos que aún no tienen resultado."""
+    return [
+        (i, j)
+        for i in range(len(names))
+        for j in range(i + 1, len(names))
+        if not matches.has_pair(names[i], names[j])
+    ]
+
+
+def _exists_completion(points: List[int], fixtures: List[Tuple[int, int]], threshold: int, top: int,
+                       maximize: bool, budget: List[int] = None) -> Optional[bool]:
+    """
+    Sea c el nº de jugadores que terminan con Puntuación >= threshold.
+    ¿Hay algún resultado de `fixtures` con c >= top (maximize=True) o con
+    c < top (maximize=False)?
+
+    Búsqueda en profundidad con poda por cotas de puntos alcanzables y memoria
+    de estados equivalentes: por encima del umbral, o sin opciones de
+    alcanzarlo, el valor exacto de los puntos da igual. `budget` es una lista
+    con los nodos que quedan (compartida entre búsquedas); si se agota se
+    devuelve None (sin determinar).
+    """
+    n_fix = len(fixtures)
+    # Puntos máximos que cada jugador puede sumar desde el partido k
+    max_gain = [[0] * len(points)]
+    for i, j in reversed(fixtures):
+        gain = list(max_gain[-1])
+        gain[i] += 5
+        gain[j] += 5
+        max_gain.append(gain)
+    max_gain.reverse()
+    failed = set()
+
+    def search(k: int, pts: Tuple[int, ...]) -> bool:
+        if budget is not None:
+            budget[0] -= 1
+            if budget[0] < 0:
+                raise _SearchBudgetExceeded
+        gain = max_gain[k]
+        reached = sum(1 for p in pts if p >= threshold)
+        reachable = sum(1 for p, g in zip(pts, gain) if p + g >= threshold)
+        if maximize:
+            if reached >= top:
+                return True
+            if reachable < top:
+                return False
+        else:
+            if reachable < top:
+                return True
+            if reached >= top:
+                return False
+
+        state = (k, tuple(threshold if p >= threshold else (-1 if p + g < threshold else p)
+                          for p, g in zip(pts, gain)))
+        if state in failed:
+            return False
+        i, j = fixtures[k]
+        outcomes = _POINT_OUTCOMES
+        if not maximize and pts[i] > pts[j]:
+            # Primero los resultados que dan más puntos al que va por detrás
+            outcomes = outcomes[::-1]
+        for gain_i, gain_j in outcomes:
+            nxt = list(pts)
+            nxt[i] += gain_i
+            nxt[j] += gain_j
+            if search(k + 1, tuple(nxt)):
+                return True
+        failed.add(state)
+        return False
+
+    try:
+        return search(0, tuple(points))
+    except _SearchBudgetExceeded:
+        return None
+
+
+@timed('calculos.clinch_status')
+def clinch_status(df: pd.DataFrame, matches: 'MatchLedger', top: int = 4) -> Dict[str, str]:
+    """
+    Estado matemático de cada jugador del grupo respecto a los `top` primeros:
+    'clinched' (clasificado pase lo que pase), 'eliminated' (no puede entrar)
+    o None. `matches` son los partidos del grupo.
+
+    Solo se cuenta la Puntuación y los empates a puntos se tratan de forma
+    conservadora (nunca se asume que Buchholz o HeadToHead los deshacen).
+    Con el grupo terminado se usa el orden de desempate completo. La búsqueda
+    tiene un límite de CLINCH_SEARCH_NODES nodos por grupo: si se agota, los
+    jugadores sin resolver quedan en None.
+    """
+    names = list(df.index)
+    fixtures = remaining_fixtures(names, matches)
+    if not fixtures:
+        ranked = list(sort_standings(df).index)
+        return {name: 'clinched' if ranked.index(name) < top else 'eliminated' for name in names}
+
+    points = [int(round(p)) for p in df['Puntuación'].tolist()]
+    budget = [CLINCH_SEARCH_NODES]
+    status = {}
+    for p, name in enumerate(names):
+        own = [f for f in fixtures if p in f]
+        others = [f for f in fixtures if p not in f]
+
+        # Peor caso para p: pierde 0-2 todo lo que le queda (0 para él, 5 para el rival)
+        worst = list(points)
+        for i, j in own:
+            worst[j if i == p else i] += 5
+        worst_rivals = worst[:p] + worst[p + 1:]
+        rivals_fixtures = [(i - (i > p), j - (j > p)) for i, j in others]
+        # Clasificado si nunca pueden acabar `top` rivales con sus mismos puntos o más
+        possible = _exists_completion(worst_rivals, rivals_fixtures, worst[p], top, maximize=True, budget=budget)
+        if possible is None:
+            incr('calculos.clinch_sin_determinar')
+            status[name] = None
+            continue
+        if not possible:
+            status[name] = 'clinched'
+            continue
+
+        # Mejor caso para p: gana 2-0 todo lo que le queda
+        best = list(points)
+        best[p] += 5 * len(own)
+        best_rivals = best[:p] + best[p + 1:]
+        # Eliminado si, incluso así, siempre hay `top` rivales con más puntos
+        possible = _exists_completion(best_rivals, rivals_fixtures, best[p] + 1, top, maximize=False, budget=budget)
+        if possible is None:
+            incr('calculos.clinch_sin_determinar')
+        elif not possible:
+            status[name] = 'eliminated'
+            continue
+        status[name] = None
+    return status
+
+
+def display_standings(group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger') -> Dict[str, pd.DataFrame]:
+    """Tabla de cada grupo tal y como se muestra: ordenada y con 'Estado' (clasificado/eliminado)."""
+    display_tables = {}
+    for group, df in group_tables.items():
+        with span('calculos.tabla_grupo', group=group):
+            df_display = standings_table(df, matches)
+            status = clinch_status(df, matches.group(group))
+            df_display['Estado'] = df_display['Nombre'].map(status)
+            display_tables[group] = df_display
+    return display_tables
+
+
+# -----------------------------------------------------------------------------
+# Ingesta masiva de resultados
+# -----------------------------------------------------------------------------
+
+# Formato "Jugador1 X - Y Jugador2"
+RESULT_RE = re.compile(r'^(.+?)\s+(\d+)\s*-\s*(\d+)\s+(.+)$')
+
+
+@lru_cache(maxsize=8192)
+def normalize_name(name: str) -> str:
+    """Nombre sin tildes, en minúsculas y con los espacios normalizados."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+class NameIndex:
+    """
+    Índice nombre normalizado -> (grupo, ID del jugador en su grupo, nombre).
+
+    Los IDs son las posiciones de `roster[grupo]`, que coinciden con
+    `Standings.index` si el motor se creó con esa lista de nombres.
+    """
+
+    def __init__(self, roster: Dict[str, List[str]]):
+        self.entries: Dict[str, Tuple[str, int, str]] = {}
+        self.ambiguous = set()
+        for group, names in roster.items():
+            for pid, name in enumerate(names):
+                key = normalize_name(name)
+                if key in self.entries and self.entries[key][2] != name:
+                    self.ambiguous.add(key)
+                self.entries[key] = (group, pid, name)
+
+    def lookup(self, name: str):
+        """Entrada del jugador, o None si no existe o el nombre es ambiguo."""
+        key = normalize_name(name)
+        if key in self.ambiguous:
+            return None
+        return self.entries.get(key)
+
+
+def numbered_lines(stream) -> Iterator[Tuple[int, str]]:
+    """Líneas no vacías (ni comentarios '#') con su número de línea."""
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield lineno, line
+
+
+def parse_results(lines) -> Iterator[Tuple[int, str, object, str]]:
+    """(nº, línea, (p1, s1, s2, p2), None) o (nº, línea, None, error)."""
+    match = RESULT_RE.match
+    for lineno, line in lines:
+        m = match(line)
+        if m is None:
+            yield lineno, line, None, "Formato inválido"
+            continue
+        p1, score1, score2, p2 = m.groups()
+        yield lineno, line, (p1, int(score1), int(score2), p2), None
+
+
+def resolve_results(parsed, index: NameIndex, matches: 'MatchLedger') -> Iterator[Tuple[int, str, object, str]]:
+    """
+    Valida jugadores, grupo, marcador y duplicados (ya registrados o repetidos
+    en la misma entrada). Emite (nº, línea, (grupo, i, j, s1, s2, p1, p2), None)
+    o (nº, línea, None, error).
+    """
+    seen = set()
+    for lineno, line, result, error in parsed:
+        if error:
+            yield lineno, line, None, error
+            continue
+        p1, score1, score2, p2 = result
+        entry1, entry2 = index.lookup(p1), index.lookup(p2)
+        if entry1 is None or entry2 is None:
+            missing = ', '.join(p for p, e in ((p1, entry1), (p2, entry2)) if e is None)
+            yield lineno, line, None, f"Jugador no encontrado o ambiguo: {missing}"
+            continue
+        (group, i, name1), (group2, j, name2) = entry1, entry2
+        if group != group2:
+            yield lineno, line, None, f"Jugadores de grupos distintos: {name1} ({group}), {name2} ({group2})"
+            continue
+        if i == j:
+            yield lineno, line, None, f"Un jugador no puede jugar contra sí mismo: {name1}"
+            continue
+        if not _valid_best_of_three(score1, score2):
+            yield lineno, line, None, "Marcador inválido. Usa BO3: 2-0, 2-1, 0-2 o 1-2."
+            continue
+        key = (group, min(i, j), max(i, j))
+        if key in seen or matches.has_pair(name1, name2):
+            yield lineno, line, None, f"El resultado entre {name1} y {name2} ya fue registrado"
+            continue
+        seen.add(key)
+        yield lineno, line, (group, i, j, score1, score2, name1, name2), None
+
+
+@timed('calculos.ingest_results')
+def ingest_results(stream, group_tables: Dict[str, pd.DataFrame], matches: 'MatchLedger',
+                   round_number: int = 0, played_on: str = None) -> Tuple[int, List[Tuple[int, str, str]]]:
+    """
+    Registra en bloque los resultados de `stream` (iterable de líneas), todos
+    con la misma jornada y fecha si se indican.
+
+    Las líneas válidas se aplican por grupo con `Standings.apply_batch` y se
+    añaden al registro de una vez; los desempates se recalculan una sola vez al
+    final. Devuelve (nº de resultados registrados, [(nº línea, línea, error)]).
+    """
+    engines = {group: Standings.from_frame(df) for group, df in group_tables.items()}
+    index = NameIndex({group: engine.names for group, engine in engines.items()})
+
+    batches = {group: ([], [], [], []) for group in engines}
+    new_matches = []
+    errors = []
+    for lineno, line, result, error in resolve_results(parse_results(numbered_lines(stream)), index, matches):
+        if error:
+            errors.append((lineno, line, error))
+            continue
+        group, i, j, score1, score2, name1, name2 = result
+        batch = batches[group]
+        batch[0].append(i)
+        batch[1].append(j)
+        batch[2].append(score1)
+        batch[3].append(score2)
+        new_matches.append((name1, name2, score1, score2, name1 if score1 > score2 else name2,
+                            round_number, played_on))
+
+    for group, (p1_ids, p2_ids, scores1, scores2) in batches.items():
+        if p1_ids:
+            engines[group].apply_batch(p1_ids, p2_ids, scores1, scores2)
+            group_tables[group] = engines[group].to_frame()
+    matches.extend(new_matches)
+    incr('resultados.registrados', len(new_matches))
+    incr('resultados.errores_ingesta', len(errors))
+    if new_matches:
+        recalculate_tiebreaks(group_tables, matches)
+    return len(new_matches), errors
+
+
+def ingest(source: str = '-', dry_run: bool = False, round_number: int = 0, played_on: str = None) -> int:
+    """Ingesta desde un fichero o la entrada estándar ('-'); devuelve el código de salida."""
+    from almacenamiento import open_store
+
+    store = open_store()
+    with store.lock():
+        return _ingest(store, source, dry_run, round_number, played_on)
+
+
+def _ingest(store, source: str, dry_run: bool, round_number: int, played_on: str) -> int:
+    group_tables, matches = store.load()
+    _ensure_roster(group_tables)
+
+    if source == '-':
+        registered, errors = ingest_results(sys.stdin, group_tables, matches, round_number, played_on)
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            registered, errors = ingest_results(f, group_tables, matches, round_number, played_on)
+
+    for lineno, line, error in errors:
+        print(f"⚠️ Línea {lineno}: {error}: {line}", file=sys.stderr)
+    if registered and not dry_run:
+        store.snapshot(group_tables, matches)
+    action = "validados (sin guardar)" if dry_run else "registrados"
+    print(f"✅ {registered} resultados {action}, {len(errors)} líneas con errores.")
+    return 1 if errors else 0
+
+
 # -----------------------------------------------------------------------------
 # Ejecución interactiva
 # -----------------------------------------------------------------------------
 
-import re
 
-if __name__ == '__main__':
-    group_tables, matches = load_data()
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description='Liga One Piece Málaga: registro de resultados.')
+    parser.add_argument('--jornada', type=int, default=0, help='Jornada de los resultados que se introduzcan.')
+    parser.add_argument('--fecha', default=None, help='Fecha de los resultados (AAAA-MM-DD; por defecto, hoy).')
+    subparsers = parser.add_subparsers(dest='command')
+    migrate = subparsers.add_parser('migrate', help='Convierte un resultados.json antiguo al formato actual.')
+    migrate.add_argument('data_file', nargs='?', default=None)
+    ingest_parser = subparsers.add_parser('ingest', help='Registra en bloque resultados de un fichero o de stdin.')
+    ingest_parser.add_argument('source', nargs='?', default='-', help="Fichero de resultados o '-' para stdin.")
+    ingest_parser.add_argument('--dry-run', action='store_true', help='Valida sin guardar.')
+    edit = subparsers.add_parser('edit', help='Corrige un resultado ya registrado.')
+    edit.add_argument('result', help='Nuevo resultado, p. ej. "Dario 2-1 Rafa".')
+    delete = subparsers.add_parser('delete', help='Elimina el resultado entre dos jugadores.')
+    delete.add_argument('player1')
+    delete.add_argument('player2')
+    subparsers.add_parser('check', help='Comprueba las tablas guardadas contra los partidos.')
+    args = parser.parse_args(argv)
+    played_on = args.fecha or datetime.date.today().isoformat()
+
+    if args.command == 'ingest':
+        sys.exit(ingest(args.source, args.dry_run, args.jornada, played_on))
+    if args.command in ('edit', 'delete'):
+        sys.exit(correct(args))
+    if args.command == 'check':
+        sys.exit(check())
+
+    if args.command == 'migrate':
+        data_file = args.data_file or DATA_FILE
+        if migrate_data_file(data_file):
+            print(f"✅ '{data_file}' migrado a schema_version {SCHEMA_VERSION} (copia en '{data_file}.v1.bak').")
+        else:
+            print(f"'{data_file}' ya está en schema_version {SCHEMA_VERSION}.")
+        return
+
+    interactive(args.jornada, played_on)
+
+
+def correct(args: argparse.Namespace) -> int:
+    """Subcomandos `edit` y `delete`: corrige el almacenamiento configurado."""
+    from almacenamiento import open_store
+
+    store = open_store()
+    with store.lock():
+        return _correct(store, args)
+
+
+def _correct(store, args: argparse.Namespace) -> int:
+    group_tables, matches = store.load()
+    index = NameIndex({group: list(df.index) for group, df in group_tables.items()})
+
+    if args.command == 'edit':
+        m = RESULT_RE.match(args.result.strip())
+        if not m:
+            print(f"⚠️ Formato inválido: {args.result}")
+            return 1
+        p1, score1, score2, p2 = m.groups()
+        score1, score2 = int(score1), int(score2)
+    else:
+        p1, p2 = args.player1, args.player2
+    entry1, entry2 = index.lookup(p1), index.lookup(p2)
+    if entry1 is None or entry2 is None or entry1[0] != entry2[0]:
+        print(f"⚠️ Jugadores no encontrados en el mismo grupo: {p1}, {p2}")
+        return 1
+    p1, p2 = entry1[2], entry2[2]
+
+    if args.command == 'edit':
+        ok = edit_result(group_tables, matches, p1, p2, score1, score2)
+        new_match = matches.get_pair(p1, p2)
+    else:
+        ok = delete_result(group_tables, matches, p1, p2)
+        new_match = None
+    if not ok:
+        return 1
+    # Desempates del grupo desde todos sus partidos: no se guardan los que trajera la carga
+    group = entry1[0]
+    recalculate_tiebreaks({group: group_tables[group]}, matches)
+    store.replace_result(p1, p2, new_match)
+    store.snapshot(group_tables, matches)
+    return 0
 
-    # Asegura tablas correctas
+
+def check() -> int:
+    """
+    Subcomando `check`: verifica las tablas guardadas frente a los partidos.
+    Los desempates se recalculan tras cargar (dependen de todo el grupo), así
+    que lo que se compara es lo que el almacenamiento guarda por partido.
+    """
+    from almacenamiento import open_store
+
+    group_tables, matches = open_store().load()
+    recalculate_tiebreaks(group_tables, matches)
+    problems = check_consistency(group_tables, matches)
+    for problem in problems:
+        print(f"⚠️ {problem}")
+    if problems:
+        print(f"{len(problems)} inconsistencias.")
+        return 1
+    print("✅ Las tablas cuadran con los partidos registrados.")
+    return 0
+
+
+def _ensure_roster(group_tables: Dict[str, pd.DataFrame]) -> None:
+    """Asegura que cada grupo tiene tabla y que están todos los jugadores de `players`."""
     for group, names in players.items():
         if group not in group_tables:
             group_tables[group] = initialize_table(names)
@@ -270,6 +1671,19 @@ if __name__ == '__main__':
                     group_tables[group].loc[name] = 0
             group_tables[group] = _coerce_types(group_tables[group])
 
+
+def interactive(round_number: int = 0, played_on: str = None) -> None:
+    """
+    Bucle interactivo de introducción de resultados. Cada pegado se confirma
+    de golpe con `ResultWriter`, así que varios operadores pueden introducir
+    resultados a la vez sin pisarse.
+    """
+    from almacenamiento import ResultWriter
+
+    writer = ResultWriter()
+    _ensure_roster(writer.group_tables)
+    index = NameIndex({group: list(df.index) for group, df in writer.group_tables.items()})
+
     print('Introduce resultados (ej: Dario 2 - 0 Rafa).')
     print("Puedes meter varios separados por saltos de línea. Escribe 'fin' para terminar.\n")
 
@@ -285,8 +1699,7 @@ if __name__ == '__main__':
             if not linea:
                 continue
 
-            # Regex para formato "Jugador1 X - Y Jugador2"
-            m = re.match(r'^(.+?)\s+(\d+)\s*-\s*(\d+)\s+(.+)$', linea)
+            m = RESULT_RE.match(linea)
             if not m:
                 print(f"⚠️ Formato inválido: {linea}")
                 continue
@@ -294,22 +1707,39 @@ if __name__ == '__main__':
             p1, score1, score2, p2 = m.groups()
             score1, score2 = int(score1), int(score2)
 
-            found = False
-            for group, df in group_tables.items():
-                if p1 in df.index and p2 in df.index:
-                    register_result(df, p1, p2, score1, score2, matches)
-                    found = True
-                    break
-            if not found:
+            # Búsqueda O(1) sin distinguir mayúsculas ni tildes
+            entry1, entry2 = index.lookup(p1), index.lookup(p2)
+            if entry1 is None or entry2 is None or entry1[0] != entry2[0]:
                 print(f"⚠️ Jugadores no encontrados en el mismo grupo: {p1}, {p2}")
+                continue
+            if entry1 == entry2:
+                print(f"⚠️ Un jugador no puede jugar contra sí mismo: {p1}")
+                continue
+            writer.add(entry1[2], entry2[2], score1, score2, round_number, played_on)
 
-    # Recalcular todo y mostrar
-    for group, df in group_tables.items():
-        group_players = set(df.index)
-        group_matches = [m for m in matches if m[0] in group_players and m[1] in group_players]
-        calculate_buchholz(df, group_matches)
-        calculate_head_to_head(df, group_matches)
+        _report(writer.commit())
 
-    save_data(group_tables, matches)
-    for group, df in group_tables.items():
+    # Recalcular todo, guardar y mostrar
+    writer.close()
+    for group, df in writer.group_tables.items():
         display_table(df, group)
+
+
+def _report(result) -> None:
+    """Mensajes de un lote confirmado por `ResultWriter`."""
+    for p1, p2, score1, score2, *_ in result.applied:
+        print(f"✅ Resultado registrado correctamente: {p1} {score1}-{score2} {p2}")
+    for p1, p2, *_ in result.duplicates:
+        print(f"⚠️ El resultado entre {p1} y {p2} ya fue registrado.")
+    for (p1, p2, score1, score2, *_), existing in result.conflicts:
+        print(f"❌ Conflicto: {p1} {score1}-{score2} {p2} no coincide con el ya registrado "
+              f"{existing[0]} {existing[2]}-{existing[3]} {existing[1]} (usa 'edit' para corregirlo).")
+    for p1, p2, score1, score2, *_ in result.invalid:
+        print(f"⚠️ Resultado inválido: {p1} {score1}-{score2} {p2}")
+
+
+if __name__ == '__main__':
+    # Se ejecuta desde el módulo importado para que almacenamiento y este
+    # script compartan las mismas clases (Standings, MatchLedger).
+    import calculos
+    calculos.main()
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Cuadro de playoff para cualquier número de grupos y clasificados por grupo.
+
+Los clasificados se siembran por puesto: primero los 1º de cada grupo, luego
+los 2º, etc. (dentro de cada puesto, en el orden de los grupos). El cuadro
+tiene el tamaño de la siguiente potencia de dos y los mejores cabezas de serie
+pasan directamente a la segunda ronda si faltan jugadores. Para evitar cruces
+entre jugadores del mismo grupo en las primeras rondas se intercambian
+clasificados del mismo puesto mientras mejore el cuadro.
+
+La estructura del cuadro solo depende de (grupos, clasificados por grupo), así
+que se calcula una vez y se guarda en caché; con los nombres ya ordenados de
+cada grupo construir el cuadro es indexar.
+
+    python cuadro.py --clasificados 4
+"""
+import argparse
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Plaza del cuadro: (índice de grupo, puesto en el grupo), 0-based
+Slot = Tuple[int, int]
+
+QUALIFIERS_PER_GROUP = 4
+
+# Cuadro histórico de la liga con 4 grupos y 4 clasificados (por índice en la
+# lista de clasificados ordenada por grupo y puesto). Se mantiene tal cual.
+CLASSIC_4X4 = [(12, 3), (5, 10), (8, 7), (1, 14), (4, 15), (13, 6), (0, 11), (9, 2)]
+TEMPLATES: Dict[Tuple[int, int], List[Tuple[int, int]]] = {(4, 4): CLASSIC_4X4}
+
+ROUND_NAMES = {1: 'Final', 2: 'Semifinales', 4: 'Cuartos de Final', 8: 'Octavos de Final',
+               16: 'Dieciseisavos de Final', 32: 'Treintaidosavos de Final'}
+
+
+def round_name(matches: int) -> str:
+    return ROUND_NAMES.get(matches, f'Ronda de {2 * matches}')
+
+
+def bracket_size(entrants: int) -> int:
+    """Menor potencia de dos (mínimo 2) que da cabida a `entrants` jugadores."""
+    size = 2
+    while size < entrants:
+        size *= 2
+    return size
+
+
+@lru_cache(maxsize=None)
+def seed_order(size: int) -> Tuple[int, ...]:
+    """
+    Cabezas de serie (1-based) en el orden del cuadro estándar: posiciones
+    consecutivas se enfrentan en la primera ronda y el 1 y el 2 solo pueden
+    cruzarse en la final. seed_order(8) = (1, 8, 4, 5, 2, 7, 3, 6).
+    """
+    order = [1]
+    while len(order) < size:
+        total = 2 * len(order) + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return tuple(order)
+
+
+def _meeting_weight(a: int, b: int, rounds: int) -> int:
+    """Peso de un posible cruce entre las posiciones a y b: más alto cuanto antes se den."""
+    return 1 << (rounds - (a ^ b).bit_length())
+
+
+def _avoid_same_group(slots: List[Optional[Slot]], rounds: int) -> None:
+    """
+    Búsqueda local: intercambia plazas del mismo puesto mientras baje el coste
+    de los cruces entre jugadores del mismo grupo (ponderado por ronda).
+    """
+    positions_by_tier: Dict[int, List[int]] = {}
+    positions_by_group: Dict[int, set] = {}
+    for pos, slot in enumerate(slots):
+        if slot is not None:
+            positions_by_tier.setdefault(slot[1], []).append(pos)
+            positions_by_group.setdefault(slot[0], set()).add(pos)
+
+    def cost(pos: int, group: int, skip: int) -> int:
+        return sum(_meeting_weight(pos, other, rounds) for other in positions_by_group[group]
+                   if other != pos and other != skip)
+
+    improved = True
+    while improved:
+        improved = False
+        for tier_positions in positions_by_tier.values():
+            for k, a in enumerate(tier_positions):
+                for b in tier_positions[k + 1:]:
+                    ga, gb = slots[a][0], slots[b][0]
+                    if ga == gb:
+                        continue
+                    before = cost(a, ga, b) + cost(b, gb, a)
+                    after = cost(b, ga, a) + cost(a, gb, b)
+                    if after < before:
+                        slots[a], slots[b] = slots[b], slots[a]
+                        positions_by_group[ga].symmetric_difference_update((a, b))
+                        positions_by_group[gb].symmetric_difference_update((a, b))
+                        improved = True
+
+
+@lru_cache(maxsize=None)
+def seeding_layout(groups: int, per_group: int) -> Tuple[Optional[Slot], ...]:
+    """
+    Plazas del cuadro en orden (posiciones 2k y 2k+1 se enfrentan en la primera
+    ronda); None es un pase directo del rival.
+    """
+    template = TEMPLATES.get((groups, per_group))
+    if template is not None:
+        return tuple((index // per_group, index % per_group) for pair in template for index in pair)
+
+    entrants = groups * per_group
+    size = bracket_size(entrants)
+    # Cabeza de serie s (1-based): puesto (s-1) // grupos del grupo (s-1) % grupos
+    slots = [((seed - 1) % groups, (seed - 1) // groups) if seed <= entrants else None
+             for seed in seed_order(size)]
+    _avoid_same_group(slots, size.bit_length() - 1)
+    return tuple(slots)
+
+
+# -----------------------------------------------------------------------------
+# Cuadro con nombres y avance de ganadores
+# -----------------------------------------------------------------------------
+
+class Bracket:
+    """
+    Cuadro con nombres. `rounds[r]` es la lista de cruces (a, b) de la ronda r;
+    None es una plaza aún por decidir (o un pase directo en la primera ronda).
+    """
+
+    def __init__(self, entrants: Sequence[Optional[str]], winners: Sequence[str] = ()):
+        size = bracket_size(len(entrants))
+        entrants = list(entrants) + [None] * (size - len(entrants))
+        self.rounds: List[List[List[Optional[str]]]] = []
+        matches = size // 2
+        while matches:
+            self.rounds.append([[None, None] for _ in range(matches)])
+            matches //= 2
+        self.winner_of: Dict[Tuple[int, int], str] = {}
+        for k, match in enumerate(self.rounds[0]):
+            match[0], match[1] = entrants[2 * k], entrants[2 * k + 1]
+        # Pases directos
+        for k, (a, b) in enumerate(self.rounds[0]):
+            if (a is None) != (b is None):
+                self._set_winner(0, k, a or b)
+        for name in winners:
+            self.advance(name)
+
+    @classmethod
+    def from_standings(cls, display_tables: Dict[str, pd.DataFrame], per_group: int = QUALIFIERS_PER_GROUP,
+                       winners: Sequence[str] = ()) -> Optional['Bracket']:
+        """
+        Cuadro a partir de las clasificaciones ya ordenadas de cada grupo, o
+        None si algún grupo no tiene `per_group` jugadores.
+        """
+        names = [df['Nombre'].tolist()[:per_group] for df in display_tables.values()]
+        if not names or any(len(group) < per_group for group in names):
+            return None
+        layout = seeding_layout(len(names), per_group)
+        return cls([names[slot[0]][slot[1]] if slot is not None else None for slot in layout], winners)
+
+    def _set_winner(self, round_index: int, match_index: int, name: str) -> None:
+        self.winner_of[(round_index, match_index)] = name
+        if round_index + 1 < len(self.rounds):
+            self.rounds[round_index + 1][match_index // 2][match_index % 2] = name
+
+    def record(self, round_index: int, match_index: int, winner: str) -> None:
+        """Registra el ganador de un cruce y lo pasa a la ronda siguiente."""
+        match = self.rounds[round_index][match_index]
+        if winner not in match:
+            raise ValueError(f"{winner} no juega el cruce {match_index + 1} de {round_name(len(self.rounds[round_index]))}.")
+        if (round_index, match_index) in self.winner_of:
+            raise ValueError(f"El cruce {match[0]} - {match[1]} ya tiene ganador.")
+        self._set_winner(round_index, match_index, winner)
+
+    def advance(self, winner: str) -> Tuple[int, int]:
+        """Pasa de ronda a `winner` en su cruce pendiente; devuelve (ronda, cruce)."""
+        for r, matches in enumerate(self.rounds):
+            for k, match in enumerate(matches):
+                if winner in match and None not in match and (r, k) not in self.winner_of:
+                    self._set_winner(r, k, winner)
+                    return r, k
+        raise ValueError(f"{winner} no tiene ningún cruce pendiente.")
+
+    @property
+    def champion(self) -> Optional[str]:
+        return self.winner_of.get((len(self.rounds) - 1, 0))
+
+    def visible_rounds(self) -> List[List[Tuple[Optional[str], Optional[str]]]]:
+        """Primera ronda y las siguientes que ya tienen algún jugador."""
+        return [[tuple(match) for match in matches] for r, matches in enumerate(self.rounds)
+                if r == 0 or any(name for match in matches for name in match)]
+
+    def title(self) -> str:
+        return f"Playoffs - {round_name(len(self.rounds[0]))}"
+
+
+def main(argv=None) -> None:
+    from calculos import load_data, recalculate_tiebreaks, standings_table
+
+    parser = argparse.ArgumentParser(description='Cuadro de playoff con la clasificación actual.')
+    parser.add_argument('--clasificados', type=int, default=QUALIFIERS_PER_GROUP, help='Clasificados por grupo.')
+    parser.add_argument('--ganadores', nargs='*', default=[], help='Ganadores de cruces, en orden.')
+    args = parser.parse_args(argv)
+
+    group_tables, matches = load_data()
+    recalculate_tiebreaks(group_tables, matches)
+    display_tables = {group: standings_table(df, matches) for group, df in group_tables.items()}
+    bracket = Bracket.from_standings(display_tables, args.clasificados, args.ganadores)
+    if bracket is None:
+        print("No hay suficientes jugadores en algún grupo.")
+        return
+    for r, matches_in_round in enumerate(bracket.rounds):
+        print(f"\n{round_name(len(matches_in_round))}")
+        for k, (a, b) in enumerate(matches_in_round):
+            winner = bracket.winner_of.get((r, k))
+            mark = f"  -> {winner}" if winner else ""
+            print(f"  {a or '?'} vs {b or '?'}{mark}")
+
+
+if __name__ == '__main__':
+    main()
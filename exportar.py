@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación estática de las vistas de Clasificación y Playoff.
+
+Genera HTML/JSON autocontenidos que cualquier servidor de ficheros puede
+servir sin ejecutar Python:
+
+- index.html, playoff.html     páginas con el mismo marcado que la app
+- estilos.<hash>.css           CSS de la app; el hash en el nombre permite
+                               cachearla indefinidamente
+- grupos/<grupo>.html          tabla de cada grupo (fragmento); dos grupos con el
+                               mismo slug se distinguen con un sufijo -2, -3...
+- datos/<grupo>.json           clasificación de cada grupo
+- datos/cuadro.json            cruces del playoff
+- manifest.json                sha1 y tamaño de cada fichero y clave de cada grupo
+- _headers                     Cache-Control y ETag por fichero (formato de
+                               Netlify / Cloudflare Pages); manifest.json sin
+                               caché, es lo que consultan los clientes
+
+Solo se vuelven a renderizar los grupos cuya clasificación ha cambiado desde
+la última exportación (clave `group_key`, sobre todas las columnas publicadas,
+guardada en el manifest) y solo se reescriben los ficheros cuyo contenido
+cambia, así que los servidores conservan sus ETag y las cachés siguen siendo
+válidas.
+
+    python exportar.py                          # en sitio/
+    python exportar.py --salida /var/www/liga --edicion one-piece-malaga/7
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Dict
+
+import pandas as pd
+
+import ligas
+import plantillas
+from almacenamiento import open_store
+from calculos import display_standings, file_mode, normalize_name, recalculate_tiebreaks
+from cuadro import QUALIFIERS_PER_GROUP, Bracket
+from instrumentacion import span, timed
+
+OUTPUT_DIR = 'sitio'
+MANIFEST = 'manifest.json'
+HEADERS = '_headers'
+
+NAV = [('index.html', 'Clasificación'), ('playoff.html', 'Playoff')]
+
+# Columnas de la clasificación que se publican en JSON
+JSON_COLUMNS = ['Nombre', 'Puntuación', 'Partidos Jugados', 'Victorias', 'Derrotas', 'Buchholz', 'HeadToHead',
+                'Dif. de pts.', 'Estado']
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60, must-revalidate'
+NO_CACHE = 'no-cache'
+
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', normalize_name(name)).strip('-') or 'grupo'
+
+
+def group_slugs(groups) -> Dict[str, str]:
+    """Slug único de cada grupo, en orden: si dos nombres dan el mismo, el segundo lleva -2, el tercero -3..."""
+    slugs: Dict[str, str] = {}
+    taken = set()
+    for group in groups:
+        base = slug = slugify(group)
+        n = 1
+        while slug in taken:
+            n += 1
+            slug = f"{base}-{n}"
+        taken.add(slug)
+        slugs[group] = slug
+    return slugs
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def group_key(df: pd.DataFrame) -> str:
+    """
+    Clave de un grupo para saber si hay que volver a exportarlo: la del
+    fragmento HTML más un hash de todas las columnas que se publican en JSON
+    (un cambio solo de desempates también cambia la clave).
+    """
+    columns = [col for col in JSON_COLUMNS if col in df.columns]
+    digest = hashlib.sha1(repr(columns).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return plantillas.standings_key(df) + ':' + digest.hexdigest()
+
+
+class SiteWriter:
+    """Escribe ficheros del sitio solo si su contenido cambia y lleva el registro para el manifest."""
+
+    def __init__(self, root: str, previous: Dict[str, dict]):
+        self.root = root
+        self.previous = previous
+        self.files: Dict[str, dict] = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split('/'))
+
+    def write(self, name: str, text: str) -> None:
+        digest = content_hash(text)
+        entry = {'sha1': digest, 'bytes': len(text.encode('utf-8'))}
+        self.files[name] = entry
+        path = self.path(name)
+        if self.previous.get(name, {}).get('sha1') == digest and os.path.exists(path):
+            self.unchanged += 1
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp',
+                                        dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            # mkstemp crea el temporal con 0600: el servidor web debe poder leerlo
+            os.chmod(tmp_path, file_mode(path))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.written += 1
+
+    def keep(self, name: str) -> bool:
+        """Conserva un fichero de la exportación anterior sin tocarlo; False si ya no existe."""
+        if name not in self.previous or not os.path.exists(self.path(name)):
+            return False
+        self.files[name] = self.previous[name]
+        self.unchanged += 1
+        return True
+
+    def remove_stale(self) -> int:
+        """Borra los ficheros de la exportación anterior que ya no forman parte del sitio."""
+        removed = 0
+        for name in self.previous:
+            if name not in self.files and os.path.exists(self.path(name)):
+                os.remove(self.path(name))
+                removed += 1
+        return removed
+
+
+def read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def headers_file(files: Dict[str, dict]) -> str:
+    """
+    Reglas de caché: CSS con hash inmutable, manifest.json sin caché (con él
+    se detectan las actualizaciones) y el resto se revalida con su ETag.
+    """
+    lines = [f"/{MANIFEST}", f"  Cache-Control: {NO_CACHE}"]
+    for name, entry in sorted(files.items()):
+        cache = IMMUTABLE if name.startswith('estilos.') else REVALIDATE
+        lines += [f"/{name}", f"  Cache-Control: {cache}", f"  ETag: \"{entry['sha1']}\""]
+    return '\n'.join(lines) + '\n'
+
+
+@timed('exportar.export_site')
+def export_site(root: str = OUTPUT_DIR, edition: ligas.Edition = None, force: bool = False) -> Dict[str, int]:
+    """
+    Exporta la edición al directorio `root`. Con `force` se ignora la exportación
+    anterior y se renderiza todo. Devuelve contadores de lo hecho.
+    """
+    edition = edition or ligas.get_edition()
+    with span('exportar.datos'):
+        group_tables, matches = open_store(edition=edition).load()
+        recalculate_tiebreaks(group_tables, matches)
+        display_tables = display_standings(group_tables, matches)
+
+    previous = {} if force else read_manifest(root)
+    writer = SiteWriter(root, previous.get('files', {}))
+    old_groups = previous.get('groups', {})
+
+    css = plantillas.static_css()
+    stylesheet = f"estilos.{content_hash(css)[:12]}.css"
+    writer.write(stylesheet, css)
+
+    # Grupos: solo se renderizan los que cambiaron
+    groups, fragments, rendered = {}, [], 0
+    slugs = group_slugs(display_tables)
+    for group, df in display_tables.items():
+        slug = slugs[group]
+        key = group_key(df)
+        fragment_file, data_file = f"grupos/{slug}.html", f"datos/{slug}.json"
+        old = old_groups.get(group, {})
+        if old.get('key') == key and writer.keep(fragment_file) and writer.keep(data_file):
+            with open(writer.path(fragment_file), 'r', encoding='utf-8') as f:
+                fragment = f.read()
+        else:
+            with span('exportar.grupo', group=group):
+                fragment = plantillas.group_title(group) + '\n' + plantillas.render_standings(df)
+                writer.write(fragment_file, fragment)
+                columns = [col for col in JSON_COLUMNS if col in df.columns]
+                writer.write(data_file, df[columns].to_json(orient='records', force_ascii=False, indent=1))
+            rendered += 1
+        groups[group] = {'key': key, 'html': fragment_file, 'json': data_file}
+        fragments.append(fragment)
+
+    # Clasificación: dos columnas alternando grupos, como en la app
+    columns = ['\n'.join(fragments[0::2]), '\n'.join(fragments[1::2])]
+    body = '<div class="columns">\n' + '\n'.join(f"<div>\n{col}\n</div>" for col in columns) + '\n</div>'
+    writer.write('index.html', plantillas.render_page(edition.league_name.upper(), edition.title, body, stylesheet,
+                                                      NAV, 'index.html'))
+
+    bracket = Bracket.from_standings(display_tables, QUALIFIERS_PER_GROUP)
+    if bracket is not None:
+        body = plantillas.render_bracket(bracket.visible_rounds(), bracket.title())
+        bracket_data = {'titulo': bracket.title(), 'rondas': bracket.rounds}
+    else:
+        body = ("<div class='group-title'>⚠️ No hay suficientes jugadores para generar el cuadro de playoffs "
+                f"(se necesitan {QUALIFIERS_PER_GROUP} por grupo).</div>")
+        bracket_data = {'titulo': None, 'rondas': []}
+    body += '\n' + plantillas.render_loader()
+    writer.write('playoff.html', plantillas.render_page(edition.league_name.upper(), edition.title, body, stylesheet,
+                                                        NAV, 'playoff.html'))
+    writer.write('datos/cuadro.json', json.dumps(bracket_data, ensure_ascii=False, indent=1))
+
+    writer.write(HEADERS, headers_file(writer.files))
+    removed = writer.remove_stale()
+    manifest = {'edition': edition.key, 'files': writer.files, 'groups': groups}
+    if manifest != previous:
+        writer.write(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=1))
+    return {'grupos': len(groups), 'renderizados': rendered, 'escritos': writer.written,
+            'sin_cambios': writer.unchanged, 'borrados': removed}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Exporta la clasificación y el playoff a HTML/JSON estáticos.')
+    parser.add_argument('--salida', default=OUTPUT_DIR, help='Directorio del sitio.')
+    parser.add_argument('--edicion', default=None, help='Clave "liga/edición" (por defecto, la activa).')
+    parser.add_argument('--forzar', action='store_true', help='Renderiza todo aunque no haya cambios.')
+    args = parser.parse_args(argv)
+
+    stats = export_site(args.salida, ligas.get_edition(args.edicion), args.forzar)
+    print(f"✅ {args.salida}: {stats['renderizados']}/{stats['grupos']} grupos renderizados, "
+          f"{stats['escritos']} ficheros escritos, {stats['sin_cambios']} sin cambios, {stats['borrados']} borrados.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Historial de la clasificación jornada a jornada.
+
+Cada partido guarda su jornada; los que no la tienen (resultados antiguos) se
+asignan a la siguiente jornada libre de sus dos jugadores según el orden de
+registro. Por grupo se guardan instantáneas de Victorias/Derrotas/Puntuación/
+Dif. de pts. cada `every` jornadas; la clasificación "a la jornada N" parte de
+la instantánea más cercana y solo aplica los partidos que faltan, y los
+desempates se calculan con los partidos hasta esa jornada.
+
+    python historial.py --grupo "Grupo 1" --jornada 5
+    python historial.py --grupo "Grupo 1" --posiciones
+"""
+import argparse
+import hashlib
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from calculos import (DATA_FILE, MatchLedger, Standings, buchholz_scores, head_to_head_scores, initialize_table,
+                      sort_standings)
+
+# Jornadas entre instantáneas
+CHECKPOINT_EVERY = 4
+
+_STATE_FIELDS = ('wins', 'losses', 'points', 'diff')
+
+
+def historial_path_for(data_file: str) -> str:
+    """Ruta del fichero de instantáneas asociado a un fichero de datos."""
+    return os.path.splitext(data_file)[0] + '.historial.npz'
+
+
+def effective_rounds(records: np.ndarray) -> np.ndarray:
+    """
+    Jornada de cada partido: la registrada o, si es 0, la siguiente a la última
+    jornada jugada por cualquiera de los dos jugadores.
+    """
+    rounds = records['round'].astype(np.int64)
+    if not (rounds <= 0).any():
+        return rounds
+    p1, p2 = records['p1'].tolist(), records['p2'].tolist()
+    result = rounds.tolist()
+    last = [0] * (max(max(p1), max(p2)) + 1)
+    for k, rnd in enumerate(result):
+        i, j = p1[k], p2[k]
+        li, lj = last[i], last[j]
+        if rnd <= 0:
+            rnd = result[k] = (li if li > lj else lj) + 1
+        if rnd > li:
+            last[i] = rnd
+        if rnd > lj:
+            last[j] = rnd
+    return np.array(result, dtype=np.int64)
+
+
+class GroupHistory:
+    """Partidos de un grupo ordenados por jornada e instantáneas periódicas."""
+
+    def __init__(self, names: List[str], ledger: MatchLedger, every: int = CHECKPOINT_EVERY,
+                 checkpoints: np.ndarray = None):
+        self.names = list(names)
+        n = len(self.names)
+        pos = np.full(len(ledger.registry) + 1, -1, dtype=np.intp)
+        for k, name in enumerate(self.names):
+            pid = ledger.registry.ids.get(name)
+            if pid is not None:
+                pos[pid] = k
+        records = ledger.records
+        rounds = effective_rounds(records)
+        i, j = pos[records['p1']], pos[records['p2']]
+        keep = (i >= 0) & (j >= 0)
+        order = np.argsort(rounds[keep], kind='stable')
+        self.p1 = i[keep][order]
+        self.p2 = j[keep][order]
+        self.s1 = records['s1'][keep][order].astype(np.intp)
+        self.s2 = records['s2'][keep][order].astype(np.intp)
+        self.match_rounds = rounds[keep][order]
+        self.rounds = np.unique(self.match_rounds)
+
+        # Instantáneas: jornada 0 (todo a cero) y cada `every` jornadas
+        self.checkpoint_rounds = np.concatenate([[0], self.rounds[every - 1::every]]).astype(np.int64)
+        self.checkpoint_rows = np.searchsorted(self.match_rounds, self.checkpoint_rounds, side='right')
+        shape = (len(self.checkpoint_rounds), len(_STATE_FIELDS), n)
+        if checkpoints is not None and checkpoints.shape == shape:
+            self.checkpoints = checkpoints
+            return
+        self.checkpoints = np.zeros(shape, dtype=np.float64)
+        engine = Standings.from_frame(initialize_table(self.names))
+        for k in range(1, len(self.checkpoint_rounds)):
+            self._apply(engine, self.checkpoint_rows[k - 1], self.checkpoint_rows[k])
+            self.checkpoints[k] = [getattr(engine, field) for field in _STATE_FIELDS]
+
+    def _apply(self, engine: Standings, start: int, stop: int) -> None:
+        if stop > start:
+            engine.apply_batch(self.p1[start:stop], self.p2[start:stop], self.s1[start:stop], self.s2[start:stop])
+
+    def _state_at(self, round_number: int):
+        """Motor con los partidos hasta `round_number` y nº de partidos aplicados."""
+        stop = int(np.searchsorted(self.match_rounds, round_number, side='right'))
+        k = int(np.searchsorted(self.checkpoint_rows, stop, side='right')) - 1
+        engine = Standings.from_frame(initialize_table(self.names))
+        for field, values in zip(_STATE_FIELDS, self.checkpoints[k]):
+            current = getattr(engine, field)
+            current[:] = values.astype(current.dtype)
+        self._apply(engine, int(self.checkpoint_rows[k]), stop)
+        return engine, stop
+
+    def _tiebreaks(self, engine: Standings, stop: int) -> None:
+        """Buchholz y HeadToHead con los partidos [0, stop)."""
+        p1, p2, s1, s2 = self.p1[:stop], self.p2[:stop], self.s1[:stop], self.s2[:stop]
+        # Los descansos no son rivales
+        rival = p1 != p2
+        p1, p2, s1, s2 = p1[rival], p2[rival], s1[rival], s2[rival]
+        points = engine.points
+        engine.buchholz = buchholz_scores(points, p1, p2)['Buchholz']
+        # Solo los partidos entre empatados cuentan para HeadToHead
+        tied = (points[p1] == points[p2]) & (engine.buchholz[p1] == engine.buchholz[p2])
+        results = {}
+        for i, j, a, b in zip(p1[tied].tolist(), p2[tied].tolist(), s1[tied].tolist(), s2[tied].tolist()):
+            results[(i, j) if i <= j else (j, i)] = (i, j, a, b, i if a > b else j)
+        engine.h2h = head_to_head_scores(points, engine.buchholz, results)
+
+    def as_of(self, round_number: int) -> pd.DataFrame:
+        """Tabla del grupo (columnas de COLUMNS) tras la jornada `round_number`."""
+        engine, stop = self._state_at(round_number)
+        self._tiebreaks(engine, stop)
+        return engine.to_frame()
+
+    def positions(self) -> pd.DataFrame:
+        """Puesto de cada jugador (1 = primero) al final de cada jornada."""
+        engine = Standings.from_frame(initialize_table(self.names))
+        rows = []
+        start = 0
+        for rnd in self.rounds.tolist():
+            stop = int(np.searchsorted(self.match_rounds, rnd, side='right'))
+            self._apply(engine, start, stop)
+            start = stop
+            self._tiebreaks(engine, stop)
+            # lexsort estable: mismo orden que sort_standings
+            order = np.lexsort((-engine.diff, -engine.h2h, -engine.buchholz, -engine.points))
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(1, len(order) + 1)
+            rows.append(rank)
+        result = pd.DataFrame(rows, index=pd.Index(self.rounds.tolist(), name='Jornada'), columns=self.names)
+        return result
+
+
+class History:
+    """Historial de todos los grupos de la liga."""
+
+    def __init__(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger,
+                 every: int = CHECKPOINT_EVERY, checkpoints: Dict[str, np.ndarray] = None):
+        self.every = every
+        checkpoints = checkpoints or {}
+        self.groups = {group: GroupHistory(list(df.index), matches.group(group), every, checkpoints.get(group))
+                       for group, df in group_tables.items()}
+
+    @staticmethod
+    def fingerprint(group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, every: int) -> str:
+        digest = hashlib.sha1(matches.records.tobytes())
+        digest.update(repr((every, {g: list(df.index) for g, df in group_tables.items()})).encode('utf-8'))
+        return digest.hexdigest()
+
+    def save(self, path: str, fingerprint: str) -> None:
+        """Guarda las instantáneas en un .npz junto con la huella de los partidos."""
+        arrays = {'fingerprint': np.array(fingerprint), 'groups': np.array(list(self.groups))}
+        for k, history in enumerate(self.groups.values()):
+            arrays[f'checkpoints_{k}'] = history.checkpoints
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def read_checkpoints(path: str, fingerprint: str) -> Dict[str, np.ndarray]:
+        """Instantáneas guardadas por grupo, o {} si no existen o son de otros partidos."""
+        try:
+            with np.load(path) as data:
+                if str(data['fingerprint']) != fingerprint:
+                    return {}
+                return {str(group): data[f'checkpoints_{k}'] for k, group in enumerate(data['groups'].tolist())}
+        except (OSError, KeyError, ValueError):
+            return {}
+
+    def as_of(self, group: str, round_number: int) -> pd.DataFrame:
+        return self.groups[group].as_of(round_number)
+
+    def standings_table(self, group: str, round_number: int) -> pd.DataFrame:
+        """Como `calculos.standings_table`, pero a la jornada `round_number`."""
+        df = self.as_of(group, round_number)
+        df['Partidos Jugados'] = df['Victorias'] + df['Derrotas'] + df['Empates']
+        df_display = sort_standings(df).reset_index()
+        df_display.rename(columns={'index': 'Nombre'}, inplace=True)
+        df_display['Puntuación'] = df_display['Puntuación'].astype(int)
+        return df_display
+
+    def positions(self, group: str) -> pd.DataFrame:
+        return self.groups[group].positions()
+
+    def rounds(self, group: str = None) -> List[int]:
+        """Jornadas con partidos (de un grupo o de toda la liga)."""
+        histories = [self.groups[group]] if group else self.groups.values()
+        return sorted({rnd for h in histories for rnd in h.rounds.tolist()})
+
+
+def load_history(group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, path: str = None,
+                 every: int = CHECKPOINT_EVERY) -> History:
+    """
+    Historial con las instantáneas guardadas en `path` si siguen siendo válidas
+    para estos partidos; si no, se recalculan y se guardan.
+    """
+    path = path or historial_path_for(DATA_FILE)
+    fingerprint = History.fingerprint(group_tables, matches, every)
+    checkpoints = History.read_checkpoints(path, fingerprint)
+    history = History(group_tables, matches, every, checkpoints)
+    if len(checkpoints) != len(group_tables):
+        history.save(path, fingerprint)
+    return history
+
+
+def main(argv=None) -> None:
+    from almacenamiento import open_store
+
+    parser = argparse.ArgumentParser(description='Clasificación de un grupo a una jornada dada.')
+    parser.add_argument('--grupo', required=True)
+    parser.add_argument('--jornada', type=int, default=None, help='Por defecto, la última.')
+    parser.add_argument('--posiciones', action='store_true', help='Puesto de cada jugador por jornada.')
+    args = parser.parse_args(argv)
+
+    group_tables, matches = open_store().load()
+    history = load_history(group_tables, matches)
+    pd.set_option('display.width', 200)
+    if args.posiciones:
+        print(history.positions(args.grupo).to_string())
+        return
+    rounds = history.rounds(args.grupo)
+    round_number = args.jornada if args.jornada is not None else (rounds[-1] if rounds else 0)
+    print(f"\n{args.grupo} - Jornada {round_number}")
+    print(history.standings_table(args.grupo, round_number).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentación opcional: tramos cronometrados, contadores y perfiles.
+
+Desactivada por defecto; con todo apagado `span` devuelve un contexto vacío
+compartido y `timed` llama directamente a la función, así que el coste es
+una comprobación de un booleano. Se controla con variables de entorno:
+
+- LIGA_INSTRUMENTACION=1     activa tramos y contadores.
+- LIGA_METRICAS_LOG=fichero  añade cada tramo raíz como una línea JSON.
+- LIGA_METRICAS_PUERTO=9108  sirve /metrics en formato de texto Prometheus.
+- LIGA_PERFIL=cprofile,tracemalloc
+                             en los tramos marcados con `profile=True` guarda
+                             un .prof de cProfile en perfiles/ y/o el pico de
+                             memoria de tracemalloc.
+
+    with span('app.render'):
+        ...
+    @timed('calculos.load_data')
+    def load_data(...): ...
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+ENABLED = os.environ.get('LIGA_INSTRUMENTACION', '') not in ('', '0', 'false', 'no')
+LOG_FILE = os.environ.get('LIGA_METRICAS_LOG') or None
+PROFILE_MODES = {mode.strip() for mode in os.environ.get('LIGA_PERFIL', '').split(',') if mode.strip()}
+PROFILE_DIR = 'perfiles'
+
+# Últimos tramos raíz (con sus hijos) para el panel de depuración
+RECENT_LIMIT = 50
+
+_NULL_SPAN = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_recent = deque(maxlen=RECENT_LIMIT)
+_totals: Dict[str, List[float]] = {}      # nombre -> [nº, segundos totales, máximo]
+_counters: Dict[str, int] = {}
+
+
+def enable(log_file: str = None) -> None:
+    """Activa la instrumentación en tiempo de ejecución (p. ej. desde un script)."""
+    global ENABLED, LOG_FILE
+    ENABLED = True
+    if log_file is not None:
+        LOG_FILE = log_file
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+def reset() -> None:
+    """Vacía tramos recientes, agregados y contadores."""
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+        _counters.clear()
+
+
+# -----------------------------------------------------------------------------
+# Tramos y contadores
+# -----------------------------------------------------------------------------
+
+class _Span:
+    __slots__ = ('name', 'meta', 'profile', 'start', 'children', '_profiler', '_traced')
+
+    def __init__(self, name: str, meta: dict, profile: bool):
+        self.name = name
+        self.meta = meta
+        self.profile = profile and bool(PROFILE_MODES)
+        self.children = []
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self._profiler = None
+        self._traced = False
+        if self.profile:
+            if 'tracemalloc' in PROFILE_MODES and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._traced = True
+            if 'cprofile' in PROFILE_MODES:
+                self._profiler = cProfile.Profile()
+                self._profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        record = {'name': self.name, 'ms': round(elapsed * 1000, 3)}
+        if self.meta:
+            record.update(self.meta)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        if self._profiler is not None:
+            self._profiler.disable()
+            record['profile'] = _dump_profile(self._profiler, self.name)
+        if self._traced:
+            record['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 3)
+            tracemalloc.stop()
+
+        stack = _local.stack
+        stack.pop()
+        with _lock:
+            totals = _totals.get(self.name)
+            if totals is None:
+                _totals[self.name] = [1, elapsed, elapsed]
+            else:
+                totals[0] += 1
+                totals[1] += elapsed
+                totals[2] = max(totals[2], elapsed)
+        if self.children:
+            record['children'] = self.children
+        if stack:
+            stack[-1].children.append(record)
+            return False
+
+        # Tramo raíz: se guarda con sus hijos y se escribe en el log
+        record['ts'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        with _lock:
+            _recent.append(record)
+            if LOG_FILE:
+                with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return False
+
+
+def _dump_profile(profiler: cProfile.Profile, name: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def span(name: str, profile: bool = False, **meta):
+    """Contexto que cronometra un tramo; anidado, queda como hijo del tramo exterior."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, meta, profile)
+
+
+def timed(name: str = None, profile: bool = False):
+    """Decorador equivalente a envolver la función en `span`."""
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Span(label, None, profile):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Incrementa un contador."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+# -----------------------------------------------------------------------------
+# Consulta y exportación
+# -----------------------------------------------------------------------------
+
+def recent(limit: int = None) -> List[dict]:
+    """Últimos tramos raíz, del más reciente al más antiguo."""
+    with _lock:
+        records = list(_recent)
+    records.reverse()
+    return records[:limit] if limit else records
+
+
+def summary() -> Dict[str, dict]:
+    """Agregados por nombre de tramo: nº de llamadas, total, media y máximo (ms)."""
+    with _lock:
+        items = [(name, list(values)) for name, values in _totals.items()]
+    return {
+        name: {'count': n, 'total_ms': round(total * 1000, 3), 'mean_ms': round(total * 1000 / n, 3),
+               'max_ms': round(peak * 1000, 3)}
+        for name, (n, total, peak) in sorted(items)
+    }
+
+
+def counters() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+
+def _metric_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text() -> str:
+    """Métricas en el formato de exposición de texto de Prometheus."""
+    lines = [
+        '# HELP liga_span_seconds Tiempo acumulado por tramo.',
+        '# TYPE liga_span_seconds summary',
+    ]
+    with _lock:
+        totals = sorted(_totals.items())
+        counts = sorted(_counters.items())
+    for name, (n, total, _) in totals:
+        label = _metric_label(name)
+        lines.append(f'liga_span_seconds_count{{span="{label}"}} {n}')
+        lines.append(f'liga_span_seconds_sum{{span="{label}"}} {total:.6f}')
+    lines.append('# HELP liga_span_max_seconds Máximo observado por tramo.')
+    lines.append('# TYPE liga_span_max_seconds gauge')
+    for name, (_, _, peak) in totals:
+        lines.append(f'liga_span_max_seconds{{span="{_metric_label(name)}"}} {peak:.6f}')
+    lines.append('# HELP liga_events_total Contadores de eventos.')
+    lines.append('# TYPE liga_events_total counter')
+    for name, value in counts:
+        lines.append(f'liga_events_total{{event="{_metric_label(name)}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int = None, host: str = '127.0.0.1'):
+    """
+    Arranca en un hilo de fondo el endpoint /metrics. Sin `port` usa
+    LIGA_METRICAS_PUERTO; si no está definido no hace nada y devuelve None.
+    """
+    port = port if port is not None else int(os.environ.get('LIGA_METRICAS_PUERTO') or 0)
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='liga-metricas', daemon=True).start()
+    return server
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Configuración de ligas y ediciones (ligas.json).
+
+Cada edición tiene su título, su fichero de resultados y sus grupos, en línea
+o en un JSON aparte (para ediciones con miles de jugadores). Las rutas son
+relativas al propio ligas.json.
+
+    {
+      "actual": "one-piece-malaga/7",
+      "ligas": {
+        "one-piece-malaga": {
+          "nombre": "Liga One Piece Málaga",
+          "ediciones": {
+            "7": {"titulo": "7ª EDICIÓN", "datos": "resultados.json",
+                  "grupos": {"Grupo 1": ["Marco Calabrese", ...], ...}},
+            "6": {"titulo": "6ª EDICIÓN", "datos": "ediciones/6/resultados.json",
+                  "grupos": "ediciones/6/grupos.json"}
+          }
+        }
+      }
+    }
+
+El fichero se busca en LIGA_CONFIG, en el directorio actual y junto a este
+módulo; la edición activa es LIGA_EDICION ("liga/edición") o "actual".
+
+    python ligas.py                                     # ediciones configuradas
+    python ligas.py recalcular --todas --procesos 8     # desempates en paralelo
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+CONFIG_FILE = 'ligas.json'
+
+
+class Edition:
+    """Una edición de una liga: título, fichero de resultados y grupos."""
+
+    def __init__(self, league: str, league_name: str, edition: str, title: str, data_file: str,
+                 groups: Dict[str, List[str]]):
+        self.league = league
+        self.league_name = league_name
+        self.edition = edition
+        self.title = title
+        self.data_file = data_file
+        self.groups = groups
+
+    @property
+    def key(self) -> str:
+        return f"{self.league}/{self.edition}"
+
+    @property
+    def label(self) -> str:
+        return f"{self.league_name} - {self.title}"
+
+    def __repr__(self) -> str:
+        return f"Edition({self.key!r}, {len(self.groups)} grupos, {self.data_file!r})"
+
+
+def config_path() -> str:
+    """Ruta de ligas.json (LIGA_CONFIG, directorio actual o junto al módulo)."""
+    path = os.environ.get('LIGA_CONFIG')
+    if path:
+        return path
+    if os.path.exists(CONFIG_FILE):
+        return CONFIG_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CONFIG_FILE)
+
+
+def _read_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_config(path: str = None) -> dict:
+    path = path or config_path()
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No se encontró la configuración de ligas '{path}' (ver LIGA_CONFIG).")
+    return _read_json(path)
+
+
+def editions(path: str = None) -> Dict[str, Edition]:
+    """Todas las ediciones configuradas, por clave "liga/edición", en orden de aparición."""
+    path = path or config_path()
+    base = os.path.dirname(path)
+    result = {}
+    for league, league_cfg in load_config(path).get('ligas', {}).items():
+        for edition, cfg in league_cfg.get('ediciones', {}).items():
+            groups = cfg.get('grupos', {})
+            if isinstance(groups, str):
+                groups = _read_json(os.path.join(base, groups))
+            item = Edition(league, league_cfg.get('nombre', league), str(edition), cfg.get('titulo', str(edition)),
+                           os.path.join(base, cfg['datos']), groups)
+            result[item.key] = item
+    return result
+
+
+def get_edition(key: str = None, path: str = None) -> Edition:
+    """Edición `key` o, sin ella, la de LIGA_EDICION o la marcada como "actual"."""
+    path = path or config_path()
+    available = editions(path)
+    key = key or os.environ.get('LIGA_EDICION') or load_config(path).get('actual')
+    if key is None and available:
+        key = next(iter(available))
+    if key not in available:
+        raise KeyError(f"Edición desconocida: {key} (disponibles: {', '.join(available) or 'ninguna'})")
+    return available[key]
+
+
+# -----------------------------------------------------------------------------
+# Recalculado de desempates
+# -----------------------------------------------------------------------------
+
+def recompute(edition: Edition, workers: int = None, mode: str = None) -> float:
+    """
+    Recalcula los desempates de todos los grupos de una edición (en paralelo
+    con `workers` > 1) y los guarda en su almacenamiento. Devuelve los segundos.
+    """
+    from almacenamiento import open_store
+    from calculos import recalculate_tiebreaks
+
+    store = open_store(edition=edition)
+    # Con el cerrojo: un ResultWriter no puede confirmar entre la carga y la escritura
+    with store.lock():
+        group_tables, matches = store.load()
+        start = time.perf_counter()
+        recalculate_tiebreaks(group_tables, matches, workers=workers, mode=mode)
+        elapsed = time.perf_counter() - start
+        store.snapshot(group_tables, matches)
+    return elapsed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Ligas y ediciones configuradas.')
+    subparsers = parser.add_subparsers(dest='command')
+    recalc = subparsers.add_parser('recalcular', help='Recalcula y guarda los desempates.')
+    recalc.add_argument('--edicion', action='append', default=[], help='Clave "liga/edición" (repetible).')
+    recalc.add_argument('--todas', action='store_true', help='Todas las ediciones configuradas.')
+    recalc.add_argument('--procesos', type=int, default=None, help='Trabajadores (por defecto LIGA_PROCESOS).')
+    recalc.add_argument('--hilos', action='store_true', help='Usa hilos en lugar de procesos.')
+    args = parser.parse_args(argv)
+
+    available = editions()
+    if args.command != 'recalcular':
+        for key, item in available.items():
+            players = sum(len(names) for names in item.groups.values())
+            print(f"{key:30} {item.label:40} {len(item.groups):4} grupos {players:6} jugadores  {item.data_file}")
+        return
+
+    keys = list(available) if args.todas else (args.edicion or [get_edition().key])
+    for key in keys:
+        item = get_edition(key)
+        elapsed = recompute(item, args.procesos, 'thread' if args.hilos else None)
+        print(f"✅ {key}: desempates de {len(item.groups)} grupos en {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""
+Plantillas HTML de la web: tablas de clasificación, cuadro de playoff y
+aviso de "próximamente".
+
+Las plantillas se compilan una vez al importar (string.Template), el CSS de
+las tablas se emite una sola vez por página con `page_css()` y las filas se
+construyen con un único `join`. Los fragmentos ya renderizados se guardan en
+una caché indexada por el hash de la clasificación ordenada, así que un grupo
+sin cambios no se vuelve a renderizar. Los nombres de jugador se escapan.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from html import escape
+from string import Template
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from instrumentacion import incr
+
+# -----------------------------------------------------------------------------
+# CSS
+# -----------------------------------------------------------------------------
+
+# Estilos generales de la web (fondo, títulos, pestañas de Streamlit, tablas)
+APP_CSS = """
+    /* ---- GENERAL ---- */
+    html, body, [data-testid="stApp"] {
+        font-family: 'Inter', sans-serif;
+        background: radial-gradient(circle at top, #0a2a43 0%, #071a29 40%, #05141f 100%) !important;
+        color: #e8f5ff !important;
+    }
+
+    .block-container {
+        max-width: 88vw !important;
+        padding-left: 2rem !important;
+        padding-right: 2rem !important;
+    }
+
+    /* ---- TITULOS ---- */
+    .main-title {
+        text-align: center;
+        font-size: 58px;
+        font-weight: 900;
+        background: linear-gradient(90deg, #4cc9ff, #00e0ff);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        text-shadow: 0 0 18px rgba(0,255,255,.4);
+        margin-bottom: 0.3rem;
+    }
+
+    .subheader {
+        text-align: center;
+        font-size: 24px;
+        font-weight: 500;
+        color: #b1d8ff;
+        letter-spacing: 3px;
+        margin-bottom: 2rem;
+    }
+
+    /* ---- TARJETAS DE GRUPO ---- */
+    .group-title {
+        text-align: center;
+        font-weight: bold;
+        font-size: 22px;
+        letter-spacing: 1px;
+        color: #dff6ff;
+        background: rgba(255,255,255,0.08);
+        border: 1px solid rgba(255,255,255,0.18);
+        backdrop-filter: blur(10px);
+        border-radius: 14px;
+        padding: 10px;
+        margin-top: 1rem;
+        box-shadow: 0 0 12px rgba(0, 170, 255, 0.3);
+    }
+
+    /* ---- TABS ---- */
+    div[data-testid="stTabs"] button {
+        background: #0f2437 !important;
+        color: #7ac8ff !important;
+        padding: 10px 22px !important;
+        border-radius: 12px 12px 0 0 !important;
+        border: none;
+        font-size: 19px;
+        font-weight: 600;
+        transition: 0.3s;
+        margin: 0 8px;
+        box-shadow: inset 0 -2px 0 rgba(255,255,255,0.06);
+    }
+
+    div[data-testid="stTabs"] button:hover {
+        background: #153149 !important;
+        color: #b8e9ff !important;
+    }
+
+    div[data-testid="stTabs"] button[aria-selected="true"] {
+        background: #1dafff !important;
+        color: #002033 !important;
+        font-weight: 700;
+        box-shadow: 0 4px 16px rgba(0,255,255,0.4);
+    }
+
+    div[data-baseweb="tab-highlight"] {
+        background-color: #00e0ff !important;
+        height: 4px !important;
+        border-radius: 4px !important;
+    }
+
+    /* Estilo para tablas generadas con st.table (SÍ funciona) */
+    table {
+        background: rgba(255,255,255,0.07) !important;
+        backdrop-filter: blur(6px);
+        border-radius: 14px !important;
+        overflow: hidden !important;
+        border-collapse: collapse !important;
+        border: 1px solid rgba(255,255,255,0.2);
+        box-shadow: 0 0 20px rgba(0, 255, 255, 0.15);
+        width: 100% !important;
+    }
+
+    thead th {
+        background: rgba(0,200,255,0.25) !important;
+        color: #e7f8ff !important;
+        font-weight: 700 !important;
+        text-transform: uppercase;
+        padding: 12px !important;
+        font-size: 14px !important;
+    }
+
+    tbody td {
+        padding: 10px 14px !important;
+        font-size: 15px !important;
+        border-bottom: 1px solid rgba(255,255,255,0.08);
+        color: #e8faff !important;
+        font-weight: 600;
+    }
+
+    /* Última fila sin borde */
+    tbody tr:last-child td {
+        border-bottom: none !important;
+    }
+
+    /* Hover suave */
+    tbody tr:hover td {
+        background: rgba(255,255,255,0.04) !important;
+    }
+
+    /* No clicable */
+    table, th, td {
+        pointer-events: none !important;
+        user-select: none !important;
+    }
+"""
+
+RANK_TABLE_CSS = """
+    .rank-table {
+        width: 100%;
+        border-collapse: collapse;
+        background: rgba(255,255,255,0.07);
+        backdrop-filter: blur(6px);
+        border-radius: 14px;
+        overflow: hidden;
+        border: 1px solid rgba(255,255,255,0.2);
+        box-shadow: 0 0 20px rgba(0, 255, 255, 0.15);
+    }
+
+    .rank-table th {
+        background: rgba(0,200,255,0.25);
+        color: #e7f8ff;
+        font-weight: 700;
+        text-transform: uppercase;
+        padding: 10px;
+        font-size: 14px;
+    }
+
+    .rank-table td {
+        padding: 10px 14px;
+        font-size: 15px;
+        color: #e8faff;
+        border-bottom: 1px solid rgba(255,255,255,0.08);
+    }
+
+    .rank-table tr:last-child td {
+        border-bottom: none;
+    }
+
+    .badge {
+        display: inline-block;
+        margin-left: 8px;
+        padding: 1px 8px;
+        border-radius: 10px;
+        font-size: 11px;
+        font-weight: 800;
+        letter-spacing: 0.5px;
+        vertical-align: middle;
+    }
+
+    .badge-clinched {
+        background: rgba(0,255,170,0.25);
+        color: #9dffd9;
+        border: 1px solid rgba(0,255,170,0.5);
+    }
+
+    .badge-eliminated {
+        background: rgba(255,80,80,0.18);
+        color: #ffb3b3;
+        border: 1px solid rgba(255,80,80,0.4);
+    }
+
+    .top4 {
+        background: linear-gradient(90deg, rgba(0,208,255,0.2), rgba(0,234,255,0.13));
+        font-weight: 800;
+        color: #ffffff !important;
+        text-shadow: 0 0 6px rgba(0,255,255,0.67);
+    }
+"""
+
+BRACKET_CSS = """
+
+    .bracket-bg {
+        background: radial-gradient(circle at top, #003366 0%, #001f3f 60%, #000814 100%);
+        padding: 40px 0;
+        border-radius: 20px;
+        box-shadow: inset 0 0 50px rgba(0,255,255,0.2);
+        animation: pulseGlow 8s ease-in-out infinite alternate;
+    }
+
+    @keyframes pulseGlow {
+        from { box-shadow: inset 0 0 50px rgba(0,255,255,0.15); }
+        to { box-shadow: inset 0 0 80px rgba(46,185,255,0.4); }
+    }
+
+    .bracket-title {
+        text-align: center;
+        color: #00eaff;
+        font-size: 46px;
+        font-family: 'Inter', sans-serif;
+        font-weight: 900;
+        text-shadow: 0 0 20px #00eaffaa, 0 0 40px #007bff77;
+        margin-bottom: 40px;
+        letter-spacing: 2px;
+    }
+
+    .responsive-bracket {
+        display: flex;
+        flex-wrap: wrap;
+        justify-content: center;
+        gap: 60px;
+        padding: 0 40px;
+        font-family: 'Inter', sans-serif;
+    }
+
+    .round-column {
+        flex: 1 1 320px;
+        display: flex;
+        flex-direction: column;
+        justify-content: space-around;
+        gap: 24px;
+        align-items: center;
+    }
+
+    .match-box {
+        background: linear-gradient(145deg, #002b5c, #004c91);
+        border: 2px solid rgba(0,255,255,0.3);
+        border-radius: 14px;
+        padding: 16px 20px;
+        text-align: center;
+        width: 100%;
+        max-width: 280px;
+        color: #ffffff;
+        font-size: 18px;
+        font-weight: 700;
+        letter-spacing: 0.5px;
+        text-shadow: 0 0 5px rgba(0,0,0,0.5);
+        box-shadow: 0 0 20px rgba(0,255,255,0.15);
+        transition: all 0.25s ease-in-out;
+        backdrop-filter: blur(4px);
+    }
+
+    .match-box:hover {
+        background: linear-gradient(145deg, #007acc, #00bfff);
+        border-color: #00eaff;
+        transform: scale(1.05);
+        box-shadow: 0 0 25px rgba(0,255,255,0.5);
+    }
+
+    .vs {
+        display: block;
+        color: #00eaff;
+        font-size: 16px;
+        font-weight: 600;
+        margin: 6px 0;
+        text-shadow: 0 0 6px #00eaff77;
+    }
+"""
+
+LOADER_CSS = """
+    .loader-wrapper {
+        height: 78vh;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        align-items: center;
+        animation: fadein 1.2s ease-in-out;
+    }
+
+    @keyframes fadein {
+        from { opacity: 0; }
+        to { opacity: 1; }
+    }
+
+    .spinner {
+        width: 90px;
+        height: 90px;
+        border: 10px solid rgba(255, 255, 255, 0.3);
+        border-top-color: #33bbff;
+        border-radius: 50%;
+        animation: spin 1.2s linear infinite;
+        box-shadow: 0 0 15px rgba(0,0,0,0.25);
+    }
+
+    @keyframes spin {
+        to {
+            transform: rotate(360deg);
+        }
+    }
+
+    .loader-text {
+        margin-top: 25px;
+        font-size: 28px;
+        font-weight: 700;
+        color: #ffffff;
+        text-shadow: 2px 2px 8px #000000aa;
+        letter-spacing: 1px;
+        text-align: center;
+    }
+"""
+
+# Páginas estáticas (exportar.py): navegación y columnas como en la app
+STATIC_CSS = """
+    body {
+        margin: 0;
+        padding: 2rem 6vw;
+        min-height: 100vh;
+    }
+
+    .nav {
+        display: flex;
+        justify-content: center;
+        gap: 16px;
+        margin-bottom: 2rem;
+    }
+
+    .nav a {
+        background: #0f2437;
+        color: #7ac8ff;
+        padding: 10px 22px;
+        border-radius: 12px 12px 0 0;
+        font-size: 19px;
+        font-weight: 600;
+        text-decoration: none;
+    }
+
+    .nav a.active {
+        background: #1dafff;
+        color: #002033;
+        font-weight: 700;
+    }
+
+    .columns {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(340px, 1fr));
+        gap: 0 2rem;
+    }
+"""
+
+# -----------------------------------------------------------------------------
+# Plantillas precompiladas
+# -----------------------------------------------------------------------------
+
+_RANK_TABLE = Template("""<table class='rank-table'>
+    <thead>
+        <tr>
+            <th>Nombre</th>
+            <th>Puntuación</th>
+            <th>Partidos</th>
+        </tr>
+    </thead>
+    <tbody>
+$rows
+    </tbody>
+</table>""")
+
+_RANK_ROW = Template("<tr class='$clase'><td>$nombre$badge</td><td>$puntos</td><td>$partidos</td></tr>")
+
+BADGES = {
+    'clinched': "<span class='badge badge-clinched' title='Clasificado matemáticamente'>CLASIFICADO</span>",
+    'eliminated': "<span class='badge badge-eliminated' title='Eliminado matemáticamente'>ELIMINADO</span>",
+}
+
+_GROUP_TITLE = Template("<div class='group-title'>$titulo</div>")
+
+_BRACKET = Template("""<style>$css</style>
+<div class="bracket-bg">
+    <div class="bracket-title">$titulo</div>
+    <div class="responsive-bracket">
+$columnas
+    </div>
+</div>""")
+
+_ROUND_COLUMN = Template("""        <div class="round-column">
+$cruces
+        </div>""")
+
+_MATCH_BOX = Template('            <div class="match-box">$a<span class="vs">VS</span>$b</div>')
+
+_LOADER = Template("""<style>$css</style>
+<div class="loader-wrapper">
+    <div class="spinner"></div>
+    <div class="loader-text">$texto</div>
+</div>""")
+
+_PAGE = Template("""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$titulo - $subtitulo</title>
+<link rel="stylesheet" href="$estilos">
+</head>
+<body>
+<div class='main-title'>$titulo</div>
+<div class='subheader'>$subtitulo</div>
+<nav class="nav">
+$enlaces
+</nav>
+$contenido
+</body>
+</html>
+""")
+
+_NAV_LINK = Template('<a href="$href" class="$clase">$texto</a>')
+
+# -----------------------------------------------------------------------------
+# Caché de fragmentos
+# -----------------------------------------------------------------------------
+
+CACHE_SIZE = 128
+_fragments: 'OrderedDict[str, str]' = OrderedDict()
+# Las sesiones de Streamlit renderizan en hilos distintos
+_lock = threading.Lock()
+
+# Columnas que afectan al HTML de la tabla
+_RANK_COLUMNS = ['Nombre', 'Puntuación', 'Partidos Jugados', 'Estado']
+
+
+def _cached(key: str, render) -> str:
+    with _lock:
+        html = _fragments.get(key)
+        if html is not None:
+            _fragments.move_to_end(key)
+    if html is not None:
+        incr('plantillas.cache_hits')
+        return html
+    incr('plantillas.cache_misses')
+    # Se renderiza fuera del cerrojo: dos hilos pueden renderizar la misma clave, con el mismo resultado
+    html = render()
+    with _lock:
+        _fragments[key] = html
+        _fragments.move_to_end(key)
+        while len(_fragments) > CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return html
+
+
+def standings_key(df: pd.DataFrame, top: int = 4) -> str:
+    """Hash de las columnas que se muestran de una clasificación ya ordenada."""
+    columns = [col for col in _RANK_COLUMNS if col in df.columns]
+    digest = hashlib.sha1(repr((top, columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return 'rank:' + digest.hexdigest()
+
+
+def page_css() -> str:
+    """CSS compartido de las tablas de clasificación (una vez por página)."""
+    return f"<style>{RANK_TABLE_CSS}</style>"
+
+
+def group_title(title: str) -> str:
+    return _GROUP_TITLE.substitute(titulo=escape(str(title)))
+
+
+def render_standings(df: pd.DataFrame, top: int = 4) -> str:
+    """
+    HTML de una clasificación ya ordenada (índice 0..n-1) con las columnas de
+    `standings_table` y, opcionalmente, 'Estado'. Requiere `page_css()` en la página.
+    """
+    def render() -> str:
+        states = df['Estado'].tolist() if 'Estado' in df.columns else [None] * len(df)
+        rows = '\n'.join(
+            _RANK_ROW.substitute(clase='top4' if k < top else '', nombre=escape(str(name)),
+                                 badge=BADGES.get(state, ''), puntos=points, partidos=played)
+            for k, (name, points, played, state) in enumerate(zip(
+                df['Nombre'].tolist(), df['Puntuación'].tolist(), df['Partidos Jugados'].tolist(), states))
+        )
+        return _RANK_TABLE.substitute(rows=rows)
+
+    return _cached(standings_key(df, top), render)
+
+
+BYE = 'Pase directo'
+PENDING = 'Por decidir'
+
+
+def render_bracket(rounds: Sequence[Sequence[Tuple[Optional[str], Optional[str]]]],
+                   title: str = 'Playoffs - Octavos de Final') -> str:
+    """
+    Cuadro de playoff en espejo: la primera mitad de los cruces de cada ronda a
+    la izquierda, la segunda a la derecha y la final en el centro. `rounds` es
+    la lista de rondas (cruces (a, b), con None para plazas vacías).
+    """
+    rounds = tuple(tuple((a, b) for a, b in matches) for matches in rounds)
+
+    def box(name: Optional[str], first: bool) -> str:
+        return escape(str(name)) if name is not None else (BYE if first else PENDING)
+
+    def column(matches) -> str:
+        return _ROUND_COLUMN.substitute(cruces='\n'.join(
+            _MATCH_BOX.substitute(a=box(a, first), b=box(b, first)) for a, b, first in matches))
+
+    left, right, center = [], [], []
+    for r, matches in enumerate(rounds):
+        matches = [(a, b, r == 0) for a, b in matches]
+        if len(matches) == 1:
+            center.append(matches)
+            continue
+        half = (len(matches) + 1) // 2
+        left.append(matches[:half])
+        right.insert(0, matches[half:])
+
+    def render() -> str:
+        columns = '\n'.join(column(matches) for matches in left + center + right)
+        return _BRACKET.substitute(css=BRACKET_CSS, titulo=escape(title), columnas=columns)
+
+    return _cached('bracket:' + hashlib.sha1(repr((title, rounds)).encode('utf-8')).hexdigest(), render)
+
+
+def render_loader(text: str = 'Playoff<br>Disponible Próximamente') -> str:
+    """Aviso a pantalla completa con spinner (`text` admite HTML)."""
+    return _cached('loader:' + text, lambda: _LOADER.substitute(css=LOADER_CSS, texto=text))
+
+
+def render_page(title: str, subtitle: str, body: str, stylesheet: str, nav: Sequence[Tuple[str, str]],
+                active: str) -> str:
+    """Página HTML completa para la exportación estática; `nav` son pares (href, texto)."""
+    links = '\n'.join(_NAV_LINK.substitute(href=href, clase='active' if href == active else '', texto=escape(text))
+                      for href, text in nav)
+    return _PAGE.substitute(titulo=escape(title), subtitulo=escape(subtitle), estilos=stylesheet, enlaces=links,
+                            contenido=body)
+
+
+def static_css() -> str:
+    """Hoja de estilos completa de las páginas estáticas (la misma CSS que la app)."""
+    return '\n'.join([APP_CSS, RANK_TABLE_CSS, STATIC_CSS])
+
+
+def cache_info() -> List[str]:
+    """Claves de los fragmentos en caché (para el panel de depuración)."""
+    with _lock:
+        return list(_fragments)
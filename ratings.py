@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Ratings de habilidad (Elo y Glicko-2) a partir del historial de partidos.
+
+Cada jornada es un periodo de rating: todos sus partidos se evalúan con los
+ratings del inicio del periodo y se aplican de golpe con NumPy. El marcador
+aporta margen: 2-0 cuenta como resultado 1.0 y 2-1 como 0.75 (ver
+MARGIN_SCORE). Varias ediciones se encadenan en orden, identificando a los
+jugadores por nombre, para que el rating se arrastre de una a otra.
+
+    python ratings.py                                  # edición actual
+    python ratings.py edicion6.json resultados.json    # historial completo
+"""
+import argparse
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calculos import DATA_FILE, MatchLedger, load_data, normalize_name
+from historial import effective_rounds
+
+# Resultado (desde el punto de vista de p1) según el marcador BO3
+MARGIN_SCORE = {(2, 0): 1.0, (2, 1): 0.75, (1, 2): 0.25, (0, 2): 0.0}
+_MARGIN_LUT = np.full((3, 3), np.nan)
+for (_s1, _s2), _score in MARGIN_SCORE.items():
+    _MARGIN_LUT[_s1, _s2] = _score
+
+INITIAL_RATING = 1500.0
+ELO_K = 24.0
+
+# Glicko-2 (Glickman, 2012): RD y volatilidad iniciales, tau y escala
+GLICKO_RD = 350.0
+GLICKO_VOLATILITY = 0.06
+GLICKO_TAU = 0.5
+_GLICKO_SCALE = 173.7178
+_ILLINOIS_EPS = 1e-6
+
+
+class MatchHistory:
+    """
+    Partidos de una o varias ediciones como arrays: IDs de jugador (por
+    nombre), resultado con margen y periodo (jornada, consecutiva entre ediciones).
+    """
+
+    def __init__(self, editions: Sequence[MatchLedger]):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        p1, p2, scores, periods = [], [], [], []
+        offset = 0
+        for ledger in editions:
+            records = ledger.records
+            if not len(records):
+                continue
+            # Mismo jugador en ediciones distintas aunque cambien tildes o mayúsculas
+            local = np.array([self._intern(name) for name in ledger.registry.names], dtype=np.intp)
+            rounds = effective_rounds(records)
+            s1, s2 = records['s1'].astype(np.intp), records['s2'].astype(np.intp)
+            valid = (s1 >= 0) & (s1 <= 2) & (s2 >= 0) & (s2 <= 2)
+            valid[valid] = ~np.isnan(_MARGIN_LUT[s1[valid], s2[valid]])
+            # Los descansos no son partidos contra un rival
+            valid &= records['p1'] != records['p2']
+            p1.append(local[records['p1'][valid]])
+            p2.append(local[records['p2'][valid]])
+            scores.append(_MARGIN_LUT[s1[valid], s2[valid]])
+            periods.append(rounds[valid] + offset)
+            offset += int(rounds.max())
+
+        empty = np.empty(0, dtype=np.intp)
+        p1 = np.concatenate(p1) if p1 else empty
+        p2 = np.concatenate(p2) if p2 else empty
+        scores = np.concatenate(scores) if scores else np.empty(0)
+        periods = np.concatenate(periods) if periods else empty
+        order = np.argsort(periods, kind='stable')
+        self.p1, self.p2, self.scores, self.periods = p1[order], p2[order], scores[order], periods[order]
+        # Límites [inicio, fin) de cada periodo sobre los arrays ordenados
+        self.bounds = np.flatnonzero(np.diff(self.periods)) + 1
+        self.bounds = np.concatenate([[0], self.bounds, [len(self.periods)]]).astype(np.intp)
+
+    def _intern(self, name: str) -> int:
+        key = normalize_name(name)
+        pid = self.ids.get(key)
+        if pid is None:
+            pid = self.ids[key] = len(self.names)
+            self.names.append(name)
+        return pid
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def period_slices(self):
+        for start, stop in zip(self.bounds[:-1].tolist(), self.bounds[1:].tolist()):
+            if stop > start:
+                yield slice(start, stop)
+
+
+def elo_ratings(history: MatchHistory, k: float = ELO_K, initial: float = INITIAL_RATING) -> np.ndarray:
+    """Elo con actualización simultánea dentro de cada periodo."""
+    rating = np.full(len(history), initial)
+    for period in history.period_slices():
+        i, j, s = history.p1[period], history.p2[period], history.scores[period]
+        expected = 1.0 / (1.0 + 10.0 ** ((rating[j] - rating[i]) / 400.0))
+        delta = k * (s - expected)
+        rating += np.bincount(i, weights=delta, minlength=len(rating))
+        rating -= np.bincount(j, weights=delta, minlength=len(rating))
+    return rating
+
+
+def _glicko_volatility(sigma: np.ndarray, phi: np.ndarray, v: np.ndarray, delta: np.ndarray,
+                       tau: float) -> np.ndarray:
+    """Nueva volatilidad (paso 5 de Glicko-2) con el método de Illinois, vectorizado."""
+    a = np.log(sigma ** 2)
+    pv = phi ** 2 + v
+    excess = delta ** 2 - pv
+    inv_tau2 = 1.0 / tau ** 2
+
+    def f(x, excess, pv, a):
+        ex = np.exp(x)
+        return ex * (excess - ex) / (2.0 * (pv + ex) ** 2) - (x - a) * inv_tau2
+
+    big_a = a.copy()
+    big_b = np.log(np.where(excess > 0, excess, 1.0))
+    # Si delta² <= phi² + v, B = a - k·tau con el menor k que hace f(B) >= 0
+    need = np.flatnonzero(excess <= 0)
+    k = 1
+    while len(need):
+        b_try = a[need] - k * tau
+        ok = f(b_try, excess[need], pv[need], a[need]) >= 0
+        big_b[need[ok]] = b_try[ok]
+        need = need[~ok]
+        k += 1
+
+    fa, fb = f(big_a, excess, pv, a), f(big_b, excess, pv, a)
+    # Iteraciones solo sobre los jugadores que aún no han convergido
+    active = np.flatnonzero(np.abs(big_b - big_a) > _ILLINOIS_EPS)
+    for _ in range(100):
+        if not len(active):
+            break
+        ca, cb, cfa, cfb = big_a[active], big_b[active], fa[active], fb[active]
+        c = ca + (ca - cb) * cfa / (cfb - cfa)
+        fc = f(c, excess[active], pv[active], a[active])
+        swap = fc * cfb <= 0
+        big_a[active] = np.where(swap, cb, ca)
+        fa[active] = np.where(swap, cfb, cfa / 2.0)
+        big_b[active] = c
+        fb[active] = fc
+        active = active[np.abs(c - big_a[active]) > _ILLINOIS_EPS]
+    return np.exp(big_a / 2.0)
+
+
+def glicko2_period(mu: np.ndarray, phi: np.ndarray, sigma: np.ndarray, i: np.ndarray, j: np.ndarray,
+                   s: np.ndarray, tau: float = GLICKO_TAU) -> None:
+    """Aplica un periodo de Glicko-2 (escala interna mu/phi) modificando los arrays."""
+    n = len(mu)
+    # Cada partido aporta a los dos jugadores: se duplica en (jugador, rival, resultado)
+    me = np.concatenate([i, j])
+    opp = np.concatenate([j, i])
+    score = np.concatenate([s, 1.0 - s])
+    g = 1.0 / np.sqrt(1.0 + 3.0 * phi[opp] ** 2 / np.pi ** 2)
+    expected = 1.0 / (1.0 + np.exp(-g * (mu[me] - mu[opp])))
+
+    v_inv = np.bincount(me, weights=g ** 2 * expected * (1.0 - expected), minlength=n)
+    gain = np.bincount(me, weights=g * (score - expected), minlength=n)
+    played = v_inv > 0
+
+    v = 1.0 / v_inv[played]
+    new_sigma = _glicko_volatility(sigma[played], phi[played], v, v * gain[played], tau)
+    phi_star = np.sqrt(phi[played] ** 2 + new_sigma ** 2)
+    new_phi = 1.0 / np.sqrt(1.0 / phi_star ** 2 + 1.0 / v)
+    mu[played] += new_phi ** 2 * gain[played]
+    # Quien no juega solo ve crecer su incertidumbre
+    phi[~played] = np.sqrt(phi[~played] ** 2 + sigma[~played] ** 2)
+    phi[played] = new_phi
+    sigma[played] = new_sigma
+
+
+def glicko2_ratings(history: MatchHistory, tau: float = GLICKO_TAU, initial: float = INITIAL_RATING,
+                    rd: float = GLICKO_RD, volatility: float = GLICKO_VOLATILITY) -> Tuple[np.ndarray, ...]:
+    """
+    Glicko-2 por periodos. Devuelve (rating, RD, volatilidad) por jugador.
+
+    Cada periodo trabaja solo con los jugadores que juegan en él; el aumento
+    de RD de los periodos en blanco se aplica de golpe cuando vuelven a jugar.
+    """
+    n = len(history)
+    mu = np.full(n, (initial - 1500.0) / _GLICKO_SCALE)
+    phi = np.full(n, rd / _GLICKO_SCALE)
+    sigma = np.full(n, volatility)
+    synced = np.zeros(n, dtype=np.int64)   # periodos ya reflejados en phi
+    periods = 0
+    for period in history.period_slices():
+        i, j = history.p1[period], history.p2[period]
+        players, local = np.unique(np.concatenate([i, j]), return_inverse=True)
+        idle = periods - synced[players]
+        p_mu, p_sigma = mu[players], sigma[players]
+        p_phi = np.sqrt(phi[players] ** 2 + idle * p_sigma ** 2)
+        glicko2_period(p_mu, p_phi, p_sigma, local[:len(i)], local[len(i):], history.scores[period], tau)
+        mu[players], phi[players], sigma[players] = p_mu, p_phi, p_sigma
+        periods += 1
+        synced[players] = periods
+    phi = np.sqrt(phi ** 2 + (periods - synced) * sigma ** 2)
+    return 1500.0 + _GLICKO_SCALE * mu, _GLICKO_SCALE * phi, sigma
+
+
+def rating_table(editions: Sequence[MatchLedger]) -> pd.DataFrame:
+    """Tabla por jugador con Elo, Glicko-2 (rating, RD, volatilidad) y partidos, ordenada por Elo."""
+    history = MatchHistory(editions)
+    elo = elo_ratings(history)
+    glicko, rd, vol = glicko2_ratings(history)
+    games = np.bincount(np.concatenate([history.p1, history.p2]), minlength=len(history))
+    table = pd.DataFrame({
+        'Elo': elo.round(1),
+        'Glicko-2': glicko.round(1),
+        'RD': rd.round(1),
+        'Volatilidad': vol.round(4),
+        'Partidos': games,
+    }, index=pd.Index(history.names, name='Jugador'))
+    return table.sort_values(['Elo', 'Glicko-2'], ascending=False)
+
+
+def elo_dict(editions: Sequence[MatchLedger]) -> Dict[str, float]:
+    """Elo por nombre de jugador, en el formato que espera `simulacion.simulate_group(ratings=...)`."""
+    history = MatchHistory(editions)
+    return dict(zip(history.names, elo_ratings(history).tolist()))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Ratings Elo y Glicko-2 de los jugadores.')
+    parser.add_argument('ficheros', nargs='*', default=[DATA_FILE],
+                        help='Ficheros de resultados de cada edición, de la más antigua a la actual.')
+    args = parser.parse_args(argv)
+
+    editions = [load_data(path)[1] for path in args.ficheros]
+    pd.set_option('display.width', 200)
+    print(rating_table(editions).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Simulación Monte Carlo de la fase de grupos.
+
+Para cada grupo se sortean los partidos que faltan del todos contra todos
+(2-0 / 2-1 / 1-2 / 0-2), se aplica la puntuación real 5/3/1 y el orden de
+desempate Puntuación > Buchholz > HeadToHead > Dif. de pts., y se cuenta en qué
+puesto acaba cada jugador. Todo se hace por lotes de temporadas con NumPy.
+
+    python simulacion.py --temporadas 1000000 --workers 4
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calculos import SCORE_EFFECTS, MatchLedger, pair_results, recalculate_tiebreaks, remaining_fixtures
+
+# Orden de los resultados simulados (marcador desde el punto de vista de p1)
+OUTCOMES = [(2, 0), (2, 1), (1, 2), (0, 2)]
+_PTS1 = np.array([SCORE_EFFECTS[o][2] for o in OUTCOMES], dtype=np.float64)
+_PTS2 = np.array([SCORE_EFFECTS[o][3] for o in OUTCOMES], dtype=np.float64)
+_DIFF = np.array([s1 - s2 for s1, s2 in OUTCOMES], dtype=np.int64)
+
+# Tamaño de lote: nº de celdas temporada x jugador x jugador en memoria a la vez
+_CELLS_PER_BATCH = 10_000_000
+
+
+def bo3_probabilities(game_win: np.ndarray) -> np.ndarray:
+    """Probabilidades de 2-0 / 2-1 / 1-2 / 0-2 a partir de la probabilidad de ganar cada partida."""
+    q = np.asarray(game_win, dtype=np.float64)
+    return np.stack([q * q, 2 * q * q * (1 - q), 2 * q * (1 - q) ** 2, (1 - q) ** 2], axis=-1)
+
+
+def outcome_probabilities(fixtures: List[Tuple[int, int]], names: Sequence[str], probs: Sequence[float] = None,
+                          ratings: Dict[str, float] = None) -> np.ndarray:
+    """
+    Matriz (partidos x 4) con la probabilidad de cada resultado en OUTCOMES.
+
+    Con `ratings` (Elo) la probabilidad de ganar cada partida es la esperanza
+    Elo y el marcador sale del modelo BO3; si no, se usa `probs` para todos los
+    partidos (por defecto, los cuatro resultados equiprobables).
+    """
+    if ratings is not None:
+        ra = np.array([ratings.get(names[i], 1500.0) for i, _ in fixtures])
+        rb = np.array([ratings.get(names[j], 1500.0) for _, j in fixtures])
+        return bo3_probabilities(1.0 / (1.0 + 10.0 ** ((rb - ra) / 400.0))).reshape(len(fixtures), 4)
+    probs = np.asarray(probs if probs is not None else [0.25] * 4, dtype=np.float64)
+    return np.tile(probs / probs.sum(), (len(fixtures), 1))
+
+
+def _group_state(df: pd.DataFrame, matches: MatchLedger):
+    """Estado actual del grupo en arrays: puntos, diferencia, adyacencia y matriz de victorias."""
+    names = list(df.index)
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    adjacency = np.zeros((n, n), dtype=np.float64)
+    wins = np.zeros((n, n), dtype=bool)
+    for i, j, _, _, winner in pair_results(index, matches).values():
+        loser = j if winner == i else i
+        wins[winner, loser] = True
+        wins[loser, winner] = False
+    # Buchholz cuenta un rival por partido, incluidos partidos repetidos
+    for m in matches:
+        i, j = index.get(m[0]), index.get(m[1])
+        if i is not None and j is not None and i != j:
+            adjacency[i, j] += 1
+            adjacency[j, i] += 1
+    points = df['Puntuación'].to_numpy(dtype=np.float64)
+    diff = df['Dif. de pts.'].to_numpy(dtype=np.int64)
+    return names, points, diff, adjacency, wins
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """Simula `n_seasons` temporadas y devuelve la matriz jugador x puesto con los recuentos."""
+    points, diff, adjacency, wins, fixtures, probs, n_seasons, seed = args
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    fixtures = np.asarray(fixtures, dtype=np.intp).reshape(-1, 2)
+    a, b = fixtures[:, 0], fixtures[:, 1]
+    n_fix = len(fixtures)
+
+    # Adyacencia final (con todos los partidos jugados) e incidencia partido -> jugador
+    final_adj = adjacency.copy()
+    np.add.at(final_adj, (a, b), 1)
+    np.add.at(final_adj, (b, a), 1)
+    inc_a = np.zeros((n_fix, n))
+    inc_b = np.zeros((n_fix, n))
+    inc_a[np.arange(n_fix), a] = 1
+    inc_b[np.arange(n_fix), b] = 1
+    cumulative = np.cumsum(probs, axis=1)[:, :3].T.copy()
+
+    counts = np.zeros((n, n), dtype=np.int64)
+    batch = max(1, _CELLS_PER_BATCH // max(1, n * n))
+    done = 0
+    while done < n_seasons:
+        size = min(batch, n_seasons - done)
+        done += size
+
+        u = rng.random((size, n_fix))
+        outcome = (u > cumulative[0]).astype(np.intp)
+        outcome += u > cumulative[1]
+        outcome += u > cumulative[2]
+
+        pts = points + _PTS1[outcome] @ inc_a + _PTS2[outcome] @ inc_b
+        dif = diff + (_DIFF[outcome] @ inc_a - _DIFF[outcome] @ inc_b).astype(np.int64)
+        bh = pts @ final_adj.T
+
+        w = np.broadcast_to(wins, (size, n, n)).copy()
+        p1_wins = outcome < 2
+        w[:, a, b] = p1_wins
+        w[:, b, a] = ~p1_wins
+        # Puntuación y Buchholz son enteros acotados: una sola clave exacta para detectar empates
+        key = pts * 1e7 + bh
+        tied = key[:, :, None] == key[:, None, :]
+        h2h = (tied & w).sum(axis=2)
+
+        # lexsort es estable: a igualdad total se respeta el orden de la tabla, como sort_values
+        order = np.lexsort((-dif, -h2h, -bh, -pts), axis=-1)
+        flat = order * n + np.arange(n)[None, :]
+        counts += np.bincount(flat.ravel(), minlength=n * n).reshape(n, n)
+    return counts
+
+
+def simulate_group(df: pd.DataFrame, matches: MatchLedger, n_seasons: int = 1_000_000, top: int = 4,
+                   probs: Sequence[float] = None, ratings: Dict[str, float] = None, seed: int = None,
+                   workers: int = 1) -> pd.DataFrame:
+    """
+    Probabilidad de cada jugador de acabar entre los `top` primeros y en cada puesto.
+
+    `matches` son los partidos del grupo. Con `workers` > 1 las temporadas se
+    reparten entre procesos, cada uno con su propia semilla derivada de `seed`.
+    """
+    names, points, diff, adjacency, wins = _group_state(df, matches)
+    fixtures = remaining_fixtures(names, matches)
+    fixture_probs = outcome_probabilities(fixtures, names, probs, ratings)
+
+    workers = max(1, workers)
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [n_seasons // workers + (1 if k < n_seasons % workers else 0) for k in range(workers)]
+    tasks = [(points, diff, adjacency, wins, fixtures, fixture_probs, share, s)
+             for share, s in zip(shares, seeds) if share]
+    if len(tasks) == 1:
+        counts = _simulate_chunk(tasks[0])
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            counts = sum(pool.map(_simulate_chunk, tasks))
+
+    seed_probs = counts / float(n_seasons)
+    result = pd.DataFrame(seed_probs, index=names, columns=[f"Puesto {k + 1}" for k in range(len(names))])
+    result.insert(0, f"Top {top}", seed_probs[:, :top].sum(axis=1))
+    return result.sort_values(f"Top {top}", ascending=False)
+
+
+def main(argv=None) -> None:
+    from almacenamiento import open_store
+
+    parser = argparse.ArgumentParser(description='Probabilidades de clasificación para el playoff.')
+    parser.add_argument('--temporadas', type=int, default=1_000_000)
+    parser.add_argument('--top', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1, help=f'Procesos (hay {os.cpu_count()} núcleos).')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--elo', action='store_true', help='Probabilidades de cada partido según el Elo actual.')
+    args = parser.parse_args(argv)
+
+    group_tables, matches = open_store().load()
+    recalculate_tiebreaks(group_tables, matches)
+    ratings = None
+    if args.elo:
+        from ratings import elo_dict
+        ratings = elo_dict([matches])
+    pd.set_option('display.width', 200)
+    for group, df in group_tables.items():
+        result = simulate_group(df, matches.group(group), args.temporadas, args.top, ratings=ratings,
+                                seed=args.seed, workers=args.workers)
+        print(f"\n{group} - Probabilidades ({args.temporadas} temporadas)")
+        print((result * 100).round(1).to_string())
+
+
+if __name__ == '__main__':
+    main()
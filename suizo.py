@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Emparejamientos de sistema suizo a partir de la clasificación y los partidos.
+
+Los jugadores se ordenan como en la clasificación (Puntuación > Buchholz >
+HeadToHead > Dif. de pts.) y se agrupan por puntuación. En cada grupo de
+puntuación la mitad alta se enfrenta a la mitad baja (1º contra 1º de la mitad
+baja, etc.), sin repetir cruces: los rivales ya jugados se consultan en un
+índice de pares (claves enteras en un set), no recorriendo la lista de
+partidos.
+
+Dentro de cada grupo de puntuación el emparejamiento es un matching bipartito
+por caminos de aumento (cada jugador de la mitad alta prueba primero su rival
+ideal y luego los más cercanos), así que nunca hay backtracking exponencial.
+Los que se quedan sin rival bajan al siguiente grupo de puntuación. Si al
+final quedan jugadores que ya se han enfrentado, se reparan intercambiando
+rivales con parejas ya formadas.
+
+Con un número impar de jugadores descansa el peor clasificado de entre los
+que menos veces han descansado. El descanso se guarda en el registro de
+partidos como partido del jugador contra sí mismo en esa jornada
+(`calculos.register_bye`): puntúa como un 2-0 y quién ha descansado ya sale
+del propio registro. Un cruce repetido no se puede registrar (un resultado
+por pareja): `Pairing.register` lo rechaza antes de registrar nada. Las parejas salen como
+(p1, p2) con p1 el mejor clasificado, listas para `register_result`.
+
+    python suizo.py --grupo "Grupo 1"               # muestra la ronda
+    python suizo.py --grupo "Grupo 1" --guardar     # y guarda el descanso
+"""
+import argparse
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from calculos import (BYE_SCORE, SCORE_EFFECTS, MatchLedger, Standings, register_bye, register_result,
+                      sort_standings)
+from instrumentacion import incr, timed
+
+
+def pair_index(names: Sequence[str], matches: MatchLedger) -> Tuple[Set[int], Callable[[int, int], bool]]:
+    """
+    Índice de cruces ya jugados entre `names` (posiciones en la lista):
+    set de claves `lo * n + hi` y función `played(a, b)` en O(1).
+    """
+    n = len(names)
+    local = np.full(max(len(matches.registry.names), 1), -1, dtype=np.int64)
+    ids = matches.registry.ids
+    for k, name in enumerate(names):
+        if name in ids:
+            local[ids[name]] = k
+    records = matches.records
+    a, b = local[records['p1']], local[records['p2']]
+    # Los descansos (a == b) no son cruces
+    known = (a >= 0) & (b >= 0) & (a != b)
+    a, b = a[known], b[known]
+    played = set((np.minimum(a, b) * n + np.maximum(a, b)).tolist())
+
+    def has_played(i: int, j: int) -> bool:
+        return (i * n + j if i < j else j * n + i) in played
+
+    return played, has_played
+
+
+def _preference(t: int, size: int) -> Iterable[int]:
+    """Posiciones de la mitad baja por cercanía al rival ideal `t`: t, t+1, t-1, t+2, ..."""
+    yield from (b for step in range(size) for b in ((t + step, t - step) if step else (t,)) if 0 <= b < size)
+
+
+def _bracket_matching(top: List[int], bottom: List[int], played: Callable[[int, int], bool]) -> Dict[int, int]:
+    """
+    Matching mitad alta -> mitad baja sin cruces repetidos. Cada jugador de
+    la mitad alta busca, en anchura, un camino de aumento que respete el orden
+    de preferencia. Devuelve {posición en top: posición en bottom}.
+    """
+    owner: List[Optional[int]] = [None] * len(bottom)
+    assigned: Dict[int, int] = {}
+    for t in range(len(top)):
+        parent: Dict[int, int] = {}
+        queue = deque([t])
+        found = None
+        while queue and found is None:
+            u = queue.popleft()
+            for b in _preference(u, len(bottom)):
+                if b in parent or played(top[u], bottom[b]):
+                    continue
+                parent[b] = u
+                if owner[b] is None:
+                    found = b
+                    break
+                queue.append(owner[b])
+        # Aumento: cada jugador del camino pasa al rival por el que se le alcanzó
+        b = found
+        while b is not None:
+            u = parent[b]
+            previous = assigned.get(u)
+            owner[b], assigned[u] = u, b
+            b = previous
+    return assigned
+
+
+def _repair(pairs: List[Tuple[int, int]], leftover: List[int], played: Callable[[int, int], bool]
+            ) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Empareja los jugadores que quedan sueltos (que ya se han enfrentado entre
+    sí) intercambiando rivales con parejas ya formadas, de las últimas mesas
+    hacia arriba. Si no hay intercambio posible se repite cruce. Devuelve las
+    parejas nuevas y el número de cruces repetidos.
+    """
+    rematches = 0
+    while len(leftover) >= 2:
+        a, b = leftover.pop(0), leftover.pop(0)
+        if not played(a, b):
+            pairs.append((a, b))
+            continue
+        for k in range(len(pairs) - 1, -1, -1):
+            c, d = pairs[k]
+            if not played(a, c) and not played(b, d):
+                pairs[k] = (c, a) if c < a else (a, c)
+                pairs.append((b, d) if b < d else (d, b))
+                break
+            if not played(a, d) and not played(b, c):
+                pairs[k] = (a, d) if a < d else (d, a)
+                pairs.append((b, c) if b < c else (c, b))
+                break
+        else:
+            pairs.append((a, b))
+            rematches += 1
+    return pairs, rematches
+
+
+class Pairing:
+    """Emparejamientos de una ronda: `pairs` (p1, p2) por mesa, jugador que descansa y cruces repetidos."""
+
+    def __init__(self, pairs: List[Tuple[str, str]], bye: Optional[str], round_number: int, rematches: int = 0):
+        self.pairs = pairs
+        self.bye = bye
+        self.round_number = round_number
+        self.rematches = rematches
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def __repr__(self) -> str:
+        return f"Pairing(ronda {self.round_number}: {len(self.pairs)} mesas, descansa {self.bye!r})"
+
+    def register(self, df, scores: Sequence[Tuple[int, int]], matches: MatchLedger, played_on: str = None,
+                 verbose: bool = False) -> int:
+        """
+        Registra con `register_result` el marcador de cada mesa (en el orden de
+        `pairs`, desde el punto de vista de p1) y el descanso, si lo hay y no
+        estaba ya guardado. `df` es la tabla del grupo o un motor `Standings`.
+        Si alguna mesa no se puede registrar (falta o sobra un marcador, es
+        inválido o el cruce ya se jugó) lanza ValueError sin registrar nada.
+        Devuelve el número de resultados registrados.
+        """
+        scores = [tuple(score) for score in scores]
+        problems = []
+        if len(scores) != len(self.pairs):
+            problems.append(f"{len(scores)} marcadores para {len(self.pairs)} mesas")
+        for (p1, p2), score in zip(self.pairs, scores):
+            if score not in SCORE_EFFECTS:
+                problems.append(f"{p1} - {p2}: marcador inválido {score[0]}-{score[1]}")
+            elif matches.has_pair(p1, p2):
+                problems.append(f"{p1} - {p2}: ya se enfrentaron")
+        if problems:
+            incr('suizo.rondas_rechazadas')
+            raise ValueError(f"No se registra la ronda {self.round_number}: " + '; '.join(problems))
+
+        registered = 0
+        for (p1, p2), (score1, score2) in zip(self.pairs, scores):
+            registered += register_result(df, p1, p2, score1, score2, matches, verbose=verbose,
+                                          round_number=self.round_number, played_on=played_on)
+        if self.bye and matches.get_bye(self.bye, self.round_number) is None:
+            registered += register_bye(df, self.bye, matches, verbose=verbose, round_number=self.round_number,
+                                       played_on=played_on)
+        return registered
+
+
+def next_round(matches: MatchLedger) -> int:
+    """Jornada siguiente a la última con partidos registrados (1 si no hay ninguna); los descansos no cuentan."""
+    records = matches.records
+    rounds = records['round'][records['p1'] != records['p2']]
+    return int(rounds.max()) + 1 if len(rounds) else 1
+
+
+@timed('suizo.pair_round')
+def pair_round(df: pd.DataFrame, matches: MatchLedger, round_number: int = None) -> Pairing:
+    """
+    Emparejamientos de la siguiente ronda para la tabla `df` (índice = nombres,
+    como `group_tables[grupo]`, o un motor `Standings`) con los partidos de
+    `matches`, descansos registrados incluidos. Si ya hay un descanso guardado
+    para `round_number`, ese jugador es el que descansa; si no, el peor
+    clasificado de los que menos han descansado.
+    """
+    if isinstance(df, Standings):
+        df = df.to_frame()
+    ranked = sort_standings(df)
+    names = list(ranked.index)
+    _, played = pair_index(names, matches)
+
+    if round_number is None:
+        round_number = next_round(matches)
+
+    order = list(range(len(names)))
+    bye = None
+    if len(order) % 2:
+        rested = matches.byes()
+        saved = [k for k in order if round_number in rested.get(names[k], ())]
+        bye = saved[0] if saved else min(reversed(order), key=lambda k: len(rested.get(names[k], ())))
+        order.remove(bye)
+
+    # Grupos de puntuación en orden de clasificación
+    points = ranked['Puntuación'].to_numpy()
+    brackets: List[List[int]] = []
+    for k in order:
+        if brackets and points[brackets[-1][-1]] == points[k]:
+            brackets[-1].append(k)
+        else:
+            brackets.append([k])
+
+    pairs: List[Tuple[int, int]] = []
+    floaters: List[int] = []
+    for bracket in brackets:
+        players = floaters + bracket
+        floaters = []
+        if len(players) % 2:
+            floaters.append(players.pop())
+        half = len(players) // 2
+        top, bottom = players[:half], players[half:]
+        assigned = _bracket_matching(top, bottom, played)
+        pairs.extend((top[t], bottom[b]) for t, b in sorted(assigned.items()))
+        taken = set(assigned.values())
+        # Los que no encuentran rival bajan (en orden de clasificación) al siguiente grupo
+        floaters = sorted(floaters + [top[t] for t in range(half) if t not in assigned]
+                          + [bottom[b] for b in range(len(bottom)) if b not in taken])
+
+    pairs, rematches = _repair(pairs, sorted(floaters), played)
+    if rematches:
+        incr('suizo.cruces_repetidos', rematches)
+    pairs.sort()
+    return Pairing([(names[a], names[b]) for a, b in pairs], names[bye] if bye is not None else None,
+                   round_number, rematches)
+
+
+def main(argv=None) -> None:
+    from almacenamiento import ResultWriter, open_store
+
+    parser = argparse.ArgumentParser(description='Emparejamientos de la siguiente ronda por sistema suizo.')
+    parser.add_argument('--grupo', default=None, help='Grupo a emparejar (por defecto, el primero).')
+    parser.add_argument('--jornada', type=int, default=None, help='Número de ronda (por defecto, la siguiente).')
+    parser.add_argument('--guardar', action='store_true', help='Guarda el descanso de la ronda.')
+    args = parser.parse_args(argv)
+
+    store = open_store()
+    group_tables, matches = store.load()
+    group = args.grupo or next(iter(group_tables))
+    if group not in group_tables:
+        raise SystemExit(f"Grupo desconocido: {group} (disponibles: {', '.join(group_tables)})")
+    pairing = pair_round(group_tables[group], matches.group(group), args.jornada)
+
+    print(f"{group} - Ronda {pairing.round_number}")
+    for board, (p1, p2) in enumerate(pairing.pairs, 1):
+        print(f"  Mesa {board:3}: {p1} - {p2}")
+    if pairing.bye:
+        print(f"  Descansa: {pairing.bye}")
+        if args.guardar:
+            writer = ResultWriter(store)
+            writer.add(pairing.bye, pairing.bye, *BYE_SCORE, pairing.round_number)
+            result = writer.close()
+            if not (result.applied or result.duplicates):
+                raise SystemExit(f"No se ha podido guardar el descanso de {pairing.bye}.")
+            print(f"✅ Descanso de {pairing.bye} guardado ({BYE_SCORE[0]}-{BYE_SCORE[1]}).")
+    if pairing.rematches:
+        print(f"⚠️ {pairing.rematches} cruces repetidos: no hay emparejamiento sin repetir "
+              f"y esos resultados no se podrán registrar.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Regresiones del almacenamiento: desempates al reaplicar el log de eventos."""
+import os
+
+import pytest
+
+import calculos
+import ligas
+from almacenamiento import ResultWriter, open_store
+
+ROSTER = {
+    'Grupo A': ['Ana', 'Bea', 'Carla', 'Dani', 'Eva', 'Fran'],
+    'Grupo B': ['Gil', 'Hugo', 'Iker', 'Juan'],
+}
+RESULTS = [
+    ('Ana', 'Bea', 2, 0), ('Carla', 'Dani', 2, 1), ('Eva', 'Fran', 1, 2),
+    ('Ana', 'Carla', 0, 2), ('Bea', 'Eva', 2, 1), ('Dani', 'Fran', 2, 0),
+    ('Gil', 'Hugo', 2, 1), ('Iker', 'Juan', 0, 2),
+]
+
+
+@pytest.fixture
+def edition(tmp_path):
+    return ligas.Edition('prueba', 'Prueba', '1', 'Prueba', os.path.join(tmp_path, 'resultados.json'), ROSTER)
+
+
+@pytest.mark.parametrize('kind', ['json', 'eventlog', 'sqlite'])
+def test_commit_without_close_keeps_tiebreaks(kind, edition):
+    store = open_store(kind, edition=edition)
+    store.snapshot(*store.load())
+    writer = ResultWriter(open_store(kind, edition=edition))
+    for result in RESULTS:
+        writer.add(*result)
+    assert len(writer.commit().applied) == len(RESULTS)
+
+    group_tables, matches = open_store(kind, edition=edition).load()
+    assert len(matches) == len(RESULTS)
+    assert calculos.check_consistency(group_tables, matches) == []
+    assert group_tables['Grupo A']['Buchholz'].sum() > 0
+
+
+@pytest.mark.parametrize('kind', ['json', 'eventlog', 'sqlite'])
+def test_commit_recalculates_groups_synced_from_other_writers(kind, edition):
+    store = open_store(kind, edition=edition)
+    store.snapshot(*store.load())
+    first = ResultWriter(open_store(kind, edition=edition))
+    second = ResultWriter(open_store(kind, edition=edition))
+    for result in RESULTS[:6]:
+        first.add(*result)
+    first.commit()
+    second.add(*RESULTS[6])
+    second.commit()
+
+    assert calculos.check_consistency(second.group_tables, second.matches) == []
+    group_tables, matches = open_store(kind, edition=edition).load()
+    assert len(matches) == 7
+    assert calculos.check_consistency(group_tables, matches) == []
+
+
+@pytest.mark.parametrize('kind', ['json', 'eventlog', 'sqlite'])
+def test_byes_are_stored_per_round(kind, edition):
+    writer = ResultWriter(open_store(kind, edition=edition))
+    writer.add('Gil', 'Gil', *calculos.BYE_SCORE, 1)
+    writer.add('Gil', 'Gil', *calculos.BYE_SCORE, 2)
+    writer.add('Gil', 'Gil', *calculos.BYE_SCORE, 2)
+    result = writer.close()
+    assert (len(result.applied), len(result.duplicates)) == (2, 1)
+
+    group_tables, matches = open_store(kind, edition=edition).load()
+    assert matches.byes() == {'Gil': [1, 2]}
+    assert group_tables['Grupo B'].at['Gil', 'Puntuación'] == 10
+    assert calculos.check_consistency(group_tables, matches) == []
+
+
+def test_new_sqlite_database_is_seeded_from_json(edition):
+    writer = ResultWriter(open_store('json', edition=edition))
+    for result in RESULTS:
+        writer.add(*result)
+    writer.close()
+    expected_tables, expected_matches = open_store('json', edition=edition).load()
+
+    group_tables, matches = open_store('sqlite', edition=edition).load()
+    assert matches.to_list() == expected_matches.to_list()
+    for group, df in expected_tables.items():
+        assert group_tables[group].loc[df.index].equals(df)
+    # Reabrir no vuelve a importar
+    assert len(open_store('sqlite', edition=edition).load()[1]) == len(RESULTS)
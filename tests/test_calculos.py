@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Regresiones de las correcciones de resultados (`calculos.py edit/delete`)."""
+import argparse
+import itertools
+import json
+import os
+
+import pytest
+
+import calculos
+import ligas
+from almacenamiento import ResultWriter, open_store
+from benchmarks.generador import generate_league
+
+ROSTER = {'Grupo A': ['Ana', 'Bea', 'Carla', 'Dani', 'Eva', 'Fran']}
+RESULTS = [('Ana', 'Bea', 2, 0), ('Ana', 'Carla', 0, 2), ('Bea', 'Eva', 2, 1), ('Dani', 'Fran', 2, 0),
+           ('Eva', 'Fran', 1, 2)]
+
+
+def test_edit_does_not_persist_stale_tiebreaks(tmp_path):
+    data_file = os.path.join(tmp_path, 'resultados.json')
+    edition = ligas.Edition('prueba', 'Prueba', '1', 'Prueba', data_file, ROSTER)
+    writer = ResultWriter(open_store('json', edition=edition))
+    for result in RESULTS:
+        writer.add(*result)
+    writer.close()
+
+    # Buchholz desfasado de un jugador que no es rival de los del partido corregido
+    with open(data_file, encoding='utf-8') as f:
+        data = json.load(f)
+    table = data['tables']['Grupo A']
+    table['columns']['Buchholz'][table['index'].index('Fran')] += 7
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    store = open_store('json', edition=edition)
+    assert calculos._correct(store, argparse.Namespace(command='edit', result='Ana 2-1 Bea')) == 0
+    group_tables, matches = open_store('json', edition=edition).load()
+    assert matches.get_pair('Ana', 'Bea')[2:4] == (2, 1)
+    assert calculos.check_consistency(group_tables, matches) == []
+
+
+def test_incremental_corrections_match_full_recalculation():
+    _, group_tables, matches = generate_league(groups=2, players_per_group=8, completion=0.6, seed=3)
+    calculos.recalculate_tiebreaks(group_tables, matches)
+    for i, m in enumerate(matches.to_list()[:12]):
+        if i % 3 == 2:
+            assert calculos.delete_result(group_tables, matches, m[0], m[1], verbose=False)
+        else:
+            assert calculos.edit_result(group_tables, matches, m[0], m[1], m[3], m[2], verbose=False)
+        # Cada delta deja las tablas igual que un recálculo completo
+        assert calculos.check_consistency(group_tables, matches) == []
+
+
+def _brute_force_clinch(df, matches, top):
+    """Estado de cada jugador probando todas las formas de acabar el grupo."""
+    names = list(df.index)
+    fixtures = calculos.remaining_fixtures(names, matches)
+    clinched, eliminated = set(names), set(names)
+    for outcome in itertools.product(calculos.SCORE_EFFECTS.values(), repeat=len(fixtures)):
+        points = [int(round(p)) for p in df['Puntuación'].tolist()]
+        for (i, j), effect in zip(fixtures, outcome):
+            points[i] += effect[2]
+            points[j] += effect[3]
+        for p, name in enumerate(names):
+            if sum(q >= points[p] for k, q in enumerate(points) if k != p) >= top:
+                clinched.discard(name)
+            if sum(q > points[p] for k, q in enumerate(points) if k != p) < top:
+                eliminated.discard(name)
+    return {name: 'clinched' if name in clinched else 'eliminated' if name in eliminated else None
+            for name in names}
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_clinch_status_matches_brute_force(seed):
+    _, group_tables, matches = generate_league(groups=1, players_per_group=6, completion=0.8, seed=seed)
+    df = group_tables['Grupo 1']
+    assert calculos.clinch_status(df, matches, top=2) == _brute_force_clinch(df, matches, 2)
+
+
+def test_clinch_status_leaves_unresolved_when_budget_runs_out(monkeypatch):
+    _, group_tables, matches = generate_league(groups=1, players_per_group=6, completion=0.8, seed=3)
+    df = group_tables['Grupo 1']
+    expected = _brute_force_clinch(df, matches, 2)
+    monkeypatch.setattr(calculos, 'CLINCH_SEARCH_NODES', 1)
+    status = calculos.clinch_status(df, matches, top=2)
+    assert None in status.values()
+    assert all(value is None or value == expected[name] for name, value in status.items())
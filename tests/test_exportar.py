@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Regresiones de la exportación estática."""
+import json
+import os
+
+import ligas
+from exportar import export_site
+
+
+def test_groups_with_same_slug_get_their_own_files(tmp_path):
+    roster = {'Grupo 1': ['Ana', 'Bea', 'Carla', 'Dani'], 'grupo-1': ['Eva', 'Fran', 'Gil', 'Hugo']}
+    edition = ligas.Edition('prueba', 'Prueba', '1', 'Prueba', os.path.join(tmp_path, 'resultados.json'), roster)
+    root = os.path.join(tmp_path, 'sitio')
+    assert export_site(root, edition)['renderizados'] == 2
+
+    with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+        groups = json.load(f)['groups']
+    assert {groups[g]['json'] for g in roster} == {'datos/grupo-1.json', 'datos/grupo-1-2.json'}
+    for group, names in roster.items():
+        with open(os.path.join(root, groups[group]['json']), encoding='utf-8') as f:
+            assert sorted(row['Nombre'] for row in json.load(f)) == names
+
+    with open(os.path.join(root, '_headers'), encoding='utf-8') as f:
+        assert '/manifest.json\n  Cache-Control: no-cache\n' in f.read()
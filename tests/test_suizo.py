@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Regresiones del emparejamiento suizo: descansos y cruces repetidos."""
+import pytest
+
+import calculos
+import suizo
+from calculos import MatchLedger, initialize_table, recalculate_tiebreaks, register_bye, register_result
+
+NAMES = ['Ana', 'Bea', 'Carla']
+
+
+@pytest.fixture
+def league():
+    return {'Grupo A': initialize_table(NAMES)}, MatchLedger.from_roster([], {'Grupo A': NAMES})
+
+
+def test_bye_scores_as_win_without_opponent(league):
+    group_tables, matches = league
+    df = group_tables['Grupo A']
+    assert register_result(df, 'Ana', 'Bea', 2, 1, matches, verbose=False, round_number=1)
+    assert register_bye(df, 'Carla', matches, verbose=False, round_number=1)
+    recalculate_tiebreaks(group_tables, matches)
+
+    assert df.at['Carla', 'Puntuación'] == 5 and df.at['Carla', 'Victorias'] == 1
+    assert matches.opponents('Carla') == []
+    assert df.at['Carla', 'Buchholz'] == 0
+    assert calculos.check_consistency(group_tables, matches) == []
+
+
+def test_second_bye_once_everyone_has_rested(league):
+    group_tables, matches = league
+    df = group_tables['Grupo A']
+    for rnd, name in enumerate(NAMES, 1):
+        assert register_bye(df, name, matches, verbose=False, round_number=rnd)
+
+    pairing = suizo.pair_round(df, matches)
+    assert pairing.round_number == 1 and pairing.bye is not None
+    # La ronda 1 ya tiene descanso guardado (Ana): se reutiliza
+    assert pairing.bye == 'Ana'
+
+    pairing = suizo.pair_round(df, matches, round_number=4)
+    assert pairing.register(df, [(2, 0)], matches) == 2
+    assert matches.byes()[pairing.bye] == [NAMES.index(pairing.bye) + 1, 4]
+    assert not register_bye(df, pairing.bye, matches, verbose=False, round_number=4)
+    recalculate_tiebreaks(group_tables, matches)
+    assert calculos.check_consistency(group_tables, matches) == []
+
+
+def test_register_rejects_rematch_without_registering(league):
+    group_tables, matches = league
+    df = group_tables['Grupo A']
+    assert register_result(df, 'Ana', 'Bea', 2, 0, matches, verbose=False, round_number=1)
+    pairing = suizo.Pairing([('Ana', 'Bea')], 'Carla', 2, rematches=1)
+    with pytest.raises(ValueError, match='ya se enfrentaron'):
+        pairing.register(df, [(2, 1)], matches)
+    assert len(matches) == 1
+    assert matches.byes() == {}
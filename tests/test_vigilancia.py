@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Regresiones de la clasificación en vivo."""
+import os
+import time
+
+import pytest
+
+import ligas
+from almacenamiento import ResultWriter, open_store
+from vigilancia import LiveStandings
+
+ROSTER = {'Grupo A': ['Ana', 'Bea', 'Carla', 'Dani']}
+
+
+@pytest.mark.parametrize('kind', ['json', 'eventlog', 'sqlite'])
+def test_watcher_thread_picks_up_new_results(kind, tmp_path):
+    edition = ligas.Edition('prueba', 'Prueba', '1', 'Prueba', os.path.join(tmp_path, 'resultados.json'), ROSTER)
+    live = LiveStandings(open_store(kind, edition=edition), interval=0.02, debounce=0.02, max_delay=0.1).start()
+    try:
+        version = live.version
+        writer = ResultWriter(open_store(kind, edition=edition))
+        writer.add('Ana', 'Bea', 2, 0)
+        writer.close()
+        deadline = time.monotonic() + 5
+        while live.version == version and time.monotonic() < deadline:
+            time.sleep(0.02)
+        table, _ = live.group('Grupo A')
+        assert table.set_index('Nombre').at['Ana', 'Puntuación'] == 5
+    finally:
+        live.stop()
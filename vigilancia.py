@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Clasificación en vivo: vigila el almacenamiento y actualiza en memoria solo
+los grupos afectados.
+
+Un hilo consulta cada `interval` segundos la firma (mtime, tamaño) de los
+ficheros del almacenamiento. Los cambios se agrupan: se espera a que la firma
+lleve `debounce` segundos sin moverse (como mucho `max_delay` desde el primer
+cambio), así que pegar 20 resultados seguidos provoca un único refresco.
+
+- Log de eventos (EventLogStore) sin compactar: se leen solo los eventos
+  nuevos y se aplican a los grupos de esos partidos.
+- Cualquier otro cambio (resultados.json reescrito, compactación, SQLite): se
+  recarga y se comparan huellas por grupo; solo los grupos que cambian
+  recalculan desempates y tabla.
+
+Cada grupo lleva un número de versión que sube al cambiar; la app lo lee desde
+fragmentos con `run_every` y solo cambia el panel de ese grupo.
+
+    python vigilancia.py          # muestra los grupos que cambian
+"""
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from almacenamiento import EventLogStore, Store, open_store
+from calculos import MatchLedger, display_standings, recalculate_tiebreaks
+from instrumentacion import incr, span
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.5
+DEBOUNCE = 0.3
+MAX_DELAY = 2.0
+
+
+def group_digest(df: pd.DataFrame, matches: MatchLedger, group: str) -> str:
+    """Huella de la tabla base y los partidos de un grupo."""
+    digest = hashlib.sha1(matches.group(group).records.tobytes())
+    digest.update(repr(list(df.index)).encode('utf-8'))
+    digest.update(df[['Victorias', 'Derrotas', 'Puntuación', 'Dif. de pts.']].to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class LiveStandings:
+    """Clasificaciones en memoria que se mantienen al día con el almacenamiento."""
+
+    def __init__(self, store: Store, interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE,
+                 max_delay: float = MAX_DELAY):
+        self.store = store
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.version = 0
+        self.versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.group_tables: Dict[str, pd.DataFrame] = {}
+        self.matches = MatchLedger()
+        self.display_tables: Dict[str, pd.DataFrame] = {}
+        self._digests: Dict[str, str] = {}
+        self._signature = store.signature()
+        self.reload()
+
+    # -- consulta -------------------------------------------------------------
+
+    def group(self, group: str) -> Tuple[pd.DataFrame, int]:
+        """Tabla para mostrar de un grupo y su versión."""
+        with self._lock:
+            return self.display_tables[group], self.versions.get(group, 0)
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        with self._lock:
+            return dict(self.display_tables)
+
+    def state(self) -> Tuple[int, Dict[str, pd.DataFrame], MatchLedger]:
+        """Versión global, tablas para mostrar y partidos, leídos a la vez."""
+        with self._lock:
+            return self.version, dict(self.display_tables), self.matches
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        """`callback(grupos)` tras cada refresco que cambia algún grupo (desde el hilo vigilante)."""
+        self._listeners.append(callback)
+
+    # -- actualización --------------------------------------------------------
+
+    def _publish(self, group_tables: Dict[str, pd.DataFrame], matches: MatchLedger, changed: List[str]) -> None:
+        """Recalcula desempates y tabla de los grupos cambiados y los publica de golpe."""
+        subset = {group: group_tables[group] for group in changed}
+        recalculate_tiebreaks(subset, matches)
+        display = display_standings(subset, matches)
+        with self._lock:
+            self.group_tables, self.matches = group_tables, matches
+            self.display_tables = {group: display.get(group, self.display_tables.get(group))
+                                   for group in group_tables}
+            for group in changed:
+                self._digests[group] = group_digest(group_tables[group], matches, group)
+                self.versions[group] = self.versions.get(group, 0) + 1
+            if changed:
+                self.version += 1
+        incr('vigilancia.grupos_actualizados', len(changed))
+
+    def reload(self) -> List[str]:
+        """Recarga el almacenamiento y actualiza solo los grupos cuya huella cambió."""
+        group_tables, matches = self.store.load()
+        changed = [group for group, df in group_tables.items()
+                   if self._digests.get(group) != group_digest(df, matches, group)]
+        self._publish(group_tables, matches, changed)
+        return changed
+
+    def _apply_events(self) -> List[str]:
+        """
+        Aplica los eventos nuevos del log a copias de las tablas y del registro
+        de partidos: los lectores siguen con los publicados hasta `_publish`.
+        """
+        group_tables = dict(self.group_tables)
+        matches = self.matches.copy()
+        changed = self.store.apply_events(group_tables, matches, self.store.events_after(self.store.seq))
+        self._publish(group_tables, matches, changed)
+        return changed
+
+    def refresh(self, previous: Tuple[Tuple[int, int], ...] = None) -> List[str]:
+        """
+        Incorpora los cambios del almacenamiento. Si solo ha crecido el log de
+        eventos se aplican sus eventos nuevos; si no, se recarga.
+        """
+        with span('vigilancia.refresco'):
+            incr('vigilancia.refrescos')
+            only_log = (isinstance(self.store, EventLogStore) and previous is not None
+                        and previous[0] == self._signature[0] and self._signature[1][1] >= previous[1][1])
+            changed = self._apply_events() if only_log else self.reload()
+        if changed:
+            for callback in self._listeners:
+                callback(changed)
+        return changed
+
+    # -- hilo vigilante -------------------------------------------------------
+
+    def poll(self) -> bool:
+        """Comprueba la firma una vez; True si ha cambiado desde la última comprobación."""
+        signature = self.store.signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def _run(self) -> None:
+        applied = self._signature
+        first_change = last_change = None
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            if self.poll():
+                first_change = first_change or now
+                last_change = now
+                if now - first_change < self.max_delay:
+                    continue
+            if first_change is None:
+                continue
+            if now - last_change < self.debounce and now - first_change < self.max_delay:
+                continue
+            try:
+                self.refresh(applied)
+            except Exception as exc:   # p. ej. fichero a medio escribir: se reintenta en el siguiente ciclo
+                incr('vigilancia.errores')
+                logger.warning("Error al refrescar la clasificación: %s", exc)
+                continue
+            applied = self._signature
+            first_change = last_change = None
+
+    def start(self) -> 'LiveStandings':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='liga-vigilancia', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    live = LiveStandings(open_store())
+    live.subscribe(lambda groups: print(f"{time.strftime('%H:%M:%S')} actualizados: {', '.join(groups)}"))
+    live.start()
+    print("Vigilando", ', '.join(live.store.watched_files()), "(Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        live.stop()
+
+
+if __name__ == '__main__':
+    main()